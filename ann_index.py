@@ -0,0 +1,287 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _open_at(file_path: str, offset: int):
+    """Opens file_path for appending at offset, dropping anything written past it."""
+    f = open(file_path, "r+b" if offset and os.path.exists(file_path) else "wb")
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+def _top_k(scores, k):
+    k = min(k, scores.shape[-1])
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) cosine-similarity index built on NumPy.
+
+    Vectors are clustered with spherical k-means into nlist cells; a query only
+    scores the vectors in its nprobe closest cells, so search cost grows with
+    n * nprobe / nlist rather than n. Until min_train vectors have been added
+    the index falls back to exact search. Each vector carries a JSON payload
+    (e.g. the article title and text) that is returned with search results.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: int = None,
+        nprobe: int = 8,
+        min_train: int = 256,
+        retrain_factor: float = 4.0,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.size = 0
+        self.payloads = []
+        self.row_keys = []
+        self.keys = set()
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=np.int64)
+        self.lists = []
+        self.trained_size = 0
+        self.train_count = 0
+        self.saved_path = None
+        self.saved_size = 0
+        self.saved_payload_bytes = 0
+        self.saved_train_count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def _reserve(self, n: int):
+        if self.size + n <= self.vectors.shape[0]:
+            return
+        capacity = max(self.size + n, 2 * self.vectors.shape[0], 1024)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[: self.size] = self.vectors[: self.size]
+        self.vectors = vectors
+
+    def train(self, iterations: int = 10, sample_size: int = 20_000):
+        """Runs spherical k-means over (a sample of) the stored vectors and rebuilds the inverted lists."""
+        data = self.vectors[: self.size]
+        nlist = self.nlist or max(1, int(np.sqrt(self.size)))
+        nlist = min(nlist, self.size)
+        rng = np.random.default_rng(self.seed)
+
+        sample = data
+        if self.size > sample_size:
+            sample = data[rng.choice(self.size, sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+
+        self.centroids = centroids
+        self.assignments = np.empty(0, dtype=np.int64)
+        self.lists = [[] for _ in range(nlist)]
+        self._assign(0, self.size)
+        self.trained_size = self.size
+        self.train_count += 1
+
+    def _assign(self, start: int, end: int):
+        labels = np.argmax(self.vectors[start:end] @ self.centroids.T, axis=1)
+        self.assignments = np.concatenate([self.assignments, labels])
+        for row, label in zip(range(start, end), labels):
+            self.lists[label].append(row)
+
+    def add(self, vectors, payloads: list, keys: list = None):
+        """
+        Adds vectors incrementally, skipping keys already in the index.
+
+        Args:
+            vectors (array-like): A (n, dim) array of embeddings.
+            payloads (list of dict): JSON-serializable payload per vector.
+            keys (list of str, optional): Dedup key per vector, e.g. a text hash.
+
+        Returns:
+            int: The number of vectors actually added.
+        """
+        vectors = _normalize(vectors)
+        keys = keys or [None] * len(vectors)
+        with self.lock:
+            keep = [
+                i for i, key in enumerate(keys) if key is None or key not in self.keys
+            ]
+            if not keep:
+                return 0
+
+            start = self.size
+            self._reserve(len(keep))
+            self.vectors[start : start + len(keep)] = vectors[keep]
+            self.size += len(keep)
+            for i in keep:
+                self.payloads.append(payloads[i])
+                self.row_keys.append(keys[i])
+                if keys[i] is not None:
+                    self.keys.add(keys[i])
+
+            if not self.trained:
+                if self.size >= self.min_train:
+                    self.train()
+            elif self.size > self.trained_size * self.retrain_factor:
+                self.train()
+            else:
+                self._assign(start, self.size)
+        return len(keep)
+
+    def search(self, queries, k: int = 5, nprobe: int = None, exact: bool = False):
+        """
+        Finds the k nearest stored vectors for each query by cosine similarity.
+
+        Args:
+            queries (array-like): A (q, dim) array of query embeddings.
+            k (int, optional): Neighbours per query. Defaults to 5.
+            nprobe (int, optional): Cells to scan per query. Defaults to self.nprobe.
+            exact (bool, optional): Scan every vector instead of probing cells.
+
+        Returns:
+            list of list of tuples: Per query, (row, score, payload) tuples, best first.
+        """
+        queries = _normalize(queries)
+        nprobe = nprobe or self.nprobe
+        results = []
+        with self.lock:
+            data = self.vectors[: self.size]
+            for query in queries:
+                if exact or not self.trained:
+                    candidates = np.arange(self.size)
+                else:
+                    cells = _top_k(self.centroids @ query, nprobe)
+                    candidates = np.fromiter(
+                        (row for cell in cells for row in self.lists[cell]),
+                        dtype=np.int64,
+                    )
+                scores = data[candidates] @ query
+                top = _top_k(scores, k)
+                results.append(
+                    [
+                        (int(candidates[i]), float(scores[i]), self.payloads[candidates[i]])
+                        for i in top
+                    ]
+                )
+        return results
+
+    def save(self, path: str):
+        """
+        Persists the index under path. Vectors, payloads and cell assignments go to
+        append-only files (path.f32, path.jsonl, path.i64) and only rows added since
+        the last save to the same path are written; centroids (path.npy) and all
+        assignments are rewritten only after a retrain. path.json, replaced last,
+        records how many rows are valid, so a save interrupted midway is ignored.
+        """
+        with self.lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            start = self.saved_size if self.saved_path == path else 0
+            payload_bytes = self.saved_payload_bytes if start else 0
+
+            with _open_at(path + ".f32", start * self.dim * 4) as f:
+                f.write(np.ascontiguousarray(self.vectors[start : self.size]).tobytes())
+            lines = "".join(
+                json.dumps({"key": key, "payload": payload}) + "\n"
+                for key, payload in zip(self.row_keys[start:], self.payloads[start:])
+            ).encode("utf-8")
+            with _open_at(path + ".jsonl", payload_bytes) as f:
+                f.write(lines)
+            payload_bytes += len(lines)
+
+            if self.trained:
+                retrained = not start or self.saved_train_count != self.train_count
+                if retrained:
+                    np.save(path + ".tmp.npy", self.centroids)
+                    os.replace(path + ".tmp.npy", path + ".npy")
+                with _open_at(path + ".i64", 0 if retrained else start * 8) as f:
+                    f.write(self.assignments[0 if retrained else start :].astype(np.int64).tobytes())
+
+            meta = {
+                "dim": self.dim,
+                "nlist": self.nlist,
+                "nprobe": self.nprobe,
+                "min_train": self.min_train,
+                "retrain_factor": self.retrain_factor,
+                "seed": self.seed,
+                "trained": self.trained,
+                "trained_size": self.trained_size,
+                "size": self.size,
+                "payload_bytes": payload_bytes,
+            }
+            with open(path + ".tmp.json", "w") as f:
+                json.dump(meta, f)
+            os.replace(path + ".tmp.json", path + ".json")
+            self.saved_path = path
+            self.saved_size = self.size
+            self.saved_payload_bytes = payload_bytes
+            self.saved_train_count = self.train_count
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path + ".json") as f:
+            meta = json.load(f)
+
+        index = cls(
+            meta["dim"],
+            nlist=meta["nlist"],
+            nprobe=meta["nprobe"],
+            min_train=meta["min_train"],
+            retrain_factor=meta["retrain_factor"],
+            seed=meta["seed"],
+        )
+        size = meta["size"]
+        index.vectors = np.fromfile(
+            path + ".f32", dtype=np.float32, count=size * index.dim
+        ).reshape(size, index.dim)
+        index.size = size
+        with open(path + ".jsonl", "rb") as f:
+            lines = f.read(meta["payload_bytes"]).decode("utf-8").splitlines()
+        for line in lines:
+            row = json.loads(line)
+            index.payloads.append(row["payload"])
+            index.row_keys.append(row["key"])
+            if row["key"] is not None:
+                index.keys.add(row["key"])
+        if meta["trained"]:
+            index.centroids = np.load(path + ".npy")
+            index.assignments = np.fromfile(path + ".i64", dtype=np.int64, count=size)
+            index.lists = [[] for _ in range(len(index.centroids))]
+            for row, label in enumerate(index.assignments):
+                index.lists[label].append(row)
+            index.trained_size = meta["trained_size"]
+        index.saved_path = path
+        index.saved_size = size
+        index.saved_payload_bytes = meta["payload_bytes"]
+        return index
@@ -1,47 +1,219 @@
-from fastapi import FastAPI, HTTPException
-from utils import bs4_extractor, SentimentAnalyzer, SemanticGrouping, save_audio
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from utils import (
+    article_text,
+    label_articles,
+    async_bs4_extractor,
+    fetcher,
+    SentimentAnalyzer,
+    SemanticGrouping,
+    EmbeddingSentimentHead,
+)
+from batching import MicroBatcher
+from cache_utils import MemoryBackend, ResultCache, make_backend, text_hash
 from llm_utils import *
+from rate_limit import llm_governor
+from sessions import session_store
+from jobs import JobQueue, JobStore
+from loop_utils import PerLoop
+from tts_utils import audio_cache
+from article_store import article_store
+from metrics import RequestTimings, collect_timings, render_metrics, span
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from typing import Optional
 import openai
 import asyncio
+import gc
+import json
+import os
+import time
 
-app = FastAPI()
 
-# Initialize sentiment analyzer and semantic grouping
-sentiment_analyzer = SentimentAnalyzer()
-semantic_grouping = SemanticGrouping()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads the models (with MODEL_LOADING=startup) and starts the job queue, then on
+    shutdown stops the queue before closing the fetcher and flushing the caches the
+    running jobs may still use.
+    """
+    if model_loading == "startup":
+        await asyncio.to_thread(load_models)
+    job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await fetcher.aclose()
+        # Last-use times are only written when the index is compacted
+        if semantic_grouping.cache is not None:
+            semantic_grouping.cache.flush()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+# Initialize sentiment analyzer and semantic grouping. Their models load on first
+# use; MODEL_LOADING=startup loads them when the server starts, and
+# MODEL_LOADING=preload loads them at import so servers that fork workers after
+# importing the app (gunicorn --preload) share one copy of the weights.
+# ANALYSIS_MODE=unified takes sentiment from a head on the MiniLM embeddings
+# instead of the DeBERTa model.
+semantic_grouping = SemanticGrouping(
+    os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+)
+if os.environ.get("ANALYSIS_MODE", "separate") == "unified":
+    sentiment_analyzer = EmbeddingSentimentHead(semantic_grouping)
+else:
+    sentiment_analyzer = SentimentAnalyzer(
+        os.environ.get(
+            "SENTIMENT_MODEL", "mrm8488/deberta-v3-ft-financial-news-sentiment-analysis"
+        )
+    )
+model_loading = os.environ.get("MODEL_LOADING", "lazy")
+
+
+def load_models():
+    """
+    Loads both models if needed.
+
+    Returns:
+        dict: Seconds spent loading each model.
+    """
+    timings = {}
+    for name, model in (("sentiment", sentiment_analyzer), ("embedding", semantic_grouping)):
+        start = time.perf_counter()
+        model.load()
+        timings[name] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+if model_loading == "preload":
+    # Tokenizer threads do not survive a fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    load_models()
+    # Keep the garbage collector from touching (and so copying) the shared pages
+    gc.freeze()
+
+
+# Queue model work from concurrent requests into shared batches
+sentiment_batcher = MicroBatcher(
+    sentiment_analyzer.predict, max_batch_size=32, max_wait_ms=10, name="sentiment"
+)
+embedding_batcher = MicroBatcher(
+    lambda texts: list(semantic_grouping.encode(texts)),
+    max_batch_size=64,
+    max_wait_ms=10,
+    name="embedding",
+)
+
+
+# Comparison results keyed on company, model and article set
+comparison_cache = ResultCache(
+    make_backend(
+        os.environ.get("RESULT_CACHE_BACKEND", "memory"),
+        os.environ.get("RESULT_CACHE_DIR", ".cache/results"),
+        max_entries=256,
+    ),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", 600)),
+)
 
 
 class CompareNewsRequest(BaseModel):
     api_key: str
     model_name: str = "gpt-4o-mini"
     company_name: str
+    batch_topics: bool = True
+    merge_pairs: bool = False
+    delta: bool = False
+    timings: bool = False
+    job_id: Optional[str] = None
 
 
-def check_api_key(api_key: str):
-    if api_key == None:
-        return False
-    elif api_key != None:
-        client = openai.OpenAI(api_key=api_key)
+# Models available to each api key, so validation costs one OpenAI call per key per TTL
+api_key_cache = ResultCache(
+    MemoryBackend(max_entries=1024),
+    ttl=float(os.environ.get("API_KEY_CACHE_TTL", 600)),
+)
+
+
+async def list_models(api_key: str):
+    """
+    Lists the model ids available to an api key, cached per key.
+
+    Returns:
+        list: The model ids, or None if the key is not valid.
+    """
+
+    async def fetch_models():
         try:
-            client.models.list()
+            async with openai.AsyncOpenAI(api_key=api_key) as client:
+                models = [model.id async for model in client.models.list()]
         except openai.AuthenticationError:
-            return False
+            models = None
+        return {"models": models}
+
+    result = await api_key_cache.get_or_compute(text_hash(api_key), fetch_models)
+    return result["models"]
+
+
+async def check_api_key(api_key: str):
+    if api_key == None:
+        return False
+    return await list_models(api_key) is not None
+
+
+async def check_model_name(model_name: str, api_key: str):
+    models = await list_models(api_key)
+    return models is not None and model_name in models
+
+
+async def classify_sentiments(articles_data: list, embeddings: dict = None):
+    """
+    Labels articles with their sentiment.
+
+    Args:
+        articles_data (list of dict): Articles with 'title' and 'summary'.
+        embeddings (dict, optional): Filled with the article embeddings computed on
+            the way (text to vector), so the similarity step need not encode them
+            again. Only the embedding sentiment head computes any.
+    """
+    texts = [article_text(article) for article in articles_data]
+    with span("sentiment"):
+        if isinstance(sentiment_analyzer, EmbeddingSentimentHead):
+            vectors = await encode_articles(texts)
+            if embeddings is not None:
+                embeddings.update(zip(texts, vectors))
+            predictions = sentiment_analyzer.predict_embeddings(vectors)
         else:
-            return True
+            predictions = await sentiment_batcher.submit_many(texts)
+    return label_articles(articles_data, predictions)
 
 
-def check_model_name(model_name: str, api_key: str):
-    openai.api_key = api_key
-    model_list = [model.id for model in openai.models.list()]
-    return True if model_name in model_list else False
+async def encode_articles(articles_text: list, known: dict = None):
+    """
+    Args:
+        articles_text (list of str): Texts to encode.
+        known (dict, optional): Embeddings already computed, by text; only the
+            other texts are encoded.
+
+    Returns:
+        torch.Tensor: One embedding per text.
+    """
+    import torch
+
+    known = known or {}
+    missing = [text for text in dict.fromkeys(articles_text) if text not in known]
+    with span("embedding"):
+        vectors = dict(zip(missing, await embedding_batcher.submit_many(missing)))
+        return torch.stack([known.get(text, vectors.get(text)) for text in articles_text])
 
 
 # Helper function to get articles and article sentiments
-def get_articles(company_name: str):
+async def get_articles(company_name: str):
     if not company_name:
         raise HTTPException(status_code=500, detail="The company name is required.")
 
-    news_articles = bs4_extractor(company_name)
+    news_articles = await async_bs4_extractor(company_name)
 
     if not news_articles:
         raise HTTPException(status_code=500, detail="No news found")
@@ -51,9 +223,81 @@ def get_articles(company_name: str):
         for article in news_articles
     ]
 
-    analyzed_articles = sentiment_analyzer.classify_sentiments(articles_data)
+    embeddings = {}
+    analyzed_articles = await classify_sentiments(articles_data, embeddings)
+
+    return news_articles, analyzed_articles, embeddings
+
+
+async def get_delta_articles(company_name: str):
+    """
+    Gets articles through the article store: near duplicates are dropped, and only
+    articles without a stored sentiment are classified.
+
+    Returns:
+        tuple: (news_articles, analyzed_articles, fingerprints, embeddings). Analyzed
+        articles carry a 'new' flag for stories not seen in earlier runs; embeddings
+        holds those computed while classifying, see classify_sentiments.
+    """
+    if not company_name:
+        raise HTTPException(status_code=500, detail="The company name is required.")
+
+    entries = await scrape_delta_entries(company_name)
+    if not entries:
+        raise HTTPException(status_code=500, detail="No news found")
+
+    unlabelled = [entry for entry in entries if entry["sentiment"] is None]
+    embeddings = {}
+    if unlabelled:
+        await classify_sentiments(unlabelled, embeddings)
+        await asyncio.to_thread(article_store.set_sentiments, company_name, unlabelled)
+    return (*split_delta_entries(entries), embeddings)
+
+
+async def scrape_delta_entries(company_name: str):
+    """Scrapes a company's articles through the article store, see ArticleStore.ingest."""
+    return await async_bs4_extractor(
+        company_name,
+        deduplicate=lambda articles, limit: article_store.ingest(
+            company_name, articles, limit
+        ),
+    )
+
+
+def split_delta_entries(entries: list):
+    """
+    Returns:
+        tuple: (news_articles, analyzed_articles, fingerprints) for article store entries.
+    """
+    news_articles = [
+        {"title": entry["title"], "summary": entry["summary"]} for entry in entries
+    ]
+    analyzed_articles = [
+        {
+            "title": entry["title"],
+            "summary": entry["summary"],
+            "sentiment": entry["sentiment"],
+            "sentiment_score": entry["sentiment_score"],
+            "new": entry["new"],
+        }
+        for entry in entries
+    ]
+    return news_articles, analyzed_articles, [entry["fingerprint"] for entry in entries]
+
 
-    return news_articles, analyzed_articles
+async def load_articles(request_info: CompareNewsRequest):
+    """
+    Returns:
+        tuple: (news_articles, analyzed_articles, fingerprints, embeddings);
+        fingerprints is None unless the request asks for a delta run, embeddings
+        maps article texts to the embeddings computed by the sentiment step.
+    """
+    if request_info.delta:
+        return await get_delta_articles(request_info.company_name)
+    news_articles, analyzed_articles, embeddings = await get_articles(
+        request_info.company_name
+    )
+    return news_articles, analyzed_articles, None, embeddings
 
 
 def get_formatted_output(
@@ -63,6 +307,7 @@ def get_formatted_output(
     topic_overlap_results,
     comparative_analysis_results,
     final_analysis,
+    errors=None,
 ):
     articles = analyzed_articles
     sentiment_distribution = {"positive": 0, "negative": 0, "neutral": 0}
@@ -82,122 +327,854 @@ def get_formatted_output(
         "Comparative Sentiment Score": comparative_sentiment_score,
         "Final Sentiment Analysis": final_analysis,
     }
+    if errors:
+        final_output["Errors"] = errors
 
     return final_output
 
 
 @app.get("/news/{company_name}")
-def get_news(company_name: str):
+async def get_news(company_name: str):
     """
     API endpoint to get news for a company.
-    Fetches news articles from NYTimes and BBC.
+    Fetches news articles from NYTimes and BBC concurrently.
     """
     try:
-        news_articles = bs4_extractor(company_name)
-        app.state.company_name = company_name
+        news_articles = await async_bs4_extractor(company_name)
         if not news_articles:
             raise HTTPException(status_code=404, detail="No news found")
 
-        app.state.news_articles = news_articles
-        return {"company": company_name, "articles": news_articles}
+        job_id = session_store.create(
+            company_name=company_name, news_articles=news_articles
+        )
+        return {"job_id": job_id, "company": company_name, "articles": news_articles}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/analyze-news")
-def analyze_news():
+async def analyze_news(job_id: str = None):
     """
     API endpoint to analyze news articles.
-    Performs sentiment analysis on a list of articles.
+    Performs sentiment analysis on the articles fetched by the job.
     """
-    if not app.state.news_articles:
-        HTTPException(
+    session = session_store.get(job_id)
+    if not session or not session.get("news_articles"):
+        raise HTTPException(
             status_code=500, detail="Type in the name before the news analysis."
         )
     try:
         articles_data = [
             {"title": article["title"], "summary": article["summary"]}
-            for article in app.state.news_articles
+            for article in session["news_articles"]
         ]
-        analyzed_articles = sentiment_analyzer.classify_sentiments(articles_data)
-        app.state.articles_with_sentiments = analyzed_articles
-        return {"analyzed_articles": analyzed_articles}
+        analyzed_articles = await classify_sentiments(articles_data)
+        session_store.update(job_id, articles_with_sentiments=analyzed_articles)
+        return {"job_id": job_id, "analyzed_articles": analyzed_articles}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/compare-news")
-async def compare_news(request_info: CompareNewsRequest):
+async def find_similar_pairs(
+    company_name: str, articles_text: list, embeddings=None, known_embeddings: dict = None
+):
     """
-    API endpoint to perform comparative analysis.
-    Uses semantic similarity to find the most related articles.
+    Encodes articles (reusing known_embeddings by text), picks the top similar pairs
+    and records them in the company history.
     """
-    api_key = request_info.api_key
-    company_name = request_info.company_name
-    model_name = request_info.model_name
-    if not check_api_key(api_key):
-        HTTPException(
+    if embeddings is None:
+        embeddings = await encode_articles(articles_text, known_embeddings)
+    with span("similarity"):
+        top_similar_articles = await asyncio.to_thread(
+            semantic_grouping.find_top_k_similar_articles,
+            articles_text,
+            k=5,
+            embeddings=embeddings,
+        )
+    await asyncio.to_thread(
+        semantic_grouping.add_to_history, company_name, articles_text, embeddings
+    )
+    return top_similar_articles
+
+
+async def llm_events(
+    llm_chatbot: ChatBot,
+    similar_pairs: list,
+    batch_topics: bool,
+    merge_pairs: bool,
+    fingerprints: list = None,
+):
+    """
+    Streams the ChatBot analysis. With fingerprints (a delta run), LLM results
+    stored by earlier runs are reused and the new ones are stored afterwards.
+    """
+    company_name, model_name = llm_chatbot.company_name, llm_chatbot.model_name
+    known = None
+    if fingerprints is not None:
+        known = await asyncio.to_thread(
+            article_store.stored_llm_results,
+            company_name,
+            model_name,
+            fingerprints,
+            similar_pairs,
+        )
+    events = []
+    async with aclosing(
+        llm_chatbot.stream(
+            similar_pairs, batch_topics=batch_topics, merge_pairs=merge_pairs, known=known
+        )
+    ) as stream:
+        async for event in stream:
+            events.append(event)
+            yield event
+    if fingerprints is not None:
+        await asyncio.to_thread(
+            article_store.store_llm_results,
+            company_name,
+            model_name,
+            fingerprints,
+            similar_pairs,
+            events,
+        )
+
+
+async def summarize_comparison(
+    llm_chatbot: ChatBot, company_name: str, analyzed_articles: list, llm_result: dict
+):
+    """
+    Runs the final analysis and formats the comparison.
+
+    Returns:
+        dict: {'output': formatted comparison, 'hindi_summary': hindi final analysis}
+    """
+    topic_extraction_results = llm_result["topic_extraction_results"]
+    topic_overlap_results = llm_result["topic_overlap_results"]
+    comparative_analysis_results = llm_result["comparative_analysis_results"]
+    with span("final_analysis"):
+        final_analysis_eng, final_analysis_hi = await llm_chatbot.final_analysis(
+            comparative_analysis_results
+        )
+
+    final_output = get_formatted_output(
+        company_name,
+        analyzed_articles,
+        topic_extraction_results,
+        topic_overlap_results,
+        comparative_analysis_results,
+        final_analysis_eng,
+        llm_result["errors"],
+    )
+    return {"output": final_output, "hindi_summary": final_analysis_hi}
+
+
+async def comparison_events(
+    api_key: str,
+    model_name: str,
+    company_name: str,
+    articles_text: list,
+    analyzed_articles: list,
+    batch_topics: bool = True,
+    merge_pairs: bool = False,
+    fingerprints: list = None,
+    embeddings=None,
+    llm=None,
+    known_embeddings: dict = None,
+):
+    """
+    Runs similarity grouping, the LLM analysis and the final summary for one article
+    set, yielding each stage as it completes. With fingerprints (a delta run), only
+    LLM results not stored by earlier runs are requested. Precomputed embeddings
+    of the articles (or of some of them, by text) and a shared chat model can be
+    passed in.
+
+    Yields:
+        dict: 'similar_pairs', then the ChatBot.stream events, then a 'final' event
+        holding the formatted output and the hindi summary.
+    """
+    top_similar_articles = await find_similar_pairs(
+        company_name, articles_text, embeddings, known_embeddings
+    )
+    yield {
+        "stage": "similar_pairs",
+        "pairs": [
+            {"article_1": id1, "article_2": id2, "score": score}
+            for id1, id2, score in top_similar_articles
+        ],
+    }
+
+    llm_chatbot = ChatBot(
+        api_key,
+        model_name,
+        analyzed_articles,
+        company_name,
+        llm=llm,
+    )
+    events = []
+    # Closing this generator (client gone) closes the stream and cancels its LLM calls
+    async with aclosing(
+        llm_events(llm_chatbot, top_similar_articles, batch_topics, merge_pairs, fingerprints)
+    ) as stream:
+        async for event in stream:
+            events.append(event)
+            yield event
+
+    result = await summarize_comparison(
+        llm_chatbot,
+        company_name,
+        analyzed_articles,
+        llm_chatbot.results_from_events(events),
+    )
+    yield {"stage": "final", **result}
+
+
+async def run_comparison(*args, **kwargs):
+    """
+    Runs comparison_events to completion.
+
+    Returns:
+        dict: {'output': formatted comparison, 'hindi_summary': hindi final analysis}
+    """
+    async with aclosing(comparison_events(*args, **kwargs)) as events:
+        async for event in events:
+            if event["stage"] == "final":
+                return {"output": event["output"], "hindi_summary": event["hindi_summary"]}
+
+
+def check_session_job(job_id: Optional[str]):
+    """Results are only stored under job ids this server handed out and still holds."""
+    if job_id is not None and session_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+
+def check_compare_request(request_info: CompareNewsRequest):
+    """Checks that need no OpenAI call: a company name to search for and a known job id."""
+    if not request_info.company_name.strip():
+        raise HTTPException(status_code=400, detail="The company name is required.")
+    check_session_job(request_info.job_id)
+
+
+async def validate_compare_request(request_info: CompareNewsRequest):
+    check_compare_request(request_info)
+    if not await check_api_key(request_info.api_key):
+        raise HTTPException(
             status_code=500,
             detail="The entered API key does not seem to be right. Please enter a valid API key",
         )
 
-    if not check_model_name(model_name, api_key):
-        HTTPException(
+    if not await check_model_name(request_info.model_name, request_info.api_key):
+        raise HTTPException(
             status_code=500,
             detail="The model you specified does not exist.",
         )
-    news_articles, analyzed_articles = get_articles(company_name)
+
+
+def comparison_cache_key(request_info: CompareNewsRequest, articles_text: list):
+    return text_hash(
+        request_info.company_name.strip().lower(),
+        request_info.model_name,
+        request_info.batch_topics,
+        request_info.merge_pairs,
+        request_info.delta,
+        *sorted(articles_text),
+    )
+
+
+def is_complete(result: dict):
+    """Partial results (some LLM task failed) are not cached for the whole TTL."""
+    return "Errors" not in result["output"]
+
+
+def save_comparison(request_info: CompareNewsRequest, analyzed_articles, result):
+    """
+    Stores a comparison's artifacts under the request's job (or a new one).
+
+    Returns:
+        str: The job id.
+    """
+    artifacts = dict(
+        company_name=request_info.company_name,
+        articles_with_sentiments=analyzed_articles,
+        comparison=result["output"],
+        hindi_summary=result["hindi_summary"],
+    )
+    if request_info.job_id is None:
+        return session_store.create(**artifacts)
+    session_store.update(request_info.job_id, **artifacts)
+    return request_info.job_id
+
+
+@app.post("/compare-news")
+async def compare_news(request_info: CompareNewsRequest):
+    """
+    API endpoint to perform comparative analysis.
+    Uses semantic similarity to find the most related articles.
+    """
+    if not request_info.timings:
+        return await compare_news_response(request_info)
+    with collect_timings() as timings:
+        response = await compare_news_response(request_info)
+    return {**response, "Timings": timings.breakdown()}
+
+
+async def compare_news_response(request_info: CompareNewsRequest):
+    api_key = request_info.api_key
+    company_name = request_info.company_name
+    model_name = request_info.model_name
+    await validate_compare_request(request_info)
+    news_articles, analyzed_articles, fingerprints, embeddings = await load_articles(
+        request_info
+    )
     try:
-        articles_text = [
-            f"{article['title']}. {article['summary']}" for article in news_articles
-        ]
+        articles_text = [article_text(article) for article in news_articles]
 
         if len(articles_text) < 2:
             raise HTTPException(
                 status_code=400, detail="At least two articles required for comparison."
             )
-        top_similar_articles = semantic_grouping.find_top_k_similar_articles(
-            articles_text, k=5
+
+        result = await comparison_cache.get_or_compute(
+            comparison_cache_key(request_info, articles_text),
+            lambda: run_comparison(
+                api_key,
+                model_name,
+                company_name,
+                articles_text,
+                analyzed_articles,
+                request_info.batch_topics,
+                request_info.merge_pairs,
+                fingerprints,
+                known_embeddings=embeddings,
+            ),
+            should_cache=is_complete,
         )
 
-        llm_chatbot = ChatBot(
-            api_key,
-            model_name,
+        job_id = save_comparison(request_info, analyzed_articles, result)
+        return {**result["output"], "Job ID": job_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/compare-news/stream")
+async def compare_news_stream(request_info: CompareNewsRequest):
+    """
+    Streaming variant of /compare-news.
+    Emits NDJSON events as each pipeline stage completes: articles with sentiments,
+    similar pairs, every topic/overlap/comparison result, then the final output.
+    """
+    request_timings = RequestTimings() if request_info.timings else None
+    with collect_timings(request_timings) if request_timings else nullcontext():
+        await validate_compare_request(request_info)
+        news_articles, analyzed_articles, fingerprints, embeddings = await load_articles(
+            request_info
+        )
+    articles_text = [article_text(article) for article in news_articles]
+    if len(articles_text) < 2:
+        raise HTTPException(
+            status_code=400, detail="At least two articles required for comparison."
+        )
+    cache_key = comparison_cache_key(request_info, articles_text)
+
+    async def events():
+        yield {"stage": "articles", "articles": analyzed_articles}
+
+        cached = await comparison_cache.alookup(cache_key)
+        if cached is not None:
+            job_id = save_comparison(request_info, analyzed_articles, cached)
+            yield {"stage": "final", **cached, "job_id": job_id}
+            return
+
+        stream = comparison_events(
+            request_info.api_key,
+            request_info.model_name,
+            request_info.company_name,
+            articles_text,
             analyzed_articles,
-            company_name,
+            request_info.batch_topics,
+            request_info.merge_pairs,
+            fingerprints,
+            known_embeddings=embeddings,
         )
-        llm_result = await llm_chatbot.main(top_similar_articles)
+        async with aclosing(stream):
+            async for event in stream:
+                if event["stage"] == "final":
+                    result = {"output": event["output"], "hindi_summary": event["hindi_summary"]}
+                    if is_complete(result):
+                        await comparison_cache.aset(cache_key, result)
+                    event = {
+                        **event,
+                        "job_id": save_comparison(request_info, analyzed_articles, result),
+                    }
+                yield event
 
-        (
-            topic_extraction_results,
-            topic_overlap_results,
-            comparative_analysis_results,
-        ) = llm_result.values()
-        final_analysis_eng, final_analysis_hi = llm_chatbot.final_analysis(
-            comparative_analysis_results
+    async def timed_events():
+        with collect_timings(request_timings):
+            async with aclosing(events()) as stream:
+                async for event in stream:
+                    if event["stage"] == "final":
+                        event = {**event, "timings": request_timings.breakdown()}
+                    yield event
+
+    return ndjson_response(timed_events() if request_timings else events())
+
+
+def ndjson_response(events):
+    """Streams an async generator of events as NDJSON, ending with an error event if it fails."""
+
+    async def ndjson():
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"stage": "error", "error": str(e)}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+class CompareNewsBatchRequest(BaseModel):
+    api_key: str
+    model_name: str = "gpt-4o-mini"
+    company_names: list[str]
+    batch_topics: bool = True
+    merge_pairs: bool = False
+    delta: bool = False
+
+    def company_request(self, company_name: str):
+        return CompareNewsRequest(
+            **self.model_dump(exclude={"company_names"}), company_name=company_name
         )
 
-        final_output = get_formatted_output(
-            company_name,
-            analyzed_articles,
-            topic_extraction_results,
-            topic_overlap_results,
-            comparative_analysis_results,
-            final_analysis_eng,
+
+max_batch_companies = int(os.environ.get("BATCH_MAX_COMPANIES", 100))
+# Companies (across all batch requests) whose LLM analysis runs at once. Every
+# call still goes through llm_governor, which caps calls in flight server-wide.
+max_batch_llm_companies = int(os.environ.get("BATCH_LLM_COMPANIES", 8))
+batch_llm_slots = PerLoop(lambda: asyncio.Semaphore(max_batch_llm_companies))
+
+
+def batch_llm_semaphore():
+    """The running event loop's semaphore for batch LLM analyses."""
+    return batch_llm_slots.get()
+
+
+async def load_batch_articles(company_names: list, delta: bool):
+    """
+    Scrapes every company concurrently, then classifies the articles of all of them
+    in one sentiment batch.
+
+    Returns:
+        dict: Company name to (news_articles, analyzed_articles, fingerprints,
+        embeddings), or to the exception that stopped it. embeddings is one dict
+        shared by all companies, see classify_sentiments.
+    """
+
+    async def scrape(company_name):
+        if delta:
+            return await scrape_delta_entries(company_name)
+        return [
+            {"title": article["title"], "summary": article["summary"], "sentiment": None}
+            for article in await async_bs4_extractor(company_name)
+        ]
+
+    scraped = await asyncio.gather(
+        *[scrape(company_name) for company_name in company_names], return_exceptions=True
+    )
+    unlabelled = [
+        entry
+        for entries in scraped
+        if not isinstance(entries, Exception)
+        for entry in entries
+        if entry["sentiment"] is None
+    ]
+    embeddings = {}
+    if unlabelled:
+        await classify_sentiments(unlabelled, embeddings)
+
+    loaded = {}
+    for company_name, entries in zip(company_names, scraped):
+        if isinstance(entries, Exception):
+            loaded[company_name] = entries
+        elif not entries:
+            loaded[company_name] = HTTPException(status_code=500, detail="No news found")
+        elif delta:
+            await asyncio.to_thread(article_store.set_sentiments, company_name, entries)
+            loaded[company_name] = (*split_delta_entries(entries), embeddings)
+        else:
+            news_articles = [
+                {"title": entry["title"], "summary": entry["summary"]} for entry in entries
+            ]
+            loaded[company_name] = (news_articles, entries, None, embeddings)
+    return loaded
+
+
+async def batch_events(request_info: CompareNewsBatchRequest, company_names: list):
+    """
+    Runs /compare-news for many companies. Scraping, sentiment and embeddings are
+    shared across the companies; the LLM analyses then run per company, at most
+    BATCH_LLM_COMPANIES at a time, through one chat model.
+
+    Yields:
+        dict: A 'company' event (output, job_id) or an 'error' event per company, in
+        the order they finish, then a 'done' event.
+    """
+    loaded = await load_batch_articles(company_names, request_info.delta)
+    llm = make_chat_model(request_info.api_key, request_info.model_name)
+    failed = 0
+
+    def error_event(company_name, error):
+        detail = error.detail if isinstance(error, HTTPException) else str(error)
+        return {"stage": "error", "company": company_name, "error": detail}
+
+    pending, known_embeddings = {}, {}
+    for company_name, articles in loaded.items():
+        company_request = request_info.company_request(company_name)
+        if isinstance(articles, Exception):
+            failed += 1
+            yield error_event(company_name, articles)
+            continue
+        news_articles, analyzed_articles, fingerprints, company_embeddings = articles
+        known_embeddings.update(company_embeddings)
+        articles_text = [article_text(article) for article in news_articles]
+        if len(articles_text) < 2:
+            failed += 1
+            yield error_event(company_name, "At least two articles required for comparison.")
+            continue
+
+        cache_key = comparison_cache_key(company_request, articles_text)
+        cached = await comparison_cache.alookup(cache_key)
+        if cached is not None:
+            job_id = save_comparison(company_request, analyzed_articles, cached)
+            yield {"stage": "company", "company": company_name, **cached, "job_id": job_id}
+            continue
+        pending[company_name] = (company_request, cache_key, articles_text, articles)
+
+    # One embedding batch for every company still to analyse, on top of those the
+    # sentiment step computed
+    texts = [text for _, _, articles_text, _ in pending.values() for text in articles_text]
+    embeddings = await encode_articles(texts, known_embeddings) if texts else None
+
+    async def analyse(company_name, offset):
+        company_request, cache_key, articles_text, articles = pending[company_name]
+        news_articles, analyzed_articles, fingerprints, _ = articles
+        try:
+            async with batch_llm_semaphore():
+                result = await comparison_cache.get_or_compute(
+                    cache_key,
+                    lambda: run_comparison(
+                        request_info.api_key,
+                        request_info.model_name,
+                        company_name,
+                        articles_text,
+                        analyzed_articles,
+                        request_info.batch_topics,
+                        request_info.merge_pairs,
+                        fingerprints,
+                        embeddings=embeddings[offset : offset + len(articles_text)],
+                        llm=llm,
+                    ),
+                    should_cache=is_complete,
+                )
+        except Exception as e:
+            return error_event(company_name, e)
+        job_id = save_comparison(company_request, analyzed_articles, result)
+        return {"stage": "company", "company": company_name, **result, "job_id": job_id}
+
+    tasks, offset = [], 0
+    for company_name, (_, _, articles_text, _) in pending.items():
+        tasks.append(analyse(company_name, offset))
+        offset += len(articles_text)
+    tasks = [asyncio.ensure_future(task) for task in tasks]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            event = await next_done
+            failed += event["stage"] == "error"
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    yield {"stage": "done", "companies": len(company_names), "failed": failed}
+
+
+@app.post("/compare-news/batch")
+async def compare_news_batch(request_info: CompareNewsBatchRequest):
+    """
+    Batch variant of /compare-news for a watchlist of companies.
+    Emits NDJSON events with each company's comparison as soon as it is ready.
+    """
+    company_names = list(
+        dict.fromkeys(name.strip() for name in request_info.company_names if name.strip())
+    )
+    if not company_names:
+        raise HTTPException(status_code=400, detail="At least one company name is required.")
+    if len(company_names) > max_batch_companies:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {max_batch_companies} companies can be compared per request.",
         )
+    # The api key and model are shared by every company
+    await validate_compare_request(request_info.company_request(company_names[0]))
+    return ndjson_response(batch_events(request_info, company_names))
 
-        app.state.hindi_summary = final_analysis_hi
-        return final_output
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+class CompareNewsJobRequest(CompareNewsRequest):
+    priority: int = 0
+
+
+def job_request(context: dict):
+    return CompareNewsRequest(api_key=context["api_key"], **context["request"])
+
+
+async def articles_stage(context: dict):
+    request_info = job_request(context)
+    await validate_compare_request(request_info)
+    news_articles, analyzed_articles, fingerprints, embeddings = await load_articles(
+        request_info
+    )
+    articles_text = [article_text(article) for article in news_articles]
+    if len(articles_text) < 2:
+        raise HTTPException(
+            status_code=400, detail="At least two articles required for comparison."
+        )
+    context["fingerprints"] = fingerprints
+    context["embeddings"] = embeddings
+    context["analyzed_articles"] = analyzed_articles
+    context["articles_text"] = articles_text
+
+
+async def similarity_stage(context: dict):
+    context["similar_pairs"] = await find_similar_pairs(
+        context["request"]["company_name"],
+        context["articles_text"],
+        known_embeddings=context.pop("embeddings"),
+    )
+
+
+async def llm_stage(context: dict):
+    request_info = job_request(context)
+    context["chatbot"] = ChatBot(
+        request_info.api_key,
+        request_info.model_name,
+        context["analyzed_articles"],
+        request_info.company_name,
+    )
+    stream = llm_events(
+        context["chatbot"],
+        context["similar_pairs"],
+        request_info.batch_topics,
+        request_info.merge_pairs,
+        context["fingerprints"],
+    )
+    async with aclosing(stream):
+        events = [event async for event in stream]
+    context["llm_result"] = context["chatbot"].results_from_events(events)
+
+
+async def final_stage(context: dict):
+    request_info = job_request(context)
+    result = await summarize_comparison(
+        context["chatbot"],
+        request_info.company_name,
+        context["analyzed_articles"],
+        context["llm_result"],
+    )
+    if is_complete(result):
+        await comparison_cache.aset(
+            comparison_cache_key(request_info, context["articles_text"]), result
+        )
+    session_job_id = save_comparison(request_info, context["analyzed_articles"], result)
+    return {**result["output"], "Job ID": session_job_id}
+
+
+# Each /compare-news step runs as its own stage with its own worker pool
+job_queue = JobQueue(
+    [
+        ("articles", articles_stage, int(os.environ.get("JOB_ARTICLES_WORKERS", 4))),
+        ("similarity", similarity_stage, int(os.environ.get("JOB_SIMILARITY_WORKERS", 2))),
+        ("llm", llm_stage, int(os.environ.get("JOB_LLM_WORKERS", 4))),
+        ("final", final_stage, int(os.environ.get("JOB_FINAL_WORKERS", 4))),
+    ],
+    JobStore(os.environ.get("JOB_STORE_PATH", ".cache/jobs.sqlite3")),
+)
+
+
+# Async so the queue's asyncio primitives are only touched from the event loop
+@app.post("/jobs/compare-news")
+async def submit_compare_news_job(request_info: CompareNewsJobRequest):
+    """
+    API endpoint to queue a comparative analysis in the background.
+    An identical queued or running job (same API key, company, model and options) is reused.
+    """
+    check_compare_request(request_info)
+    request = request_info.model_dump(exclude={"api_key", "priority"})
+    dedup_key = text_hash(
+        # A job only serves the key that submitted it
+        text_hash(request_info.api_key),
+        request_info.company_name.strip().lower(),
+        request_info.model_name,
+        request_info.batch_topics,
+        request_info.merge_pairs,
+        request_info.delta,
+    )
+    job_id, created = job_queue.submit(
+        request,
+        dedup_key,
+        priority=request_info.priority,
+        secrets={"api_key": request_info.api_key},
+    )
+    return {"job_id": job_id, "deduplicated": not created}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    API endpoint to poll a background job's status and current stage.
+    """
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    job.pop("result")
+    job.pop("dedup_key")
+    job.pop("owner")
+    return job
+
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """
+    API endpoint to fetch a finished job's comparative analysis.
+    """
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}.")
+    return job["result"]
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    API endpoint to cancel a queued or running job.
+    """
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not queued or running.")
+    return {"job_id": job_id, "status": "cancelled"}
+
+
+max_history_results = int(os.environ.get("HISTORY_MAX_RESULTS", 100))
+
+
+@app.get("/news-history/{company_name}")
+async def news_history(
+    company_name: str, query: str, k: int = Query(5, ge=1, le=max_history_results)
+):
+    """
+    API endpoint to search previously analyzed coverage of a company.
+    Returns the k past articles most similar to the query text.
+    """
+    embeddings = await encode_articles([query])
+    matches = await asyncio.to_thread(
+        semantic_grouping.find_similar_in_history,
+        company_name,
+        [query],
+        k,
+        embeddings,
+    )
+    return {
+        "company": company_name,
+        "matches": [{"text": text, "score": score} for text, score in matches[0]],
+    }
+
+
+@app.post("/warmup")
+async def warmup():
+    """
+    API endpoint that loads both models and runs one inference through each, so
+    the first real request does not pay for it. Useful as a readiness check.
+
+    Returns:
+        dict: Seconds spent loading each model and on the warm-up inference.
+    """
+    loaded = await asyncio.to_thread(load_models)
+    start = time.perf_counter()
+    await asyncio.to_thread(sentiment_analyzer.predict, ["Warm-up."])
+    await asyncio.to_thread(semantic_grouping.model.encode, ["Warm-up."])
+    return {"loaded": loaded, "inference": round(time.perf_counter() - start, 3)}
+
+
+@app.get("/cache-stats")
+def cache_stats():
+    """
+    API endpoint exposing embedding cache and batcher counters.
+    """
+    return {
+        "embedding_cache": (
+            semantic_grouping.cache.stats() if semantic_grouping.cache else None
+        ),
+        "comparison_cache": comparison_cache.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "llm_governor": llm_governor.stats(),
+        "api_key_cache": api_key_cache.stats(),
+        "sentiment_batcher": sentiment_batcher.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "job_queue": job_queue.stats(),
+        "audio_cache": audio_cache.stats(),
+        "article_store": article_store.stats(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    API endpoint exposing stage latency histograms, in-flight stages, LLM token
+    counts and the /cache-stats counters in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        render_metrics(cache_stats()), media_type="text/plain; version=0.0.4"
+    )
 
 
 @app.get("/hindi-summary")
-def get_hindi_summary():
-    if not app.state.hindi_summary:
+async def get_hindi_summary(job_id: str = None):
+    """
+    API endpoint to synthesize the Hindi summary of a comparison. Speech is
+    synthesized off the event loop and cached by content, so repeated requests
+    for the same summary are served from disk.
+
+    Returns:
+        dict: The Hindi summary and the URL of its audio.
+    """
+    session = session_store.get(job_id)
+    if not session or not session.get("hindi_summary"):
         raise HTTPException(
             status_code=500, detail="Generate the Comparative Analysis first."
         )
-    save_audio(app.state.hindi_summary)
-    return {"hindi_summary": app.state.hindi_summary}
+    try:
+        with span("audio"):
+            audio_id = await audio_cache.get_or_synthesize(session["hindi_summary"], lang="hi")
+    except Exception as e:
+        print(f"Error synthesizing audio: {e}")
+        raise HTTPException(status_code=502, detail=f"Speech synthesis failed: {e}")
+    session_store.update(job_id, audio_id=audio_id)
+    return {
+        "job_id": job_id,
+        "hindi_summary": session["hindi_summary"],
+        "audio_url": f"/audio/{audio_id}",
+    }
+
+
+@app.get("/audio/{audio_id}")
+def get_audio(audio_id: str):
+    """
+    API endpoint streaming cached audio by its content hash.
+    """
+    path = audio_cache.path(audio_id) if audio_id.isalnum() else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    return FileResponse(path, media_type=audio_cache.backend.media_type)
@@ -2,6 +2,7 @@ import gradio as gr
 import requests
 #from gtts import gTTS
 import os
+import json
 import multiprocessing
 import time
 import requests
@@ -14,19 +15,19 @@ def run_fastapi():
     os.system("uvicorn api:app --host 127.0.0.1 --port 8000 --reload")
 
 def fetch_news(company_name):
-    """Fetch news articles for a given company."""
+    """Fetch news articles for a given company. Returns the articles and the new job id."""
     response = requests.get(f"{API_URL}/news/{company_name}")
     if response.status_code == 200:
         articles = response.json()["articles"]
         formatted_articles = "\n\n".join([f"Title: {a['title']}\n Summary: {a['summary']}" for a in articles])
-        return formatted_articles
+        return formatted_articles, response.json()["job_id"]
     else:
-        return "No news found."
+        return "No news found.", None
     
 
-def analyze_news():
+def analyze_news(job_id):
     """Analyze sentiment of previously fetched news."""
-    response = requests.get(f"{API_URL}/analyze-news")
+    response = requests.get(f"{API_URL}/analyze-news", params={"job_id": job_id})
     if response.status_code == 200:
         analyzed_articles = response.json()["analyzed_articles"]
         formatted_analysis = "\n\n".join([f"Title: {a['title']}\n Sentiment: {a['sentiment']}" for a in analyzed_articles])
@@ -35,22 +36,44 @@ def analyze_news():
         return "Please fetch news first."
  
  
-def compare_news(api_key, model_name, company_name):
-    """Perform comparative news analysis."""
-    data = {"api_key": api_key, "model_name": model_name, "company_name": company_name}
-    response = requests.post(f"{API_URL}/compare-news", json=data)
+def compare_news(api_key, model_name, company_name, job_id):
+    """Perform comparative news analysis, rendering each stage as it streams in."""
+    data = {"api_key": api_key, "model_name": model_name, "company_name": company_name, "job_id": job_id}
+    response = requests.post(f"{API_URL}/compare-news/stream", json=data, stream=True)
 
-    if response.status_code == 200:
-        comparison_result = response.json()
-        return comparison_result
-    else:
-        return f"Error: {response.json().get('detail', 'Something went wrong.')}"
+    if response.status_code != 200:
+        yield f"Error: {response.json().get('detail', 'Something went wrong.')}", job_id
+        return
+
+    progress = {"Company": company_name}
+    for line in response.iter_lines():
+        if not line:
+            continue
+        event = json.loads(line)
+        stage = event["stage"]
+        if stage == "articles":
+            progress["Articles"] = event["articles"]
+        elif stage == "similar_pairs":
+            progress["Similar Pairs"] = event["pairs"]
+        elif stage == "topic_extraction":
+            progress["Articles"][event["article_id"]]["topics"] = event["result"]
+        elif stage == "topic_overlap":
+            progress.setdefault("Topic Overlap", []).append(event["result"])
+        elif stage == "comparative_analysis":
+            progress.setdefault("Coverage Differences", []).append(event["result"])
+        elif stage == "error":
+            progress.setdefault("Errors", []).append(event)
+        elif stage == "final":
+            progress = event["output"]
+            job_id = event["job_id"]
+        yield progress, job_id
     
-def get_audio():
-    response = requests.get(f"{API_URL}/hindi-summary")
-    if response.status_code == 200:
-        hi_summary = response.json()["hindi_summary"]
-    return ["output.mp3",hi_summary]
+def get_audio(job_id):
+    response = requests.get(f"{API_URL}/hindi-summary", params={"job_id": job_id})
+    if response.status_code != 200:
+        return [None, response.json().get("detail", "Error generating audio.")]
+    result = response.json()
+    return [API_URL + result["audio_url"], result["hindi_summary"]]
 
 def run_gradio():
     """Run the improved Gradio UI with better styling."""
@@ -94,10 +117,10 @@ def run_gradio():
             audio_output = gr.Audio(label="Audio Output", scale = 2,autoplay=True)
             hi_summary = gr.Textbox(label="Hindi Summary", interactive=False, lines=1)
         # Event Handling
-        news_button.click(fetch_news, inputs=company_name, outputs=news_output)
-        analyze_button.click(analyze_news, outputs=sentiment_output)
-        compare_button.click(compare_news, inputs=[api_key_input, model_input, company_input], outputs=comparison_output)
-        tts_button.click(get_audio, outputs=[audio_output,hi_summary])
+        news_button.click(fetch_news, inputs=company_name, outputs=[news_output, state])
+        analyze_button.click(analyze_news, inputs=state, outputs=sentiment_output)
+        compare_button.click(compare_news, inputs=[api_key_input, model_input, company_input, state], outputs=[comparison_output, state])
+        tts_button.click(get_audio, inputs=state, outputs=[audio_output,hi_summary])
 
     demo.launch() 
 
@@ -0,0 +1,357 @@
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+import numpy as np
+
+from cache_utils import text_hash
+from llm_utils import format_comparison, format_topic_overlap
+
+MERSENNE_PRIME = (1 << 31) - 1
+ENTRY_FIELDS = ("title", "summary", "fingerprint", "new", "sentiment", "sentiment_score")
+
+
+def normalize_text(text: str):
+    """Case-folds, strips punctuation and collapses whitespace so trivial edits do not change a fingerprint."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def article_fingerprint(article: dict):
+    return text_hash(normalize_text(article["title"]), normalize_text(article["summary"]))
+
+
+def pair_key(company: str, fingerprints: list, id1: int, id2: int):
+    return ":".join([company, *sorted((fingerprints[id1], fingerprints[id2]))])
+
+
+# "Article 3", "article #3"
+ARTICLE_MENTION = re.compile(r"\b(article\s*#?\s*)(\d+)\b", re.IGNORECASE)
+
+
+def renumber_comparison(stored: dict, fingerprints: list, id1: int, id2: int):
+    """
+    Rewrites the article ids an earlier run's comparison mentions to this run's ids.
+
+    Returns:
+        dict or None: The formatted comparison, or None if it cannot be remapped
+        reliably and has to be regenerated: it was stored without its ids, the pair
+        comes in the other order ("the first article" would be wrong), or the text
+        mentions an id in a form that is not recognised.
+    """
+    if stored.get("fingerprints") != [fingerprints[id1], fingerprints[id2]]:
+        return None
+    if stored["article_ids"] == [id1, id2]:
+        return format_comparison(id1, id2, stored["comparison"], stored["impact"])
+    new_ids = dict(zip(map(str, stored["article_ids"]), (str(id1), str(id2))))
+    texts = []
+    for text in (stored["comparison"], stored["impact"]):
+        mentioned = [match.group(2) for match in ARTICLE_MENTION.finditer(text)]
+        rest = ARTICLE_MENTION.sub("", text)
+        if any(old not in new_ids for old in mentioned) or any(
+            re.search(rf"\b{old}\b", rest) for old in new_ids
+        ):
+            return None
+        texts.append(
+            ARTICLE_MENTION.sub(lambda match: match.group(1) + new_ids[match.group(2)], text)
+        )
+    return format_comparison(id1, id2, *texts)
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles with banded LSH keys. Two texts whose
+    shingle sets have Jaccard similarity s share at least one band key with
+    probability 1 - (1 - s^rows)^bands.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, shingle_size: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Everything stays below 2^31, so a * x + b fits in uint64
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str):
+        text = normalize_text(text)
+        if len(text) <= self.shingle_size:
+            return {text}
+        return {
+            text[i : i + self.shingle_size]
+            for i in range(len(text) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str):
+        hashes = np.array(
+            [
+                int(text_hash(shingle)[:8], 16) % MERSENNE_PRIME
+                for shingle in self.shingles(text)
+            ],
+            dtype=np.uint64,
+        )
+        permuted = (np.outer(hashes, self.a) + self.b) % np.uint64(MERSENNE_PRIME)
+        return permuted.min(axis=0)
+
+    def band_keys(self, signature):
+        return [
+            text_hash(band, signature[band * self.rows : (band + 1) * self.rows].tobytes())[:16]
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(signature_1, signature_2):
+        """Estimated Jaccard similarity of the underlying shingle sets."""
+        return float(np.mean(signature_1 == signature_2))
+
+
+class ArticleStore:
+    """
+    Persistent per-company article store in SQLite. Articles are keyed by a
+    fingerprint of their normalized title and summary; near duplicates (the
+    same story from another source, a lightly edited headline) are found with
+    MinHash LSH and mapped onto the article stored first. The store also keeps
+    analysis results per article or article pair (sentiment, LLM topics and
+    comparisons) so a delta run only analyses what is new.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.7, hasher: MinHasher = None):
+        self.path = path
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "company TEXT, fingerprint TEXT, title TEXT, summary TEXT, "
+                "signature BLOB, first_seen REAL, last_seen REAL, "
+                "sentiment TEXT, sentiment_score REAL, "
+                "PRIMARY KEY (company, fingerprint))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands ("
+                "company TEXT, bucket TEXT, fingerprint TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_bucket ON bands (company, bucket)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "kind TEXT, key TEXT, model TEXT, result TEXT, "
+                "PRIMARY KEY (kind, key, model))"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _find_near_duplicate(self, conn, company, signature, buckets):
+        placeholders = ", ".join("?" * len(buckets))
+        rows = conn.execute(
+            "SELECT DISTINCT a.fingerprint, a.signature FROM bands b JOIN articles a "
+            "ON a.company = b.company AND a.fingerprint = b.fingerprint "
+            f"WHERE b.company = ? AND b.bucket IN ({placeholders})",
+            (company, *buckets),
+        ).fetchall()
+        best, best_score = None, self.threshold
+        for row in rows:
+            score = MinHasher.similarity(
+                signature, np.frombuffer(row["signature"], dtype=np.uint64)
+            )
+            if score >= best_score:
+                best, best_score = row["fingerprint"], score
+        return best
+
+    def ingest(self, company_name: str, articles: list, limit: int = None):
+        """
+        Records scraped articles, dropping exact and near duplicates.
+
+        Args:
+            company_name (str): The company the articles were fetched for.
+            articles (list of dict): Articles with 'title' and 'summary'.
+            limit (int, optional): Stop after this many distinct stories. Later
+                articles are not recorded, so they are still new when first returned.
+
+        Returns:
+            list of dict: One entry per distinct story in input order, with the stored
+            'title', 'summary', 'fingerprint', 'new' (first time seen) and any stored
+            'sentiment' / 'sentiment_score'.
+        """
+        company = company_name.strip().lower()
+        now = time.time()
+        entries, seen = [], set()
+        with self._connect() as conn:
+            for article in articles:
+                if limit is not None and len(entries) >= limit:
+                    break
+                fingerprint = article_fingerprint(article)
+                row = conn.execute(
+                    "SELECT * FROM articles WHERE company = ? AND fingerprint = ?",
+                    (company, fingerprint),
+                ).fetchone()
+                if row is None:
+                    signature = self.hasher.signature(f"{article['title']} {article['summary']}")
+                    buckets = self.hasher.band_keys(signature)
+                    duplicate = self._find_near_duplicate(conn, company, signature, buckets)
+                    if duplicate is not None:
+                        row = conn.execute(
+                            "SELECT * FROM articles WHERE company = ? AND fingerprint = ?",
+                            (company, duplicate),
+                        ).fetchone()
+
+                if row is not None:
+                    if row["fingerprint"] in seen:
+                        continue
+                    entry = {**dict(row), "new": False}
+                    conn.execute(
+                        "UPDATE articles SET last_seen = ? WHERE company = ? AND fingerprint = ?",
+                        (now, company, row["fingerprint"]),
+                    )
+                else:
+                    conn.execute(
+                        "INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)",
+                        (
+                            company, fingerprint, article["title"], article["summary"],
+                            signature.tobytes(), now, now,
+                        ),
+                    )
+                    conn.executemany(
+                        "INSERT INTO bands VALUES (?, ?, ?)",
+                        [(company, bucket, fingerprint) for bucket in buckets],
+                    )
+                    entry = {
+                        "fingerprint": fingerprint,
+                        "title": article["title"],
+                        "summary": article["summary"],
+                        "sentiment": None,
+                        "sentiment_score": None,
+                        "new": True,
+                    }
+                seen.add(entry["fingerprint"])
+                entries.append({key: entry[key] for key in ENTRY_FIELDS})
+        return entries
+
+    def set_sentiments(self, company_name: str, articles: list):
+        """Stores 'sentiment' and 'sentiment_score' for articles carrying a 'fingerprint'."""
+        company = company_name.strip().lower()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE articles SET sentiment = ?, sentiment_score = ? "
+                "WHERE company = ? AND fingerprint = ?",
+                [
+                    (a["sentiment"], a["sentiment_score"], company, a["fingerprint"])
+                    for a in articles
+                ],
+            )
+
+    def get_analyses(self, kind: str, keys: list, model: str):
+        """
+        Returns:
+            dict: Stored results for the given keys, keyed like the input.
+        """
+        if not keys:
+            return {}
+        placeholders = ", ".join("?" * len(keys))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT key, result FROM analyses WHERE kind = ? AND model = ? "
+                f"AND key IN ({placeholders})",
+                (kind, model, *keys),
+            ).fetchall()
+        return {row["key"]: json.loads(row["result"]) for row in rows}
+
+    def set_analyses(self, kind: str, results: dict, model: str):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?)",
+                [(kind, key, model, json.dumps(result)) for key, result in results.items()],
+            )
+
+    def stored_llm_results(self, company_name, model_name, fingerprints, similar_pairs):
+        """
+        Looks up LLM results of earlier delta runs for these articles and pairs,
+        renumbered to the current article ids. Comparisons that cannot be renumbered
+        are left out, so they are generated again.
+
+        Returns:
+            dict: Results keyed by (stage, article_id or pair_id), as ChatBot.stream expects.
+        """
+        company = company_name.strip().lower()
+        topic_keys = {f"{company}:{fp}": i for i, fp in enumerate(fingerprints)}
+        pair_keys = {
+            pair_key(company, fingerprints, id1, id2): pair_id
+            for pair_id, (id1, id2, _) in enumerate(similar_pairs)
+        }
+        known = {}
+        topics = self.get_analyses("topics", list(topic_keys), model_name)
+        for key, result in topics.items():
+            known[("topic_extraction", topic_keys[key])] = result
+
+        overlaps = self.get_analyses("topic_overlap", list(pair_keys), model_name)
+        comparisons = self.get_analyses("comparative_analysis", list(pair_keys), model_name)
+        for key, pair_id in pair_keys.items():
+            id1, id2, _ = similar_pairs[pair_id]
+            if key in overlaps:
+                unique = overlaps[key]["unique"]
+                known[("topic_overlap", pair_id)] = format_topic_overlap(
+                    id1,
+                    id2,
+                    overlaps[key]["common"],
+                    unique[fingerprints[id1]],
+                    unique[fingerprints[id2]],
+                )
+            if key in comparisons:
+                comparison = renumber_comparison(comparisons[key], fingerprints, id1, id2)
+                if comparison is not None:
+                    known[("comparative_analysis", pair_id)] = comparison
+        return known
+
+
+    def store_llm_results(self, company_name, model_name, fingerprints, similar_pairs, events):
+        """Saves the LLM results computed in this run so later delta runs can reuse them."""
+        company = company_name.strip().lower()
+        results = {"topics": {}, "topic_overlap": {}, "comparative_analysis": {}}
+        for event in events:
+            if event.get("reused"):
+                continue
+            if event["stage"] == "topic_extraction" and event["result"]:
+                key = f"{company}:{fingerprints[event['article_id']]}"
+                results["topics"][key] = event["result"]
+            elif event["stage"] == "topic_overlap":
+                id1, id2, _ = similar_pairs[event["pair_id"]]
+                common, unique_1, unique_2 = event["result"].values()
+                results["topic_overlap"][pair_key(company, fingerprints, id1, id2)] = {
+                    "common": common,
+                    "unique": {fingerprints[id1]: unique_1, fingerprints[id2]: unique_2},
+                }
+            elif event["stage"] == "comparative_analysis":
+                id1, id2, _ = similar_pairs[event["pair_id"]]
+                comparison, impact = event["result"].values()
+                results["comparative_analysis"][pair_key(company, fingerprints, id1, id2)] = {
+                    "comparison": comparison,
+                    "impact": impact,
+                    # The text refers to the articles by this run's ids
+                    "article_ids": [id1, id2],
+                    "fingerprints": [fingerprints[id1], fingerprints[id2]],
+                }
+        for kind, kind_results in results.items():
+            self.set_analyses(kind, kind_results, model_name)
+
+    def stats(self):
+        with self._connect() as conn:
+            articles = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            analyses = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        return {"articles": articles, "analyses": analyses}
+
+
+article_store = ArticleStore(
+    os.environ.get("ARTICLE_STORE_PATH", ".cache/articles.sqlite3"),
+    threshold=float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.7)),
+)
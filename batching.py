@@ -0,0 +1,99 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loop_utils import PerLoop
+
+
+class MicroBatcher:
+    """
+    Queues single work items from concurrent requests and runs them through a
+    batch function together.
+
+    A batch is flushed when it reaches max_batch_size or when the oldest queued
+    item has waited max_wait_ms. The batch function runs on a dedicated worker
+    thread so the event loop is never blocked, and each caller gets its own
+    result back through a future.
+    """
+
+    def __init__(
+        self,
+        process_batch,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+    ):
+        """
+        Args:
+            process_batch (callable): Takes a list of items and returns a list of results in the same order.
+            max_batch_size (int, optional): Largest batch handed to process_batch. Defaults to 64.
+            max_wait_ms (float, optional): Longest time an item waits for others to join its batch. Defaults to 10.
+            name (str, optional): Name used for the worker thread.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.batches_run = 0
+        self.items_processed = 0
+        self._worker = PerLoop(self._start)
+
+    def _start(self):
+        queue = asyncio.Queue()
+        return queue, asyncio.get_running_loop().create_task(self._run(queue))
+
+    async def submit(self, item):
+        """Queues one item and waits for its result."""
+        queue, worker = self._worker.get()
+        if worker.done():
+            self._worker.reset()
+            queue, worker = self._worker.get()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((item, future))
+        return await future
+
+    async def submit_many(self, items: list):
+        """Queues several items at once; they may be split across or merged into batches."""
+        return list(await asyncio.gather(*[self.submit(item) for item in items]))
+
+    async def _collect_batch(self, queue: asyncio.Queue):
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch(queue)
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.process_batch, items
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.items_processed += len(items)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "mean_batch_size": self.items_processed / max(self.batches_run, 1),
+        }
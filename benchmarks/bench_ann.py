@@ -0,0 +1,63 @@
+"""
+Recall vs latency of the IVF history index against exact search.
+
+Usage:
+    python benchmarks/bench_ann.py --n 50000 --dim 384 --queries 200 --nprobe 1 4 8 16 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import IVFIndex
+
+
+def make_vectors(n, dim, clusters=200, seed=0):
+    """Clustered unit vectors, closer to real article embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, n)
+    return (centers[labels] + 0.6 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def timed_search(index, queries, k, **kwargs):
+    start = time.perf_counter()
+    results = index.search(queries, k, **kwargs)
+    per_query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return [{row for row, _, _ in r} for r in results], per_query_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.n + args.queries, args.dim)
+    data, queries = vectors[: args.n], vectors[args.n :]
+
+    index = IVFIndex(args.dim)
+    start = time.perf_counter()
+    for chunk in range(0, args.n, 1000):
+        index.add(data[chunk : chunk + 1000], [{}] * len(data[chunk : chunk + 1000]))
+    print(f"built {args.n} vectors, nlist={len(index.lists)} in {time.perf_counter() - start:.1f}s")
+
+    truth, exact_ms = timed_search(index, queries, args.k, exact=True)
+    print(f"{'mode':>10} {'recall@k':>9} {'ms/query':>9}")
+    print(f"{'exact':>10} {1.0:>9.3f} {exact_ms:>9.2f}")
+    for nprobe in args.nprobe:
+        found, ms = timed_search(index, queries, args.k, nprobe=nprobe)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(f"{'nprobe=' + str(nprobe):>10} {recall:>9.3f} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Inference backends (torch fp32, int8, onnx): accuracy parity, throughput and memory.
+
+Each backend runs in a fresh process so peak RSS is measured per backend. The
+fp32 torch run is the reference: the other backends must agree on at least
+--min-agreement of the sentiment labels of the fixture texts and reach a
+cosine similarity of at least --min-cosine with every reference embedding,
+otherwise the script exits with status 1.
+
+Usage:
+    python benchmarks/bench_backends.py --backends torch int8 onnx --threads 4
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture_texts():
+    with open(os.path.join(FIXTURES, "parity_texts.json")) as f:
+        return json.load(f)
+
+
+def normalize(embeddings):
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def run_backend(args, backend):
+    """Loads both models on one backend, times them and saves labels and embeddings."""
+    from utils import SemanticGrouping, SentimentAnalyzer
+
+    texts = load_fixture_texts()
+    repeat = args.repeat
+    start = time.perf_counter()
+    analyzer = SentimentAnalyzer(
+        args.sentiment_model, backend=backend, num_threads=args.threads
+    ).load()
+    grouping = SemanticGrouping(
+        args.embedding_model, cache_dir="", backend=backend, num_threads=args.threads
+    ).load()
+    load_seconds = time.perf_counter() - start
+
+    analyzer.predict(texts[:4])  # warm-up
+    grouping.encode(texts[:4])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        predictions = analyzer.predict(texts)
+    sentiment_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        embeddings = grouping.encode(texts)
+    embedding_seconds = time.perf_counter() - start
+
+    np.savez(
+        args.out,
+        labels=np.array([p["label"] for p in predictions]),
+        embeddings=embeddings.cpu().numpy(),
+        stats=np.array(
+            [
+                load_seconds,
+                len(texts) * repeat / sentiment_seconds,
+                len(texts) * repeat / embedding_seconds,
+                # ru_maxrss is in KiB on Linux
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            ]
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument(
+        "--sentiment-model", default="mrm8488/deberta-v3-ft-financial-news-sentiment-analysis"
+    )
+    parser.add_argument("--embedding-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args, args.worker)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in backends:
+            out_path = os.path.join(tmp_dir, f"{backend}.npz")
+            command = [
+                sys.executable, os.path.abspath(__file__), "--worker", backend,
+                "--out", out_path, "--repeat", str(args.repeat),
+                "--sentiment-model", args.sentiment_model,
+                "--embedding-model", args.embedding_model,
+            ]
+            if args.threads:
+                command += ["--threads", str(args.threads)]
+            subprocess.run(command, check=True)
+            with np.load(out_path) as data:
+                results[backend] = {name: data[name] for name in data.files}
+
+    reference = results["torch"]
+    passed = True
+    print(
+        f"{'backend':>8} {'load s':>7} {'sent/s':>8} {'emb/s':>8} {'peak MB':>8} "
+        f"{'agree':>6} {'min cos':>8}"
+    )
+    for backend in backends:
+        result = results[backend]
+        load_seconds, sentiment_rate, embedding_rate, peak_mb = result["stats"]
+        agreement = float(np.mean(result["labels"] == reference["labels"]))
+        cosine = float(
+            np.min(
+                np.sum(
+                    normalize(result["embeddings"]) * normalize(reference["embeddings"]),
+                    axis=1,
+                )
+            )
+        )
+        ok = agreement >= args.min_agreement and cosine >= args.min_cosine
+        passed = passed and ok
+        print(
+            f"{backend:>8} {load_seconds:>7.2f} {sentiment_rate:>8.1f} {embedding_rate:>8.1f} "
+            f"{peak_mb:>8.0f} {agreement:>6.2f} {cosine:>8.4f}{'' if ok else '  FAIL'}"
+        )
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
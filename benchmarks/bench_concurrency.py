@@ -0,0 +1,71 @@
+"""
+Latency under concurrent load against a running API server.
+
+Start the server first (uvicorn api:app --port 8000), then:
+    python benchmarks/bench_concurrency.py --clients 1 10 50 --requests 100 \
+        --api-key $OPENAI_API_KEY
+
+Requests rotate through --companies. Restart the server (or set
+RESULT_CACHE_TTL=0) between runs so the result cache does not hide the
+pipeline cost.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+
+async def run_level(base_url, clients, total_requests, make_body):
+    latencies, errors = [], 0
+    counter = iter(range(total_requests))
+
+    async def client_loop(client):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.post(f"{base_url}/compare-news", json=make_body(i))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=600) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument(
+        "--companies",
+        nargs="+",
+        default=["Tesla", "Apple", "Google", "Microsoft", "Amazon", "Nvidia"],
+    )
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    def make_body(i):
+        company = args.companies[i % len(args.companies)]
+        return {"api_key": args.api_key, "model_name": args.model, "company_name": company}
+
+    print(f"{'clients':>7} {'p50 s':>8} {'p99 s':>8} {'req/s':>7} {'errors':>6}")
+    for clients in args.clients:
+        latencies, errors, elapsed = asyncio.run(
+            run_level(args.url, clients, args.requests, make_body)
+        )
+        print(
+            f"{clients:>7} {np.percentile(latencies, 50):>8.2f} "
+            f"{np.percentile(latencies, 99):>8.2f} {len(latencies) / elapsed:>7.2f} {errors:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
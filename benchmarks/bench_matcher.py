@@ -0,0 +1,103 @@
+"""
+Company filtering: one regex search per (article, company) as filter_articles
+used to do, vs a single CompanyMatcher pass over all watched companies.
+
+    python benchmarks/bench_matcher.py --articles 2000 --companies 200
+
+Articles and company names are synthetic; about a third of the articles
+mention one or two of the companies.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from company_matcher import Company, CompanyMatcher
+
+WORDS = (
+    "market shares quarter growth revenue profit deal report investors analysts "
+    "rose fell outlook guidance chips cloud retail energy bank merger court ruling"
+).split()
+
+
+def synthetic_company(rng, index):
+    name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)).title()
+    return Company(
+        f"{name} {index}",
+        aliases=(f"{name} Holdings {index}",),
+        tickers=(f"{name[:3].upper()}{index}",),
+    )
+
+
+def synthetic_articles(rng, companies, count):
+    articles = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(40)]
+        if rng.random() < 0.33:
+            for company in rng.sample(companies, rng.randint(1, 2)):
+                mention = rng.choice(company.names() + company.tickers)
+                words.insert(rng.randrange(len(words)), mention)
+        articles.append({"title": " ".join(words[:10]), "summary": " ".join(words[10:])})
+    return articles
+
+
+def regex_groups(articles, companies):
+    groups = {company.name: [] for company in companies}
+    for article in articles:
+        full_text = (article["title"] + " " + article["summary"]).lower()
+        for company in companies:
+            for name in company.names() + company.tickers:
+                if re.search(r"\b" + re.escape(name.lower()) + r"\b", full_text):
+                    groups[company.name].append(article)
+                    break
+    return groups
+
+
+def matcher_groups(articles, matcher):
+    groups = {company.name: [] for company in matcher.companies}
+    for article in articles:
+        for name in matcher.match(f"{article['title']} {article['summary']}"):
+            groups[name].append(article)
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    companies = [synthetic_company(rng, i) for i in range(args.companies)]
+    articles = synthetic_articles(rng, companies, args.articles)
+
+    start = time.perf_counter()
+    matcher = CompanyMatcher(companies)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    groups = matcher_groups(articles, matcher)
+    matcher_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = regex_groups(articles, companies)
+    regex_seconds = time.perf_counter() - start
+
+    matched = sum(len(group) for group in groups.values())
+    print(f"{args.articles} articles x {args.companies} companies, {matched} mentions")
+    print(f"regex:   {regex_seconds:8.3f} s  {args.articles / regex_seconds:10.0f} articles/s")
+    print(
+        f"matcher: {matcher_seconds:8.3f} s  {args.articles / matcher_seconds:10.0f} articles/s"
+        f"  (build {build_seconds * 1000:.1f} ms)"
+    )
+    print(f"same groups: {groups == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Offline benchmark suite for the news pipeline: per stage and end to end, with
+no network access to news sites or OpenAI.
+
+Stages:
+    extract    async_bs4_extractor on recorded search pages (fixtures/html) or, with
+               --pages synthetic, on pages rendered from a corpus of --articles
+    sentiment  SentimentAnalyzer.predict on --articles synthetic articles
+    embedding  SemanticGrouping.encode + find_top_k_similar_articles on the same corpus
+    chatbot    ChatBot.main on --llm-articles articles with a deterministic fake chat model
+    endpoint   POST /compare-news on the recorded pages, fake chat model and real models
+
+Each stage runs in a fresh process so peak RSS is its own. Caches (embeddings,
+LLM responses, comparison results) are disabled so every run does the full work.
+The report is written as JSON; pass an earlier report with --baseline to see the
+change in throughput and latency.
+
+Usage:
+    python benchmarks/bench_pipeline.py --report bench_report.json
+    python benchmarks/bench_pipeline.py --stages extract chatbot --baseline bench_report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from offline import (
+    FakeChatModel,
+    FixtureFetcher,
+    load_recorded_pages,
+    synthetic_articles,
+    synthetic_pages,
+)
+
+STAGES = ("extract", "sentiment", "embedding", "chatbot", "endpoint")
+FORWARDED = (
+    "articles", "repeat", "warmup", "company", "pages", "sentiment_model",
+    "embedding_model", "model_name", "llm_articles", "llm_latency_ms", "seed",
+)
+
+
+def summarize(latencies: list, articles: int):
+    """
+    Returns:
+        dict: Runs, articles per run, throughput and latency percentiles in ms.
+    """
+    ms = np.array(latencies) * 1000
+    return {
+        "runs": len(latencies),
+        "articles": articles,
+        "articles_per_sec": articles * len(latencies) / sum(latencies),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def time_runs(args, run):
+    """Calls run() --warmup + --repeat times and returns the timed latencies in seconds."""
+    latencies = []
+    for _ in range(args.warmup + args.repeat):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    return latencies[args.warmup :]
+
+
+def fixture_pages(args):
+    if args.pages == "recorded":
+        return load_recorded_pages()
+    return synthetic_pages(args.articles, args.company, args.seed)
+
+
+def bench_extract(args):
+    from sources import get_sources
+    from utils import async_bs4_extractor
+
+    pages = fixture_pages(args)
+    # Every article on the pages is parsed and filtered, even though only 10 are returned
+    articles = sum(len(source.parse(pages.get(source.name, ""))) for source in get_sources())
+    fetcher = FixtureFetcher(pages)
+    loop = asyncio.new_event_loop()
+    latencies = time_runs(
+        args,
+        lambda: loop.run_until_complete(async_bs4_extractor(args.company, news_fetcher=fetcher)),
+    )
+    loop.close()
+    return summarize(latencies, articles)
+
+
+def corpus_texts(args):
+    from utils import article_text
+
+    return [article_text(a) for a in synthetic_articles(args.articles, args.company, args.seed)]
+
+
+def bench_sentiment(args):
+    from utils import SentimentAnalyzer
+
+    texts = corpus_texts(args)
+    analyzer = SentimentAnalyzer(args.sentiment_model).load()
+    return summarize(time_runs(args, lambda: analyzer.predict(texts)), len(texts))
+
+
+def bench_embedding(args):
+    from utils import SemanticGrouping
+
+    texts = corpus_texts(args)
+    grouping = SemanticGrouping(args.embedding_model, cache_dir="").load()
+
+    def run():
+        embeddings = grouping.encode(texts)
+        grouping.find_top_k_similar_articles(texts, k=5, embeddings=embeddings)
+
+    return summarize(time_runs(args, run), len(texts))
+
+
+def bench_chatbot(args):
+    from llm_utils import ChatBot
+
+    rng = random.Random(args.seed)
+    articles = [
+        {**article, "sentiment": rng.choice(("positive", "negative", "neutral"))}
+        for article in synthetic_articles(args.llm_articles, args.company, args.seed)
+    ]
+    similar_pairs = [
+        (i, i + 1, 0.9 - i / 100) for i in range(min(5, len(articles) - 1))
+    ]
+    llm = FakeChatModel(args.llm_latency_ms)
+    chatbot = ChatBot(
+        "offline", args.model_name, articles, args.company, llm=llm, cache=None, governor=None
+    )
+    loop = asyncio.new_event_loop()
+    latencies = time_runs(
+        args, lambda: loop.run_until_complete(chatbot.main(similar_pairs))
+    )
+    loop.close()
+    result = summarize(latencies, len(articles))
+    result["llm_calls_per_run"] = llm.calls / (args.warmup + args.repeat)
+    return result
+
+
+def bench_endpoint(args, tmp_dir):
+    os.environ.update(
+        {
+            "LLM_CACHE_DIR": "",
+            "EMBEDDING_CACHE_DIR": "",
+            "RESULT_CACHE_TTL": "0",
+            # The fake model has no rate limits to respect
+            "LLM_REQUESTS_PER_MINUTE": "1000000000",
+            "LLM_TOKENS_PER_MINUTE": "1000000000",
+            "HISTORY_INDEX_DIR": os.path.join(tmp_dir, "history"),
+            "ARTICLE_STORE_PATH": os.path.join(tmp_dir, "articles.sqlite3"),
+            "JOB_STORE_PATH": os.path.join(tmp_dir, "jobs.sqlite3"),
+            "SENTIMENT_MODEL": args.sentiment_model,
+            "EMBEDDING_MODEL": args.embedding_model,
+        }
+    )
+    from fastapi.testclient import TestClient
+
+    import api
+    import llm_utils
+    import utils
+
+    # async_bs4_extractor falls back to the module fetcher, ChatBot to make_chat_model
+    utils.fetcher = FixtureFetcher(fixture_pages(args))
+    llm = FakeChatModel(args.llm_latency_ms)
+    llm_utils.make_chat_model = api.make_chat_model = lambda *a, **k: llm
+
+    async def list_models(api_key):
+        return [args.model_name]
+
+    api.list_models = list_models
+
+    body = {"api_key": "offline", "model_name": args.model_name, "company_name": args.company}
+    articles = []
+    with TestClient(api.app) as client:
+
+        def run():
+            response = client.post("/compare-news", json=body)
+            response.raise_for_status()
+            articles.append(len(response.json()["Articles"]))
+
+        latencies = time_runs(args, run)
+    return summarize(latencies, articles[-1])
+
+
+def run_worker(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.worker == "endpoint":
+            result = bench_endpoint(args, tmp_dir)
+        else:
+            result = globals()[f"bench_{args.worker}"](args)
+    # ru_maxrss is in KiB on Linux
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with open(args.out, "w") as f:
+        json.dump(result, f)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, baseline: dict = None):
+    columns = ("articles_per_sec", "p50_ms", "p99_ms", "peak_rss_mb")
+    print(f"{'stage':>10} {'articles':>8} {'art/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+    for stage, result in report["stages"].items():
+        print(
+            f"{stage:>10} {result['articles']:>8} {result['articles_per_sec']:>10.1f} "
+            f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['peak_rss_mb']:>8.0f}"
+        )
+        previous = (baseline or {}).get("stages", {}).get(stage)
+        if previous:
+            changes = [
+                f"{(result[column] / previous[column] - 1) * 100:+.1f}%" if previous[column] else "n/a"
+                for column in columns
+            ]
+            print(f"{'vs base':>10} {'':>8} {changes[0]:>10} {changes[1]:>9} {changes[2]:>9} {changes[3]:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--articles", type=int, default=200, help="synthetic corpus size")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--company", default="Tesla")
+    parser.add_argument("--pages", choices=("recorded", "synthetic"), default="recorded")
+    parser.add_argument(
+        "--sentiment-model", default="mrm8488/deberta-v3-ft-financial-news-sentiment-analysis"
+    )
+    parser.add_argument("--embedding-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--model-name", default="gpt-4o-mini")
+    parser.add_argument("--llm-articles", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default="bench_report.json")
+    parser.add_argument("--baseline", default=None, help="earlier report to compare against")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for stage in args.stages:
+            out_path = os.path.join(tmp_dir, f"{stage}.json")
+            command = [sys.executable, os.path.abspath(__file__), "--worker", stage, "--out", out_path]
+            for name in FORWARDED:
+                command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+            subprocess.run(command, check=True)
+            with open(out_path) as f:
+                stages[stage] = json.load(f)
+
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {name: getattr(args, name) for name in FORWARDED},
+        "stages": stages,
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+CPU benchmark: per-article pipeline calls vs batched SentimentAnalyzer.predict.
+
+Usage:
+    python benchmarks/bench_sentiment.py --sizes 10 100 1000 --batch-size 32
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from transformers import pipeline
+from utils import SentimentAnalyzer
+
+WORDS = (
+    "shares rise fall profit loss record quarter regulators probe launch "
+    "electric vehicle sales growth investors market revenue guidance cut "
+    "strike recall factory deal merger lawsuit earnings forecast demand"
+).split()
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+        for _ in range(n)
+    ]
+
+
+def bench_per_article(analyzer, texts):
+    pipe = pipeline(
+        "text-classification",
+        model=analyzer.model,
+        tokenizer=analyzer.tokenizer,
+        device=analyzer.device,
+    )
+    start = time.perf_counter()
+    labels = [pipe(text)[0]["label"] for text in texts]
+    return time.perf_counter() - start, labels
+
+
+def bench_batched(analyzer, texts, batch_size):
+    start = time.perf_counter()
+    labels = [p["label"] for p in analyzer.predict(texts, batch_size)]
+    return time.perf_counter() - start, labels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    torch.set_num_threads(os.cpu_count())
+    analyzer = SentimentAnalyzer()
+    analyzer.predict(make_texts(4))  # warm-up
+
+    print(f"{'n':>6} {'per-article/s':>14} {'batched/s':>10} {'speedup':>8} {'agree':>6}")
+    for n in args.sizes:
+        texts = make_texts(n)
+        t_single, single_labels = bench_per_article(analyzer, texts)
+        t_batched, batched_labels = bench_batched(analyzer, texts, args.batch_size)
+        agree = sum(a == b for a, b in zip(single_labels, batched_labels)) / n
+        print(
+            f"{n:>6} {n / t_single:>14.1f} {n / t_batched:>10.1f} "
+            f"{t_single / t_batched:>7.2f}x {agree:>6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Startup cost of the API: import time, time until the server answers, and the
+latency of the first and second model-backed requests.
+
+    python benchmarks/bench_startup.py --runs 5
+    MODEL_LOADING=preload python benchmarks/bench_startup.py
+
+The first /warmup call loads the models under the default lazy mode; compare it
+with MODEL_LOADING=startup or preload, where that cost moves before the server
+starts answering. Pass --company to also time a first /news request (needs
+network access).
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_seconds():
+    code = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def time_request(client, method, path):
+    start = time.perf_counter()
+    response = client.request(method, path)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def server_run(port, company):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=600) as client:
+            while True:
+                try:
+                    client.get("/cache-stats")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None:
+                        raise RuntimeError("server exited during startup")
+                    time.sleep(0.05)
+            timings = {"ready": time.perf_counter() - start}
+            if company:
+                timings["first_news"] = time_request(client, "GET", f"/news/{company}")
+            timings["first_warmup"] = time_request(client, "POST", "/warmup")
+            timings["second_warmup"] = time_request(client, "POST", "/warmup")
+        return timings
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--company", default=None)
+    args = parser.parse_args()
+
+    print(f"MODEL_LOADING={os.environ.get('MODEL_LOADING', 'lazy')}")
+    results = {"import": [import_seconds() for _ in range(args.runs)]}
+    for _ in range(args.runs):
+        for name, seconds in server_run(args.port, args.company).items():
+            results.setdefault(name, []).append(seconds)
+
+    print(f"{'measure':>14} {'median s':>9} {'min s':>7}")
+    for name, values in results.items():
+        print(f"{name:>14} {np.median(values):>9.2f} {np.min(values):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Two-model path (DeBERTa sentiment + MiniLM embeddings) vs the unified path
+(MiniLM embeddings + linear sentiment head): latency, peak memory and label
+agreement on the fixture texts.
+
+Train a head first (python train_sentiment_head.py ...), then:
+    python benchmarks/bench_unified.py --head .cache/sentiment_head.npz --repeat 5
+
+Each path runs in a fresh process so peak RSS covers only its own models. The
+embedding cache is disabled so both paths pay for every encoder pass.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_backends import load_fixture_texts
+
+
+def run_path(args, path):
+    from utils import EmbeddingSentimentHead, SemanticGrouping, SentimentAnalyzer
+
+    texts = load_fixture_texts()
+    start = time.perf_counter()
+    grouping = SemanticGrouping(args.embedding_model, cache_dir="").load()
+    if path == "unified":
+        analyzer = EmbeddingSentimentHead(grouping, args.head).load()
+    else:
+        analyzer = SentimentAnalyzer(args.sentiment_model).load()
+    load_seconds = time.perf_counter() - start
+
+    def analyse():
+        if path == "unified":
+            embeddings = grouping.encode(texts)
+            return analyzer.predict_embeddings(embeddings), embeddings
+        return analyzer.predict(texts), grouping.encode(texts)
+
+    analyse()  # warm-up
+    latencies = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        predictions, embeddings = analyse()
+        latencies.append(time.perf_counter() - start)
+
+    np.savez(
+        args.out,
+        labels=np.array([p["label"] for p in predictions]),
+        stats=np.array(
+            [
+                load_seconds,
+                np.median(latencies) / len(texts) * 1000,
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            ]
+        ),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--head", default=os.environ.get("SENTIMENT_HEAD_PATH", ".cache/sentiment_head.npz")
+    )
+    parser.add_argument(
+        "--sentiment-model", default="mrm8488/deberta-v3-ft-financial-news-sentiment-analysis"
+    )
+    parser.add_argument("--embedding-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_path(args, args.worker)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for path in ("separate", "unified"):
+            out_path = os.path.join(tmp_dir, f"{path}.npz")
+            subprocess.run(
+                [
+                    sys.executable, os.path.abspath(__file__), "--worker", path,
+                    "--out", out_path, "--repeat", str(args.repeat), "--head", args.head,
+                    "--sentiment-model", args.sentiment_model,
+                    "--embedding-model", args.embedding_model,
+                ],
+                check=True,
+            )
+            with np.load(out_path) as data:
+                results[path] = {name: data[name] for name in data.files}
+
+    print(f"{'path':>9} {'load s':>7} {'ms/article':>10} {'peak MB':>8} {'agree':>6}")
+    for path, result in results.items():
+        load_seconds, ms_per_article, peak_mb = result["stats"]
+        agreement = float(np.mean(result["labels"] == results["separate"]["labels"]))
+        print(
+            f"{path:>9} {load_seconds:>7.2f} {ms_per_article:>10.2f} "
+            f"{peak_mb:>8.0f} {agreement:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Offline stand-ins for the network dependencies of the pipeline, shared by the
+benchmark scripts: recorded search pages served by a fake fetcher, synthetic
+article corpora and a deterministic fake chat model for ChatBot.
+"""
+
+import asyncio
+import html
+import os
+import random
+import re
+import sys
+import typing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_utils import text_hash
+from sources import get_sources
+
+HTML_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+SUBJECTS = (
+    "quarterly deliveries", "the new battery plant", "its self-driving software",
+    "the China price cuts", "the cloud business", "the chip supply deal",
+    "its annual shareholder meeting", "the union talks", "the recall", "its ad revenue",
+)
+POSITIVE = ("beats expectations on", "shares jump after", "wins approval for", "expands")
+NEGATIVE = ("faces probe over", "shares slide after", "cuts jobs amid", "delays")
+NEUTRAL = ("reports on", "sets date for", "comments on", "reviews")
+DETAILS = (
+    "Analysts said the results would shape the outlook for the rest of the year.",
+    "The company did not respond to a request for comment.",
+    "Regulators in the US and Europe are watching the market closely.",
+    "Investors have been waiting for clearer guidance on margins.",
+    "Rivals have launched cheaper models in several markets.",
+)
+TOPICS = (
+    "Electric Vehicles", "Finance", "Regulation", "Technology", "Supply Chain",
+    "Labor", "Artificial Intelligence", "Energy", "Markets", "Manufacturing",
+)
+
+
+def synthetic_articles(count: int, company_name: str = "Tesla", seed: int = 0):
+    """
+    Generates news-like articles that all mention company_name, with a mix of
+    positive, negative and neutral headlines.
+
+    Returns:
+        list of dict: Articles with 'title' and 'summary'.
+    """
+    rng = random.Random(seed)
+    articles = []
+    for i in range(count):
+        verb = rng.choice(rng.choice((POSITIVE, NEGATIVE, NEUTRAL)))
+        subject = rng.choice(SUBJECTS)
+        title = f"{company_name} {verb} {subject}"
+        summary = (
+            f"{company_name} said on day {i} that {subject} had moved ahead of plan. "
+            + " ".join(rng.sample(DETAILS, 2))
+        )
+        articles.append({"title": title, "summary": summary})
+    return articles
+
+
+def _tag(rule: tuple, content: str):
+    name, attrs = rule
+    attributes = "".join(
+        f' {key}="{html.escape(" ".join(value) if isinstance(value, list) else str(value))}"'
+        for key, value in attrs.items()
+    )
+    return f"<{name}{attributes}>{content}</{name}>"
+
+
+def render_search_page(source, articles: list):
+    """Renders a results page that source.parse reads back as the given articles."""
+    items = "\n".join(
+        _tag(
+            source.item_rule,
+            _tag(source.title_rule, html.escape(article["title"]))
+            + _tag(source.summary_rule, html.escape(article["summary"])),
+        )
+        for article in articles
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{source.name} search</title></head>"
+        f"<body><nav><a href='/'>Home</a></nav><main><ul>\n{items}\n</ul></main></body></html>"
+    )
+
+
+def load_recorded_pages():
+    """
+    Returns:
+        dict: Source name to the recorded search page in fixtures/html.
+    """
+    pages = {}
+    for source in get_sources():
+        path = os.path.join(HTML_FIXTURES, f"{source.name}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                pages[source.name] = f.read()
+    return pages
+
+
+def synthetic_pages(count: int, company_name: str = "Tesla", seed: int = 0):
+    """
+    Splits a synthetic corpus of count articles over the registered sources.
+
+    Returns:
+        dict: Source name to a rendered search page.
+    """
+    sources = get_sources()
+    articles = synthetic_articles(count, company_name, seed)
+    return {
+        source.name: render_search_page(source, articles[i :: len(sources)])
+        for i, source in enumerate(sources)
+    }
+
+
+class FixtureFetcher:
+    """
+    Drop-in for AsyncFetcher that answers every search url with the page of the
+    source whose url template it matches.
+    """
+
+    def __init__(self, pages: dict, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.pages = {
+            source.url_template.split("{")[0]: pages.get(source.name, "")
+            for source in get_sources()
+        }
+
+    async def fetch(self, url: str, timeout: float = None):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        for prefix, page in self.pages.items():
+            if url.startswith(prefix):
+                return page
+        return ""
+
+    async def aclose(self):
+        pass
+
+
+class FakeChatModel:
+    """
+    Deterministic stand-in for ChatOpenAI. Structured outputs are filled from the
+    schema with values derived from a hash of the prompt, so the same prompt always
+    gets the same answer; batch topic requests get one entry per "Article <id>:".
+
+    Args:
+        latency_ms (float, optional): Simulated time per call.
+        tokens_per_char (float, optional): Used to report token usage.
+    """
+
+    def __init__(self, latency_ms: float = 0, tokens_per_char: float = 0.25):
+        self.latency_ms = latency_ms
+        self.tokens_per_char = tokens_per_char
+        self.calls = 0
+
+    def _value(self, annotation, rng, article_ids):
+        origin = typing.get_origin(annotation)
+        if origin in (list, typing.List):
+            (item,) = typing.get_args(annotation)
+            if hasattr(item, "model_fields") and "article_id" in item.model_fields:
+                return [
+                    item(article_id=i, **self._fields(item, rng, article_ids, skip="article_id"))
+                    for i in article_ids
+                ]
+            return [self._value(item, rng, article_ids) for _ in range(rng.randint(2, 3))]
+        if annotation is int:
+            return rng.randint(0, 9)
+        if annotation is str:
+            return " ".join(rng.sample(TOPICS, 2)) + " " + rng.choice(DETAILS)
+        if hasattr(annotation, "model_fields"):
+            return annotation(**self._fields(annotation, rng, article_ids))
+        return None
+
+    def _fields(self, schema, rng, article_ids, skip=None):
+        values = {}
+        for name, field in schema.model_fields.items():
+            if name == skip:
+                continue
+            if field.annotation in (typing.List[str], list[str]) and "topic" in name:
+                values[name] = rng.sample(TOPICS, rng.randint(2, 3))
+            else:
+                values[name] = self._value(field.annotation, rng, article_ids)
+        return values
+
+    def respond(self, schema, prompt: str):
+        from langchain_core.messages import AIMessage
+
+        self.calls += 1
+        rng = random.Random(text_hash(schema.__name__, prompt))
+        article_ids = [int(i) for i in re.findall(r"Article (\d+):", prompt)]
+        parsed = schema(**self._fields(schema, rng, article_ids))
+        input_tokens = int(len(prompt) * self.tokens_per_char)
+        output_tokens = int(len(parsed.model_dump_json()) * self.tokens_per_char)
+        raw = AIMessage(
+            content=parsed.model_dump_json(),
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return raw, parsed
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        from langchain_core.runnables import RunnableLambda
+
+        def wrap(raw, parsed):
+            if include_raw:
+                return {"raw": raw, "parsed": parsed, "parsing_error": None}
+            return parsed
+
+        def invoke(prompt_value):
+            return wrap(*self.respond(schema, prompt_value.to_string()))
+
+        async def ainvoke(prompt_value):
+            if self.latency_ms:
+                await asyncio.sleep(self.latency_ms / 1000)
+            return wrap(*self.respond(schema, prompt_value.to_string()))
+
+        return RunnableLambda(invoke, afunc=ainvoke)
@@ -0,0 +1,615 @@
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+import numpy as np
+
+# Bytes of a text_hash digest, stored per embedding row
+KEY_BYTES = 32
+
+
+def text_hash(*parts: str):
+    """Content address for a text and whatever it depends on (model id, language, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk, content-addressed embedding cache.
+
+    Vectors live in a memory-mapped float32 matrix (embeddings.f32) with one row
+    per cached text, and row_keys.bin holds the key each row was written for;
+    index.json maps sha256(model_id, text) to its row and last use time. New
+    rows and evictions are appended to index.log and folded into index.json
+    every compact_every records, so a put costs one small append instead of a
+    full index rewrite. A small in-memory LRU sits in front of the
+    memmap, and once the matrix is full the least recently used rows are reused.
+
+    Processes sharing cache_dir serialize writes with an flock on index.lock and
+    replay each other's log records before reading or allocating rows. A row
+    whose stored key does not match is treated as a miss.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_id: str,
+        dim: int,
+        capacity: int = 50_000,
+        hot_size: int = 2_048,
+        compact_every: int = 1_000,
+    ):
+        self.cache_dir = cache_dir
+        self.model_id = model_id
+        self.dim = dim
+        self.capacity = capacity
+        self.hot_size = hot_size
+        self.compact_every = compact_every
+        self.hot = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.hot_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.matrix_path = os.path.join(cache_dir, "embeddings.f32")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.log_path = os.path.join(cache_dir, "index.log")
+        self.lock_path = os.path.join(cache_dir, "index.lock")
+        self.keys_path = os.path.join(cache_dir, "row_keys.bin")
+        with self._file_lock():
+            self._load()
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _reset(self, reason: str):
+        print(f"Embedding cache at {self.cache_dir} {reason}, resetting.")
+        for path in (self.matrix_path, self.keys_path, self.index_path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _load(self):
+        """(Re)reads index.json and index.log; call with the file lock held."""
+        matrix_bytes = self.capacity * self.dim * np.dtype(np.float32).itemsize
+        has_index = os.path.exists(self.index_path) or os.path.exists(self.log_path)
+        if not os.path.exists(self.matrix_path):
+            if has_index:
+                self._reset("has an index but no embeddings.f32")
+        elif not has_index:
+            os.remove(self.matrix_path)
+        elif os.path.getsize(self.matrix_path) != matrix_bytes:
+            self._reset("has an embeddings.f32 of the wrong size")
+        elif self._size(self.keys_path) != self.capacity * KEY_BYTES:
+            self._reset("has no row keys for embeddings.f32")
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                meta = json.load(f)
+            if (
+                meta.get("model_id") != self.model_id
+                or meta.get("dim") != self.dim
+                or meta.get("capacity") != self.capacity
+            ):
+                self._reset("does not match model")
+            else:
+                self.index = meta["entries"]
+        self.index_stat = self._stat(self.index_path)
+
+        mode = "r+" if os.path.exists(self.matrix_path) else "w+"
+        self.matrix = np.memmap(
+            self.matrix_path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim)
+        )
+        self.row_keys = np.memmap(
+            self.keys_path, dtype=np.uint8, mode=mode, shape=(self.capacity, KEY_BYTES)
+        )
+        self.log_offset = 0
+        self.log_records = 0
+        self._replay_log()
+        self.free_rows = self._free_rows()
+        if self.index_stat is None:
+            # Stamp the directory with the model so a later mismatch is detected
+            self._compact()
+
+    @staticmethod
+    def _size(path: str):
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _replay_log(self):
+        """Applies log records written since log_offset and returns how many there were."""
+        if not os.path.exists(self.log_path):
+            return 0
+        with open(self.log_path) as f:
+            f.seek(self.log_offset)
+            lines = f.readlines()
+        applied = 0
+        for line in lines:
+            if not line.endswith("\n"):
+                # A writer died mid-record; the next compaction drops it
+                break
+            self.log_offset += len(line.encode("utf-8"))
+            self.log_records += 1
+            applied += 1
+            record = json.loads(line)
+            if "row" in record:
+                self.index[record["key"]] = {
+                    "row": record["row"],
+                    "last_used": record["last_used"],
+                }
+            else:
+                self.index.pop(record["key"], None)
+        return applied
+
+    def _free_rows(self):
+        used_rows = {entry["row"] for entry in self.index.values()}
+        return [row for row in range(self.capacity - 1, -1, -1) if row not in used_rows]
+
+    def _catch_up(self):
+        """Picks up other processes' writes; call with the file lock held."""
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if self._stat(self.index_path) != self.index_stat or log_size < self.log_offset:
+            # Another process compacted the log into a new index.json
+            self._load()
+        elif log_size > self.log_offset and self._replay_log():
+            self.free_rows = self._free_rows()
+
+    def _compact(self):
+        """Folds index.log into index.json; call with the file lock held."""
+        self.matrix.flush()
+        self.row_keys.flush()
+        meta = {
+            "model_id": self.model_id,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "entries": self.index,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.index_path)
+        # Replaying the log over the new index.json is harmless if we die before this
+        open(self.log_path, "w").close()
+        self.index_stat = self._stat(self.index_path)
+        self.log_offset = 0
+        self.log_records = 0
+
+    def flush(self):
+        """Writes the full index, including last-use times, to index.json."""
+        with self.lock, self._file_lock():
+            self._catch_up()
+            self._compact()
+
+    def key(self, text: str):
+        return text_hash(self.model_id, text)
+
+    def _remember(self, key, vector):
+        self.hot[key] = vector
+        self.hot.move_to_end(key)
+        while len(self.hot) > self.hot_size:
+            self.hot.popitem(last=False)
+
+    def get_many(self, texts: list):
+        """
+        Looks up cached embeddings.
+
+        Args:
+            texts (list of str): Texts to look up.
+
+        Returns:
+            tuple: (found, missing) where found maps position -> vector and missing lists uncached positions.
+        """
+        found, missing = {}, []
+        now = time.time()
+        with self.lock, self._file_lock(shared=True):
+            # Another process may have evicted a key and given its row to a new one
+            self._catch_up()
+            for i, text in enumerate(texts):
+                key = self.key(text)
+                if key in self.hot:
+                    self.hot.move_to_end(key)
+                    if key in self.index:
+                        self.index[key]["last_used"] = now
+                    found[i] = self.hot[key]
+                    self.hits += 1
+                    self.hot_hits += 1
+                elif key in self.index and self._row_holds(key):
+                    entry = self.index[key]
+                    entry["last_used"] = now
+                    vector = np.array(self.matrix[entry["row"]])
+                    self._remember(key, vector)
+                    found[i] = vector
+                    self.hits += 1
+                else:
+                    missing.append(i)
+                    self.misses += 1
+        return found, missing
+
+    def _row_holds(self, key: str):
+        """Whether key's row still holds key's vector (and not a later text's)."""
+        return bytes(self.row_keys[self.index[key]["row"]]) == bytes.fromhex(key)
+
+    def _evict(self, n: int):
+        """Frees the n least recently used rows and returns their log records."""
+        oldest = heapq.nsmallest(n, self.index.items(), key=lambda item: item[1]["last_used"])
+        records = []
+        for key, entry in oldest:
+            del self.index[key]
+            self.hot.pop(key, None)
+            self.free_rows.append(entry["row"])
+            self.evictions += 1
+            records.append({"key": key})
+        return records
+
+    def put_many(self, texts: list, vectors):
+        """Stores embeddings for texts, evicting least recently used rows when full."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+        with self.lock, self._file_lock():
+            self._catch_up()
+            new = {}
+            for text, vector in zip(texts, vectors):
+                new[self.key(text)] = vector
+            new = {key: vector for key, vector in new.items() if key not in self.index}
+            new = dict(list(new.items())[: self.capacity])
+            if not new:
+                return
+
+            records = []
+            shortfall = len(new) - len(self.free_rows)
+            if shortfall > 0:
+                records = self._evict(shortfall)
+
+            for key, vector in new.items():
+                row = self.free_rows.pop()
+                self.matrix[row] = vector
+                self.row_keys[row] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+                self.index[key] = {"row": row, "last_used": now}
+                self._remember(key, vector)
+                records.append({"key": key, "row": row, "last_used": now})
+            # Rows must be on disk before the log points other processes at them
+            self.matrix.flush()
+            self.row_keys.flush()
+            lines = "".join(json.dumps(record) + "\n" for record in records)
+            with open(self.log_path, "a") as f:
+                # Drop a partial record left by a writer that died mid-append
+                f.truncate(self.log_offset)
+                f.write(lines)
+            self.log_offset += len(lines.encode("utf-8"))
+            self.log_records += len(records)
+            if self.log_records >= self.compact_every:
+                self._compact()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "hot_hits": self.hot_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.index),
+            "capacity": self.capacity,
+        }
+
+
+class MemoryBackend:
+    """In-process LRU backend for ResultCache."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key: str, record: dict):
+        with self.lock:
+            self.entries[key] = record
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class DiskBackend:
+    """
+    Local on-disk backend for ResultCache: one JSON file per key, least recently
+    used files removed beyond max_entries. Values must be JSON-serializable.
+
+    The file count is tracked as files are written, and the directory is only
+    listed once it exceeds max_entries; that sweep trims it to sweep_to of
+    max_entries, so sweeps are spread over many writes.
+    """
+
+    blocking = True
+
+    def __init__(self, cache_dir: str, max_entries: int = 1_000, sweep_to: float = 0.9):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.sweep_to = sweep_to
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.count = len(self._files())
+
+    def _path(self, key: str):
+        # Keys can come from clients (e.g. session ids), so they never form the file name
+        return os.path.join(self.cache_dir, f"{text_hash(key)}.json")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted since it was read
+            return None
+        return record
+
+    def set(self, key: str, record: dict):
+        path = self._path(key)
+        with self.lock:
+            is_new = not os.path.exists(path)
+            with open(path + ".tmp", "w") as f:
+                json.dump(record, f)
+            os.replace(path + ".tmp", path)
+            self.count += is_new
+            if self.count > self.max_entries:
+                self._evict()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            return
+        with self.lock:
+            self.count -= 1
+
+    def _files(self):
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".json")
+        ]
+
+    def _evict(self):
+        """Removes the least recently used files down to sweep_to of max_entries."""
+        files = []
+        for path in self._files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                pass
+        files.sort()
+        keep = int(self.max_entries * self.sweep_to)
+        for _, path in files[: max(0, len(files) - keep)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        # Other processes may share the directory, so count what is left
+        self.count = min(len(files), keep)
+
+
+class SQLiteBackend:
+    """
+    SQLite backend for ResultCache, safe to share between worker processes on one
+    host. Expired rows are purged on write and at most max_entries rows are kept,
+    least recently written first out. Values must be JSON-serializable.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10_000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, expires_at REAL, updated_at REAL, record TEXT)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_updated ON entries (updated_at)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, record: dict):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, record.get("expires_at"), now, json.dumps(record)),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+
+def make_backend(backend: str, directory: str, max_entries: int):
+    """
+    Builds a ResultCache backend by name: 'memory', 'disk' (JSON files in directory)
+    or 'sqlite' (directory/store.sqlite3).
+    """
+    if backend == "disk":
+        return DiskBackend(directory, max_entries=max_entries)
+    if backend == "sqlite":
+        return SQLiteBackend(
+            os.path.join(directory, "store.sqlite3"), max_entries=max_entries
+        )
+    return MemoryBackend(max_entries=max_entries)
+
+
+class ResultCache:
+    """
+    TTL cache in front of a pluggable backend, with single-flight coalescing:
+    concurrent callers asking for the same missing key share one computation.
+    The async methods (aget, alookup, aset, get_or_compute) run backends that do
+    file or database I/O in a worker thread, off the event loop.
+    """
+
+    def __init__(self, backend=None, ttl: float = 600.0):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: str):
+        record = self.backend.get(key)
+        if record is None:
+            return None
+        if record["expires_at"] < time.time():
+            self.backend.delete(key)
+            return None
+        return record["value"]
+
+    def lookup(self, key: str):
+        """Like get, but counts the hit or miss in the cache statistics."""
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: float = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self.backend.set(key, {"expires_at": expires_at, "value": value})
+
+    async def _off_loop(self, method, *args):
+        if getattr(self.backend, "blocking", True):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def aget(self, key: str):
+        return await self._off_loop(self.get, key)
+
+    async def alookup(self, key: str):
+        value = await self.aget(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def aset(self, key: str, value, ttl: float = None):
+        await self._off_loop(self.set, key, value, ttl)
+
+    async def get_or_compute(self, key: str, compute, should_cache=None):
+        """
+        Returns the cached value for key, or awaits compute() once for all concurrent callers.
+
+        Args:
+            key (str): Cache key.
+            compute (callable): Coroutine function producing the value. Failures are not cached.
+            should_cache (callable, optional): Predicate on the value; falsy results are returned but not stored.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        if key not in self.inflight:
+            value = await self.aget(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+        # Checked again: another caller may have started computing during the lookup
+        if key in self.inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self.inflight[key])
+
+        self.misses += 1
+
+        async def compute_and_store():
+            # Stored by the shared task, so it is cached even if this caller is cancelled
+            value = await compute()
+            if should_cache is None or should_cache(value):
+                await self.aset(key, value)
+            return value
+
+        def finished(task):
+            self.inflight.pop(key, None)
+            if not task.cancelled():
+                # Retrieved here too, so a failure nobody waited for is not logged
+                task.exception()
+
+        task = asyncio.ensure_future(compute_and_store())
+        self.inflight[key] = task
+        task.add_done_callback(finished)
+        return await asyncio.shield(task)
+
+    def stats(self):
+        requests = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / requests if requests else 0.0,
+            "inflight": len(self.inflight),
+        }
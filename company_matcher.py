@@ -0,0 +1,184 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton: finds every occurrence of a set of patterns in one
+    pass over the text, however many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter_matches(self, text: str):
+        """
+        Yields:
+            tuple: (start, end, pattern index) for every match, overlapping ones included.
+        """
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield end - len(patterns[index]), end, index
+
+
+def _is_word_char(char: str):
+    return char.isalnum() or char == "_"
+
+
+class Company:
+    """
+    A watched company. The name and aliases match case-insensitively; tickers
+    match only as written (so "META" does not match "meta-analysis").
+    """
+
+    def __init__(self, name: str, aliases: tuple = (), tickers: tuple = ()):
+        self.name = name
+        self.aliases = tuple(aliases)
+        self.tickers = tuple(tickers)
+
+    def names(self):
+        return (self.name, *self.aliases)
+
+
+COMPANY_REGISTRY = {}
+
+
+def register_company(company: Company):
+    COMPANY_REGISTRY[company.name.casefold()] = company
+    matcher_for.cache_clear()
+    return company
+
+
+def find_company(name: str):
+    """Looks a company up by its name or any alias, ignoring case."""
+    key = " ".join(name.split()).casefold()
+    if key in COMPANY_REGISTRY:
+        return COMPANY_REGISTRY[key]
+    for company in COMPANY_REGISTRY.values():
+        if key in (alias.casefold() for alias in company.aliases) or name.strip() in company.tickers:
+            return company
+    return None
+
+
+def load_companies(path: str):
+    """
+    Registers companies from a JSON list of {"name", "aliases", "tickers"} objects.
+    """
+    with open(path, encoding="utf-8") as f:
+        for entry in json.load(f):
+            register_company(
+                Company(entry["name"], entry.get("aliases", ()), entry.get("tickers", ()))
+            )
+
+
+class CompanyMatcher:
+    """
+    Finds which of many companies a text mentions. Names and aliases go into one
+    case-folded automaton and tickers into a case-sensitive one, so a text is
+    scanned twice no matter how many companies are watched.
+
+    Args:
+        companies (list of Company): The companies to look for.
+        word_boundary (bool, optional): Only accept matches that do not start or end
+            inside a word ("Meta" does not match "Metaverse"). Defaults to True.
+    """
+
+    def __init__(self, companies: list, word_boundary: bool = True):
+        self.companies = list(companies)
+        self.word_boundary = word_boundary
+
+        folded, exact = {}, {}
+        for company in self.companies:
+            for name in company.names():
+                folded.setdefault(self.normalize(name).casefold(), set()).add(company.name)
+            for ticker in company.tickers:
+                exact.setdefault(self.normalize(ticker), set()).add(company.name)
+        # A blank name or ticker would match everywhere (and has no first character)
+        folded.pop("", None)
+        exact.pop("", None)
+        self._folded = (AhoCorasick(folded), list(folded.values()))
+        self._exact = (AhoCorasick(exact), list(exact.values()))
+
+    @staticmethod
+    def normalize(text: str):
+        return " ".join(text.split())
+
+    def _on_boundary(self, text, pattern, start, end):
+        if not self.word_boundary:
+            return True
+        if _is_word_char(pattern[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if _is_word_char(pattern[-1]) and end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def _scan(self, automaton, owners, text, found):
+        for start, end, index in automaton.iter_matches(text):
+            if self._on_boundary(text, automaton.patterns[index], start, end):
+                found.update(owners[index])
+
+    def match(self, text: str):
+        """
+        Returns:
+            set of str: Names of the companies mentioned in the text.
+        """
+        text = self.normalize(text)
+        found = set()
+        self._scan(*self._folded, text.casefold(), found)
+        self._scan(*self._exact, text, found)
+        return found
+
+
+@lru_cache(maxsize=256)
+def matcher_for(company_name: str):
+    """Cached matcher for one company, including its registered aliases and tickers."""
+    company = find_company(company_name) or Company(company_name.strip())
+    return CompanyMatcher([company])
+
+
+for company in (
+    Company("Alphabet", aliases=("Google",), tickers=("GOOGL", "GOOG")),
+    Company("Meta", aliases=("Meta Platforms", "Facebook"), tickers=("META",)),
+    Company("Microsoft", tickers=("MSFT",)),
+    Company("Apple", tickers=("AAPL",)),
+    Company("Amazon", tickers=("AMZN",)),
+    Company("Tesla", tickers=("TSLA",)),
+    Company("Nvidia", tickers=("NVDA",)),
+    Company("Netflix", tickers=("NFLX",)),
+):
+    register_company(company)
+
+if os.environ.get("COMPANY_ALIASES_PATH"):
+    load_companies(os.environ["COMPANY_ALIASES_PATH"])
@@ -0,0 +1,93 @@
+import asyncio
+import random
+import httpx
+
+from loop_utils import PerLoop
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncFetcher:
+    """
+    Fetches pages concurrently over a shared keep-alive connection pool.
+
+    The underlying httpx client and semaphore are created per event loop so the
+    fetcher can be built at import time. A client left over from a previous loop
+    is closed when a new loop replaces it.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_concurrency: int = 10,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        headers: dict = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = headers or DEFAULT_HEADERS
+        self._pool = PerLoop(self._open, close=lambda pool: pool[0].aclose())
+
+    def _open(self):
+        client = httpx.AsyncClient(
+            limits=self.limits,
+            headers=self.headers,
+            follow_redirects=True,
+            timeout=self.timeout,
+        )
+        return client, asyncio.Semaphore(self.max_concurrency)
+
+    async def fetch(self, url: str, timeout: float = None):
+        """
+        Fetches a single url, retrying transient failures with exponential backoff.
+
+        Args:
+            url (str): The url to fetch.
+            timeout (float, optional): Per-request timeout in seconds. Defaults to the fetcher timeout.
+
+        Returns:
+            str: The response body, or an empty string if every attempt failed.
+        """
+        client, semaphore = self._pool.get()
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    response = await client.get(url, timeout=timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.text
+                error = f"status {response.status_code}"
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                error = repr(e)
+                if isinstance(e, httpx.HTTPStatusError):
+                    break
+
+            if attempt < self.retries:
+                delay = self.backoff * (2**attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+
+        print(f"Fetch Error for {url}: {error}")
+        return ""
+
+    async def aclose(self):
+        pool = self._pool.reset()
+        if pool is not None:
+            await pool[0].aclose()
@@ -0,0 +1,155 @@
+import os
+import shutil
+
+from cache_utils import text_hash
+
+# torch: fp32 PyTorch. int8: PyTorch with Linear layers dynamically quantized to
+# int8. onnx: ONNX Runtime on a model exported once and kept in ONNX_CACHE_DIR
+# (needs optimum[onnxruntime]).
+INFERENCE_BACKENDS = ("torch", "int8", "onnx")
+# Runtime and weight precision of each backend; their outputs differ slightly, so
+# anything derived from them (e.g. cached embeddings) is kept apart by this tag
+BACKEND_TAGS = {"torch": "torch-fp32", "int8": "torch-int8", "onnx": "onnx-fp32"}
+
+
+def check_backend(backend: str):
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend {backend!r}, expected one of {INFERENCE_BACKENDS}"
+        )
+
+
+def set_num_threads(num_threads: int = None):
+    """Caps PyTorch intra-op threads. None keeps the library default."""
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+
+def quantize_dynamic(model):
+    """Returns a copy of model with its Linear layers quantized to int8 (CPU only)."""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def onnx_session_options(num_threads: int = None):
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+    return options
+
+
+def onnx_export_dir(cache_dir: str, model_id: str, task: str):
+    name = model_id.strip("/").replace("/", "--")
+    return os.path.join(cache_dir, f"{name}-{task}-{text_hash(model_id, task)[:8]}")
+
+
+def _export_once(path: str, export):
+    """
+    Runs export(tmp_path) and moves the result to path unless another process
+    got there first.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    export(tmp_path)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)  # exported concurrently
+
+
+def load_sequence_classifier(
+    model_id: str, backend: str = "torch", num_threads: int = None, cache_dir: str = None
+):
+    """
+    Loads a sequence classification model for the given backend.
+
+    Args:
+        model_id (str): Hugging Face model id or local path.
+        backend (str, optional): One of INFERENCE_BACKENDS. Defaults to "torch".
+        num_threads (int, optional): Intra-op threads for PyTorch or ONNX Runtime.
+        cache_dir (str, optional): Where ONNX exports are kept.
+
+    Returns:
+        tuple: (model, tokenizer). The model takes tokenizer output as keyword
+        arguments and returns an object with .logits, whatever the backend.
+    """
+    check_backend(backend)
+    set_num_threads(num_threads)
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    if backend != "onnx":
+        model = AutoModelForSequenceClassification.from_pretrained(model_id).eval()
+        if backend == "int8":
+            model = quantize_dynamic(model)
+        return model, AutoTokenizer.from_pretrained(model_id)
+
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    path = onnx_export_dir(cache_dir or ".cache/onnx", model_id, "sequence-classification")
+    if not os.path.isdir(path):
+
+        def export(tmp_path):
+            ORTModelForSequenceClassification.from_pretrained(
+                model_id, export=True
+            ).save_pretrained(tmp_path)
+            AutoTokenizer.from_pretrained(model_id).save_pretrained(tmp_path)
+
+        _export_once(path, export)
+
+    model = ORTModelForSequenceClassification.from_pretrained(
+        path,
+        provider="CPUExecutionProvider",
+        session_options=onnx_session_options(num_threads),
+    )
+    return model, AutoTokenizer.from_pretrained(path)
+
+
+def load_sentence_transformer(
+    model_id: str, backend: str = "torch", num_threads: int = None, cache_dir: str = None
+):
+    """
+    Loads a SentenceTransformer for the given backend.
+
+    Args:
+        model_id (str): Hugging Face model id or local path.
+        backend (str, optional): One of INFERENCE_BACKENDS. Defaults to "torch".
+        num_threads (int, optional): Intra-op threads for PyTorch or ONNX Runtime.
+        cache_dir (str, optional): Where ONNX exports are kept.
+
+    Returns:
+        SentenceTransformer: The model; encode() works the same for every backend.
+    """
+    check_backend(backend)
+    set_num_threads(num_threads)
+    from sentence_transformers import SentenceTransformer
+
+    if backend != "onnx":
+        model = SentenceTransformer(model_id, device="cpu" if backend == "int8" else None)
+        if backend == "int8":
+            model = quantize_dynamic(model)
+        return model
+
+    path = onnx_export_dir(cache_dir or ".cache/onnx", model_id, "feature-extraction")
+    if not os.path.isdir(path):
+        _export_once(
+            path,
+            lambda tmp_path: SentenceTransformer(model_id, backend="onnx").save_pretrained(
+                tmp_path
+            ),
+        )
+    return SentenceTransformer(
+        path,
+        backend="onnx",
+        model_kwargs={
+            "provider": "CPUExecutionProvider",
+            "session_options": onnx_session_options(num_threads),
+        },
+    )
@@ -0,0 +1,265 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def process_alive(pid: int):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    SQLite job table: status, stage, priority, request, result and error per job.
+    Secrets (the api key) are never written here; they live only in the queue's
+    in-memory job context.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, dedup_key TEXT, status TEXT, stage TEXT, "
+                "priority INTEGER, created_at REAL, updated_at REAL, "
+                "request TEXT, result TEXT, error TEXT, owner INTEGER)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def insert(self, job_id, dedup_key, priority, request):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, 'queued', NULL, ?, ?, ?, ?, NULL, NULL, ?)",
+                (job_id, dedup_key, priority, now, now, json.dumps(request), os.getpid()),
+            )
+
+    def update(self, job_id, only_if_status: tuple = None, **fields):
+        """
+        Sets columns on a job; a result is stored as JSON.
+
+        Args:
+            only_if_status (tuple of str, optional): Apply the update only while the
+                job's status is one of these, checked in the same statement.
+
+        Returns:
+            bool: Whether the job was updated.
+        """
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        query, params = f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+        if only_if_status:
+            query += f" AND status IN ({', '.join('?' for _ in only_if_status)})"
+            params += tuple(only_if_status)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount == 1
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def find_active(self, dedup_key):
+        """Returns the id of a queued or running job with this key whose worker process is alive."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner FROM jobs WHERE dedup_key = ? AND status IN (?, ?) "
+                "ORDER BY created_at",
+                (dedup_key, *ACTIVE_STATUSES),
+            ).fetchall()
+        for row in rows:
+            if process_alive(row["owner"]):
+                return row["id"]
+        return None
+
+    def fail_interrupted(self):
+        """Marks active jobs whose worker process has died as failed; their context is gone."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES
+            ).fetchall()
+        for row in rows:
+            if not process_alive(row["owner"]):
+                self.update(
+                    row["id"],
+                    only_if_status=ACTIVE_STATUSES,
+                    status="failed",
+                    error="interrupted by restart",
+                )
+
+
+class JobQueue:
+    """
+    Runs jobs through a pipeline of stages, each with its own priority queue and
+    worker pool, so one job's CPU-bound stage overlaps with another job's
+    I/O-bound stage.
+
+    A stage handler is an async function handler(context) that reads and extends
+    the job's in-memory context dict; the last stage returns the job result.
+    Higher priority jobs are picked first within every stage. Submitting a job
+    whose dedup key matches a queued or running job returns the existing job id.
+    """
+
+    def __init__(self, stages: list, store: JobStore):
+        """
+        Args:
+            stages (list of tuples): (name, handler, workers) in pipeline order.
+            store (JobStore): Persistent job table.
+        """
+        self.stages = stages
+        self.store = store
+        self.contexts = {}
+        self.running = {}
+        self.queues = {}
+        self.workers = []
+        self.sequence = itertools.count()
+
+    def start(self):
+        self.store.fail_interrupted()
+        for name, handler, workers in self.stages:
+            self.queues[name] = asyncio.PriorityQueue()
+            for _ in range(workers):
+                self.workers.append(
+                    asyncio.create_task(self._worker(name, handler))
+                )
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def submit(self, request: dict, dedup_key: str, priority: int = 0, secrets: dict = None):
+        """
+        Queues a job, or returns the id of an identical active job.
+
+        Args:
+            request (dict): Persisted job parameters.
+            dedup_key (str): Jobs with equal keys are deduplicated while active.
+            priority (int, optional): Higher runs first. Defaults to 0.
+            secrets (dict, optional): Extra context kept in memory only.
+
+        Returns:
+            tuple: (job_id, created) where created is False for a deduplicated job.
+        """
+        existing = self.store.find_active(dedup_key)
+        if existing:
+            return existing, False
+
+        job_id = uuid.uuid4().hex
+        self.store.insert(job_id, dedup_key, priority, request)
+        self.contexts[job_id] = {
+            "job_id": job_id,
+            "priority": priority,
+            "request": request,
+            **(secrets or {}),
+        }
+        self._enqueue(0, job_id)
+        return job_id, True
+
+    def _enqueue(self, stage_index, job_id):
+        name = self.stages[stage_index][0]
+        priority = self.contexts[job_id]["priority"]
+        self.queues[name].put_nowait((-priority, next(self.sequence), job_id))
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job. Returns False if it already finished. A job
+        owned by another worker process stops at its next status change, which
+        only happens while the stored status is still active.
+        """
+        if not self.store.update(job_id, only_if_status=ACTIVE_STATUSES, status="cancelled"):
+            return False
+        self.contexts.pop(job_id, None)
+        task = self.running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return True
+
+    async def _worker(self, stage_name, handler):
+        stage_index = [name for name, _, _ in self.stages].index(stage_name)
+        is_last = stage_index == len(self.stages) - 1
+        queue = self.queues[stage_name]
+
+        while True:
+            _, _, job_id = await queue.get()
+            context = self.contexts.get(job_id)
+            if context is None:
+                continue  # cancelled while queued
+            # Every transition re-checks the stored status, so a cancel written by
+            # another worker process is never overwritten
+            if not self._transition(job_id, "queued", status="running", stage=stage_name):
+                continue
+
+            task = asyncio.create_task(handler(context))
+            self.running[job_id] = task
+            try:
+                result = await task
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # the worker itself is being stopped
+                continue
+            except Exception as e:
+                print(f"Job {job_id} failed in {stage_name}: {e}")
+                self._transition(
+                    job_id, "running", status="failed", error=str(getattr(e, "detail", e))
+                )
+                self.contexts.pop(job_id, None)
+                continue
+            finally:
+                self.running.pop(job_id, None)
+
+            if job_id not in self.contexts:
+                continue  # cancelled during the stage
+            if is_last:
+                self._transition(job_id, "running", status="done", result=result)
+                self.contexts.pop(job_id, None)
+            elif self._transition(job_id, "running", status="queued"):
+                self._enqueue(stage_index + 1, job_id)
+
+    def _transition(self, job_id, current, **fields):
+        """
+        Updates a job whose status is still current. Otherwise it was cancelled (possibly
+        by another process) and its context is dropped.
+
+        Returns:
+            bool: Whether the job moved on.
+        """
+        if self.store.update(job_id, only_if_status=(current,), **fields):
+            return True
+        self.contexts.pop(job_id, None)
+        return False
+
+    def stats(self):
+        return {
+            "active_jobs": len(self.contexts),
+            "running": len(self.running),
+            "queued": {name: queue.qsize() for name, queue in self.queues.items()},
+        }
@@ -1,9 +1,47 @@
 import asyncio
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from typing import List
-import asyncio
+import json
+import os
+import time
+from cache_utils import DiskBackend, ResultCache, text_hash
+from metrics import observe, record_llm_usage, span
+from rate_limit import LLMGovernor, llm_governor
+
+
+def estimate_tokens(text: str):
+    """Rough token count (about four characters per token) used for prompt budgeting."""
+    return len(text) // 4 + 1
+
+
+def format_topic_overlap(id1: int, id2: int, common: list, unique_1: list, unique_2: list):
+    return {
+        "Common Topics ": common,
+        f"Unique Topics in Article {id1}": unique_1,
+        f"Unique Topics in Article {id2}": unique_2,
+    }
+
+
+def format_comparison(id1: int, id2: int, comparison: str, impact: str):
+    return {f"comparison of {id1}, {id2}": comparison, "impact": impact}
+
+
+def make_llm_cache():
+    """
+    Builds the shared LLM response cache from LLM_CACHE_DIR / LLM_CACHE_TTL / LLM_CACHE_SIZE.
+    Returns None when LLM_CACHE_DIR is set to an empty string.
+    """
+    cache_dir = os.environ.get("LLM_CACHE_DIR", ".cache/llm")
+    if not cache_dir:
+        return None
+    return ResultCache(
+        DiskBackend(cache_dir, max_entries=int(os.environ.get("LLM_CACHE_SIZE", 10_000))),
+        ttl=float(os.environ.get("LLM_CACHE_TTL", 24 * 3600)),
+    )
+
+
+llm_cache = make_llm_cache()
 
 
 class TopicExtraction(BaseModel):
@@ -14,6 +52,23 @@ class TopicExtraction(BaseModel):
     )
 
 
+class ArticleTopics(BaseModel):
+    """Topics of one article in a batch."""
+
+    article_id: int = Field(..., description="The id of the article as given in the input.")
+    topics: List[str] = Field(
+        ..., description="A list of topics covered in the news article."
+    )
+
+
+class BatchTopicExtraction(BaseModel):
+    """Extracts topics from several news articles."""
+
+    articles: List[ArticleTopics] = Field(
+        ..., description="The topics of every input article, one entry per article id."
+    )
+
+
 class TopicOverlap(BaseModel):
     """Extracts topics from news article."""
 
@@ -39,6 +94,26 @@ class ComparativeAnalyzer(BaseModel):
     )
 
 
+class PairAnalysis(BaseModel):
+    """Extracts topic overlap and comparative insights for a pair of articles."""
+
+    common_topics: List[str] = Field(
+        ..., description="A list of topics covered in the both article."
+    )
+    unique_topics_1: List[str] = Field(
+        ..., description="A list of topics unique to article 1."
+    )
+    unique_topics_2: List[str] = Field(
+        ..., description="A list of topics unique to article 2."
+    )
+    comparison: str = Field(
+        ..., description="A sentence of comparative insights between articles."
+    )
+    impact: str = Field(
+        ..., description="A sentence of potential impacts from the compared articles."
+    )
+
+
 class FinalAnalysis(BaseModel):
     """Summarizes the Comparative analysis."""
 
@@ -46,11 +121,50 @@ class FinalAnalysis(BaseModel):
     hindi: str = Field(..., description="Summarizes the analysis in hindi.")
 
 
+def make_chat_model(api_key: str, model: str, base_url: str = None):
+    """
+    Creates the OpenAI chat model. One instance (and its connection pool) can be
+    shared by several ChatBots through their llm argument.
+    """
+    from langchain_openai import ChatOpenAI
+
+    # Retries are left to the governor so backoff is shared across requests
+    return ChatOpenAI(
+        model=model,
+        api_key=api_key,
+        temperature=0.1,
+        max_retries=0,
+        base_url=base_url,
+    )
+
+
 class ChatBot:
     def __init__(
-        self, api_key: str, model: str, articles_dict: list, company_name: str
+        self,
+        api_key: str,
+        model: str,
+        articles_dict: list,
+        company_name: str,
+        llm=None,
+        cache: ResultCache = llm_cache,
+        topic_batch_tokens: int = 3_000,
+        topic_batch_splits: int = 2,
+        governor: LLMGovernor = llm_governor,
+        base_url: str = None,
+        completion_tokens: int = 300,
     ):
-        self.llm = ChatOpenAI(model=model, api_key=api_key, temperature=0.1)
+        if llm is None:
+            llm = make_chat_model(api_key, model, base_url)
+        self.llm = llm
+        self.model_name = model
+        # Cached responses are scoped to the key (tenant) that paid for them
+        self.api_key_hash = text_hash(api_key)
+        self.cache = cache
+        self.topic_batch_tokens = topic_batch_tokens
+        self.topic_batch_splits = topic_batch_splits
+        self.governor = governor
+        self.completion_tokens = completion_tokens
+        self.errors = []
         articles_list = []
         for i, article in enumerate(articles_dict):
             title = article["title"]
@@ -63,6 +177,88 @@ class ChatBot:
         self.articles = articles_list
         self.company_name = company_name
 
+    async def structured_invoke(self, messages: list, schema, inputs: dict):
+        """
+        Runs a structured-output chain, serving repeated prompts from the response cache.
+
+        Args:
+            messages (list of tuples): (role, template) pairs for ChatPromptTemplate.
+            schema (type[BaseModel]): The pydantic output schema.
+            inputs (dict): Template variables.
+
+        Returns:
+            BaseModel: The parsed schema instance.
+        """
+        prompt = ChatPromptTemplate.from_messages(messages)
+        # include_raw keeps the message, and with it the token usage, next to the parsed output
+        chain = prompt | self.llm.with_structured_output(schema, include_raw=True)
+        estimated_tokens = self.completion_tokens + estimate_tokens(
+            "".join(template for _, template in messages)
+            + "".join(str(value) for value in inputs.values())
+        )
+
+        # "llm" times only the calls; time spent in the governor (rate limits,
+        # concurrency cap, retry backoff) before each attempt is "llm_wait"
+        waiting_since = None
+
+        async def timed_call():
+            nonlocal waiting_since
+            if waiting_since is not None:
+                observe(
+                    "llm_wait",
+                    time.perf_counter() - waiting_since,
+                    waiting_since,
+                    task=schema.__name__,
+                )
+            try:
+                with span("llm", task=schema.__name__):
+                    return await chain.ainvoke(inputs)
+            finally:
+                waiting_since = time.perf_counter()
+
+        async def governed_invoke():
+            nonlocal waiting_since
+            if self.governor is None:
+                response = await timed_call()
+            else:
+                waiting_since = time.perf_counter()
+                response = await self.governor.run(timed_call, estimated_tokens)
+            record_llm_usage(
+                schema.__name__, getattr(response["raw"], "usage_metadata", None) or {}
+            )
+            if response["parsing_error"] is not None:
+                raise response["parsing_error"]
+            return response["parsed"]
+
+        if self.cache is None:
+            return await governed_invoke()
+
+        key = text_hash(
+            schema.__name__,
+            json.dumps(messages),
+            self.model_name,
+            self.api_key_hash,
+            json.dumps(inputs, sort_keys=True, default=str),
+        )
+
+        async def compute():
+            response = await governed_invoke()
+            return response.model_dump()
+
+        return schema.model_validate(await self.cache.get_or_compute(key, compute))
+
+    async def guarded(self, task_name: str, coroutine, default=None):
+        """
+        Awaits one LLM task, recording its failure in self.errors and returning
+        default instead of failing the whole analysis.
+        """
+        try:
+            return await coroutine
+        except Exception as e:
+            print(f"LLM Task Error ({task_name}): {e}")
+            self.errors.append({"task": task_name, "error": str(e)})
+            return default
+
     async def topic_extraction(self, article: str):
         system_message = """You are an expert in text analysis and topic extraction. Your task is to identify the main topics from a short news articleS.
 
@@ -87,16 +283,123 @@ class ChatBot:
 
                         """
 
-        prompt = ChatPromptTemplate.from_messages(
-            [("system", system_message), ("human", "Input Article: \n {articles}")]
-        )
-        structured_llm = self.llm.with_structured_output(TopicExtraction)
-        chain = prompt | structured_llm
-        response = await chain.ainvoke(
-            ({"company_name": self.company_name, "articles": article})
+        response = await self.structured_invoke(
+            [("system", system_message), ("human", "Input Article: \n {articles}")],
+            TopicExtraction,
+            {"company_name": self.company_name, "articles": article},
         )
         return response.topics
 
+    def topic_batches(self, article_ids: list = None):
+        """
+        Splits article ids into chunks whose combined text stays within topic_batch_tokens.
+
+        Args:
+            article_ids (list of int, optional): Articles to split. Defaults to all of them.
+
+        Returns:
+            list of list of int: Article ids per chunk.
+        """
+        if article_ids is None:
+            article_ids = range(len(self.articles))
+        batches, batch, batch_tokens = [], [], 0
+        for i in article_ids:
+            tokens = estimate_tokens(self.articles[i])
+            if batch and batch_tokens + tokens > self.topic_batch_tokens:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def batch_topic_extraction(self, article_ids: list, splits_left: int = None):
+        """
+        Extracts topics for several articles in one structured call. If the call
+        fails the chunk is retried as two halves, and articles missing from a
+        response are retried together, up to topic_batch_splits times; after that
+        each remaining article gets its own topic_extraction call, whose failures
+        are recorded in self.errors. A single article uses topic_extraction.
+
+        Args:
+            article_ids (list of int): Ids of the articles to extract topics for.
+            splits_left (int, optional): Retries left. Defaults to topic_batch_splits.
+
+        Returns:
+            dict: Mapping of article id to its list of topics.
+        """
+        if splits_left is None:
+            splits_left = self.topic_batch_splits
+        if len(article_ids) == 1:
+            i = article_ids[0]
+            return {
+                i: await self.guarded(
+                    f"topic_extraction {i}", self.topic_extraction(self.articles[i]), []
+                )
+            }
+
+        system_message = """You are an expert in text analysis and topic extraction. Your task is to identify the main topics from several short news articles.
+
+        ### Instructions:
+        - Extract **2 to 3 key topics** for **each article** that summarize its core ideas.
+        - Use **concise, generalizable topics** (e.g., "Electric Vehicles" instead of "Tesla Model X").
+        - Avoid generic words like "news" or "report".
+        - If relevant, include categories such as **Technology, Finance, Politics, Business, or Science**.
+        - Return one entry per article with its **article_id** exactly as given and its topics.
+        - Do not include just he company name {company_name}
+
+
+        ### Example:
+
+        #### Input Articles:
+        Article 0:
+        "Tesla has launched a new AI-powered self-driving feature that improves vehicle autonomy and enhances road safety."
+        Article 1:
+        "Regulators are reviewing Tesla's self-driving technology due to safety concerns."
+
+        #### Output:
+        [{{"article_id": 0, "topics": ["Artificial Intelligence", "Self-Driving Cars", "Road Safety"]}},
+         {{"article_id": 1, "topics": ["Regulations", "Self-Driving Cars", "Safety"]}}]
+        :
+
+                        """
+
+        articles = "\n".join(f"Article {i}: \n {self.articles[i]}" for i in article_ids)
+        topics = {}
+        error = "articles missing from the response"
+        try:
+            response = await self.structured_invoke(
+                [("system", system_message), ("human", "Input Articles: \n {articles}")],
+                BatchTopicExtraction,
+                {"company_name": self.company_name, "articles": articles},
+            )
+            topics = {
+                entry.article_id: entry.topics
+                for entry in response.articles
+                if entry.article_id in article_ids and entry.topics
+            }
+        except Exception as e:
+            print(f"Batch Topic Extraction Error: {e}")
+            error = str(e)
+
+        missing = [i for i in article_ids if i not in topics]
+        if not missing:
+            return topics
+        if splits_left <= 0:
+            print(f"Batch Topic Extraction Error ({missing}): {error}, extracting one by one")
+            chunks = [[i] for i in missing]
+        elif len(missing) < len(article_ids):
+            chunks = [missing]
+        else:
+            half = len(missing) // 2
+            chunks = [missing[:half], missing[half:]]
+        for chunk_topics in await asyncio.gather(
+            *[self.batch_topic_extraction(chunk, max(splits_left - 1, 0)) for chunk in chunks]
+        ):
+            topics.update(chunk_topics)
+        return topics
+
     async def topic_overlap(self, id1: int, id2: int):
         article_1, article_2 = self.articles[id1], self.articles[id2]
 
@@ -129,20 +432,17 @@ class ChatBot:
         {article_2}
         """
 
-        prompt = ChatPromptTemplate.from_messages(
+        response = await self.structured_invoke(
             [
                 ("system", system_message),
                 ("human", user_message),
-            ]
+            ],
+            TopicOverlap,
+            {"article_1": article_1, "article_2": article_2},
+        )
+        return format_topic_overlap(
+            id1, id2, response.common_topics, response.unique_topics_1, response.unique_topics_2
         )
-        structured_llm = self.llm.with_structured_output(TopicOverlap)
-        chain = prompt | structured_llm
-        response = await chain.ainvoke({"article_1": article_1, "article_2": article_2})
-        return {
-            "Common Topics ": response.common_topics,
-            f"Unique Topics in Article {id1}": response.unique_topics_1,
-            f"Unique Topics in Article {id2}": response.unique_topics_2,
-        }
 
     async def comparative_analysis(self, id1: int, id2: int):
         article_1, article_2 = self.articles[id1], self.articles[id2]
@@ -175,53 +475,276 @@ class ChatBot:
         {article_2}
         """
 
-        prompt = ChatPromptTemplate.from_messages(
+        response = await self.structured_invoke(
             [
                 ("system", system_message),
                 ("human", user_message),
-            ]
+            ],
+            ComparativeAnalyzer,
+            {"article_1": article_1, "article_2": article_2, "id1": id1, "id2": id2},
+        )
+        return format_comparison(id1, id2, response.comparison, response.impact)
+
+    async def pair_analysis(self, id1: int, id2: int):
+        """
+        Runs topic overlap and comparative analysis for a pair in one structured call.
+
+        Returns:
+            tuple: (topic overlap dict, comparative analysis dict) shaped like the
+            outputs of topic_overlap and comparative_analysis.
+        """
+        article_1, article_2 = self.articles[id1], self.articles[id2]
+
+        system_message = """You are an advanced AI specializing in text analysis, topic extraction and comparative analysis. Your task is to compare two news articles on a company.
+
+        ### **Instructions:**
+        - Identify **common topics** present in **both articles**.
+        - Identify **topics unique to each article**.
+        - Use **generalized topics** (e.g., "Electric Vehicles" instead of "Tesla Model X").
+        - Ensure topics are **concise and meaningful**.
+        - Provide a **comparison** of the articles' key themes, sentiment and how they portray the company.
+        - Provide the **impact**: potential implications for investors and the industry.
+        - The length of each comparison and impact should be less than 20 words.
+        - Mention the articles ids in the comparison.
+        ---
+        ### **Example:**
+        #### **Article 1:**
+        "Tesla has launched a new AI-powered self-driving feature that enhances vehicle autonomy and road safety. The update is expected to impact the automotive industry."
+
+        #### **Article 2:**
+        "Regulators are reviewing Tesla’s self-driving technology due to safety concerns. Experts debate whether AI-based vehicle autonomy meets current legal standards."
+
+        #### **Expected Output:**
+        "common_topics": ["Self-Driving Cars", "Artificial Intelligence", "Safety"],
+        "unique_topics_1": ["Automotive Industry"],
+        "unique_topics_2": ["Regulations", "Legal Standards"],
+        "comparison": "Article 1 highlights Tesla's new self-driving feature, while Article 2 discusses regulatory scrutiny.",
+        "impact": "The first article boosts confidence in Tesla's technology, while the second raises regulatory concerns."
+                        """
+
+        user_message = """
+        Here are the news articles on the company.
+        Article {id1}: 
+        {article_1} 
+        Article {id2}: 
+        {article_2}
+        """
+
+        response = await self.structured_invoke(
+            [
+                ("system", system_message),
+                ("human", user_message),
+            ],
+            PairAnalysis,
+            {"article_1": article_1, "article_2": article_2, "id1": id1, "id2": id2},
         )
-        structured_llm = self.llm.with_structured_output(ComparativeAnalyzer)
-        chain = prompt | structured_llm
-        response = await chain.ainvoke(
-            {"article_1": article_1, "article_2": article_2, "id1": id1, "id2": id2}
+        topic_overlap = format_topic_overlap(
+            id1, id2, response.common_topics, response.unique_topics_1, response.unique_topics_2
         )
-        return {
-            f"comparison of {id1}, {id2}": response.comparison,
-            "impact": response.impact,
-        }
+        comparative_analysis = format_comparison(
+            id1, id2, response.comparison, response.impact
+        )
+        return topic_overlap, comparative_analysis
 
-    async def main(self, similar_pairs: list):
-        """Runs all OpenAI API calls in parallel."""
+    async def task_events(self, stage: str, task_name: str, coroutine, **fields):
+        """
+        Awaits one LLM task and wraps its result as stream events. A failure is
+        recorded in self.errors and reported as an 'error' event instead of raised.
 
-        topic_extraction_tasks = [
-            self.topic_extraction(article) for article in self.articles
+        Returns:
+            list of dict: Events for the task.
+        """
+        try:
+            result = await coroutine
+        except Exception as e:
+            print(f"LLM Task Error ({task_name}): {e}")
+            error = {"task": task_name, "error": str(e)}
+            self.errors.append(error)
+            return [{"stage": "error", **error}]
+
+        if stage == "pair_analysis":
+            overlap, comparison = result
+            return [
+                {"stage": "topic_overlap", **fields, "result": overlap},
+                {"stage": "comparative_analysis", **fields, "result": comparison},
+            ]
+        return [{"stage": stage, **fields, "result": result}]
+
+    async def topic_batch_events(self, article_ids: list):
+        topics = await self.batch_topic_extraction(article_ids)
+        return [
+            {"stage": "topic_extraction", "article_id": i, "result": topics[i]}
+            for i in article_ids
         ]
 
-        topic_overlap_tasks = [
-            self.topic_overlap(id1, id2) for id1, id2, _ in similar_pairs
+    def known_events(self, similar_pairs: list, merge_pairs: bool, known: dict):
+        """
+        Stream events for results already known, skipping pairs that a merged
+        pair_analysis call recomputes anyway.
+        """
+        events = []
+        for (stage, item_id), result in known.items():
+            if stage == "topic_extraction":
+                events.append({"stage": stage, "article_id": item_id, "result": result})
+                continue
+            if merge_pairs and not self.pair_known(item_id, known):
+                continue
+            events.append({"stage": stage, "pair_id": item_id, "result": result})
+        return [{**event, "reused": True} for event in events]
+
+    @staticmethod
+    def pair_known(pair_id: int, known: dict):
+        return all(
+            (stage, pair_id) in known for stage in ("topic_overlap", "comparative_analysis")
+        )
+
+    def analysis_tasks(
+        self,
+        similar_pairs: list,
+        batch_topics: bool = True,
+        merge_pairs: bool = False,
+        known: dict = None,
+    ):
+        """
+        Builds one coroutine per LLM task; each resolves to a list of stream events.
+        Results in known, keyed by (stage, article_id or pair_id), are not requested again.
+        """
+        known = known or {}
+        article_ids = [
+            i for i in range(len(self.articles)) if ("topic_extraction", i) not in known
         ]
+        if batch_topics:
+            tasks = [self.topic_batch_events(ids) for ids in self.topic_batches(article_ids)]
+        else:
+            tasks = [
+                self.task_events(
+                    "topic_extraction",
+                    f"topic_extraction {i}",
+                    self.topic_extraction(self.articles[i]),
+                    article_id=i,
+                )
+                for i in article_ids
+            ]
+
+        for pair_id, (id1, id2, _) in enumerate(similar_pairs):
+            if self.pair_known(pair_id, known):
+                continue
+            if merge_pairs:
+                tasks.append(
+                    self.task_events(
+                        "pair_analysis",
+                        f"pair_analysis {id1}, {id2}",
+                        self.pair_analysis(id1, id2),
+                        pair_id=pair_id,
+                    )
+                )
+                continue
+            if ("topic_overlap", pair_id) not in known:
+                tasks.append(
+                    self.task_events(
+                        "topic_overlap",
+                        f"topic_overlap {id1}, {id2}",
+                        self.topic_overlap(id1, id2),
+                        pair_id=pair_id,
+                    )
+                )
+            if ("comparative_analysis", pair_id) not in known:
+                tasks.append(
+                    self.task_events(
+                        "comparative_analysis",
+                        f"comparative_analysis {id1}, {id2}",
+                        self.comparative_analysis(id1, id2),
+                        pair_id=pair_id,
+                    )
+                )
+        return tasks
+
+    async def stream(
+        self,
+        similar_pairs: list,
+        batch_topics: bool = True,
+        merge_pairs: bool = False,
+        known: dict = None,
+    ):
+        """
+        Runs all OpenAI API calls in parallel and yields each result as soon as it finishes.
 
-        comparative_analysis_tasks = [
-            self.comparative_analysis(id1, id2) for id1, id2, _ in similar_pairs
+        Args:
+            known (dict, optional): Results from an earlier run keyed by (stage, article_id)
+                or (stage, pair_id); they are yielded first with 'reused': True.
+
+        Yields:
+            dict: Events with a 'stage' of 'topic_extraction' (article_id, result),
+            'topic_overlap' / 'comparative_analysis' (pair_id, result) or 'error' (task, error).
+            Closing the generator early cancels the calls still running.
+        """
+        self.errors = []
+        known = known or {}
+        for event in self.known_events(similar_pairs, merge_pairs, known):
+            yield event
+        tasks = [
+            asyncio.ensure_future(task)
+            for task in self.analysis_tasks(similar_pairs, batch_topics, merge_pairs, known)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for event in await next_done:
+                    yield event
+        finally:
+            # The consumer stopped early (e.g. the client disconnected): drop the rest
+            for task in tasks:
+                task.cancel()
+
+    async def main(
+        self,
+        similar_pairs: list,
+        batch_topics: bool = True,
+        merge_pairs: bool = False,
+        known: dict = None,
+    ):
+        """
+        Runs all OpenAI API calls in parallel.
+
+        Args:
+            similar_pairs (list of tuples): (index1, index2, similarity_score) tuples.
+            batch_topics (bool, optional): Extract topics for many articles per call. Defaults to True.
+            merge_pairs (bool, optional): Get topic overlap and comparison for a pair in one call
+                instead of two. Defaults to False.
+            known (dict, optional): Results from an earlier run, see stream.
+
+        Returns:
+            dict: Topic, overlap and comparison results plus an 'errors' list. Failed
+            tasks are left out (topics default to an empty list) instead of failing the call.
+        """
+        events = [
+            event
+            async for event in self.stream(similar_pairs, batch_topics, merge_pairs, known)
         ]
+        return self.results_from_events(events)
+
+    def results_from_events(self, events: list):
+        """Assembles stream events into the result dict returned by main."""
+        topics, overlaps, comparisons = {}, {}, {}
+        for event in events:
+            if event["stage"] == "topic_extraction":
+                topics[event["article_id"]] = event["result"]
+            elif event["stage"] == "topic_overlap":
+                overlaps[event["pair_id"]] = event["result"]
+            elif event["stage"] == "comparative_analysis":
+                comparisons[event["pair_id"]] = event["result"]
 
-        (
-            topic_extraction_results,
-            topic_overlap_results,
-            comparative_analysis_results,
-        ) = await asyncio.gather(
-            asyncio.gather(*topic_extraction_tasks),
-            asyncio.gather(*topic_overlap_tasks),
-            asyncio.gather(*comparative_analysis_tasks),
-        )
         return {
-            "topic_extraction_results": topic_extraction_results,
-            "topic_overlap_results": topic_overlap_results,
-            "comparative_analysis_results": comparative_analysis_results,
+            "topic_extraction_results": [
+                topics.get(i, []) for i in range(len(self.articles))
+            ],
+            "topic_overlap_results": [overlaps[i] for i in sorted(overlaps)],
+            "comparative_analysis_results": [
+                comparisons[i] for i in sorted(comparisons)
+            ],
+            "errors": self.errors,
         }
 
-    def final_analysis(self, comparative_analysis_articles):
+    async def final_analysis(self, comparative_analysis_articles):
         comparative_results = "Comparative Analysis: \n"
         for comparisons in comparative_analysis_articles:
             comparison, impact = comparisons.values()
@@ -234,8 +757,9 @@ class ChatBot:
         Comprative Analysis:
         {comparative_results}
         """
-        prompt = ChatPromptTemplate.from_template(template)
-        structured_llm = self.llm.with_structured_output(FinalAnalysis)
-        chain = prompt | structured_llm
-        response = chain.invoke({"comparative_results": comparative_results})
+        response = await self.structured_invoke(
+            [("human", template)],
+            FinalAnalysis,
+            {"comparative_results": comparative_results},
+        )
         return response.english, response.hindi
@@ -0,0 +1,44 @@
+import asyncio
+
+
+class PerLoop:
+    """
+    Holds one lazily built object for the running event loop.
+
+    asyncio primitives and clients are bound to the loop they are first used in,
+    so module-level singletons keep theirs here. The object is rebuilt when a
+    different loop asks for it, e.g. the next asyncio.run or a restarted server
+    in the same process.
+
+    Args:
+        factory (callable): Builds the object for the running loop.
+        close (callable, optional): Called with an object when a new loop replaces
+            it. A coroutine it returns runs as a task on the new loop.
+    """
+
+    def __init__(self, factory, close=None):
+        self.factory = factory
+        self.close = close
+        self._value = None
+        self._loop = None
+        self._closing = set()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            previous = self.reset()
+            self._value = self.factory()
+            self._loop = loop
+            if previous is not None and self.close is not None:
+                closing = self.close(previous)
+                if asyncio.iscoroutine(closing):
+                    # Referenced until done so the task is not garbage collected
+                    task = loop.create_task(closing)
+                    self._closing.add(task)
+                    task.add_done_callback(self._closing.discard)
+        return self._value
+
+    def reset(self):
+        """Forgets the current object and returns it, or None if there is none."""
+        value, self._value, self._loop = self._value, None, None
+        return value
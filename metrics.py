@@ -0,0 +1,214 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; LLM calls and scraping can take tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels: dict):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()):
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with cumulative buckets, one series per label set."""
+
+    def __init__(self, name: str, help: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.series.setdefault(
+                key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(key, (("le", _format_value(float(bound))),))
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(key, (("le", "+Inf"),))
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']!r}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+stage_seconds = Histogram("news_stage_seconds", "Time spent in each pipeline stage.")
+stages_in_flight = Gauge("news_stages_in_flight", "Pipeline stages currently running.")
+llm_tokens = Counter("news_llm_tokens_total", "Tokens reported by the LLM per call type.")
+REGISTRY = [stage_seconds, stages_in_flight, llm_tokens]
+
+
+class RequestTimings:
+    """Spans recorded while handling one request, relative to its start."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+
+    def add(self, stage: str, start: float, seconds: float, labels: dict):
+        self.spans.append(
+            {
+                "stage": stage,
+                **labels,
+                "start_ms": round((start - self.start) * 1000, 1),
+                "ms": round(seconds * 1000, 1),
+            }
+        )
+
+    def breakdown(self):
+        """
+        Returns:
+            dict: 'total_ms' since the request started and the 'spans' in start order.
+        """
+        return {
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 1),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+        }
+
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def collect_timings(timings: RequestTimings = None):
+    """
+    Records every span of the enclosed code, including tasks and threads started
+    from it, into timings (a new RequestTimings by default).
+    """
+    timings = timings or RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def observe(stage: str, seconds: float, start: float = None, **labels):
+    """Records a stage duration measured elsewhere (e.g. in a worker process)."""
+    stage_seconds.observe(seconds, stage=stage, **labels)
+    timings = _request_timings.get()
+    if timings is not None:
+        if start is None:
+            start = time.perf_counter() - seconds
+        timings.add(stage, start, seconds, labels)
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """Times the enclosed block into news_stage_seconds and the current request's timings."""
+    stages_in_flight.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages_in_flight.dec(stage=stage)
+        observe(stage, time.perf_counter() - start, start, **labels)
+
+
+def record_llm_usage(task: str, usage: dict):
+    """Counts the input/output tokens of one LLM call from its usage metadata."""
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            llm_tokens.inc(usage[kind], task=task, kind=kind.split("_")[0])
+
+
+def _stat_name(*parts):
+    return "_".join(part.replace("-", "_") for part in parts)
+
+
+def render_metrics(stats: dict = None):
+    """
+    Renders the registry in the Prometheus text format.
+
+    Args:
+        stats (dict, optional): Component stats (e.g. the /cache-stats output). Numeric
+            values become news_<component>_<name> gauges; nested dicts of numbers are
+            labelled by their keys.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for component, values in (stats or {}).items():
+        if not isinstance(values, dict):
+            continue
+        for name, value in values.items():
+            metric_name = _stat_name("news", component, name)
+            if isinstance(value, dict):
+                samples = [
+                    (_format_labels(_label_key({"key": k})), v)
+                    for k, v in value.items()
+                    if isinstance(v, (int, float)) and not isinstance(v, bool)
+                ]
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                samples = [("", value)]
+            else:
+                continue
+            if samples:
+                lines.append(f"# TYPE {metric_name} gauge")
+                lines.extend(f"{metric_name}{labels} {_format_value(v)}" for labels, v in samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import random
+import time
+
+import openai
+
+from loop_utils import PerLoop
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at capacity per minute.
+    Waiters are served in arrival order.
+
+    The lock is created per event loop so the bucket can be built at import time
+    and used from whichever loop runs it.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = PerLoop(asyncio.Lock)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        async with self._lock.get():
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+def is_rate_limit_error(error: Exception):
+    return isinstance(error, openai.RateLimitError) or (
+        getattr(error, "status_code", None) == 429
+    )
+
+
+def is_retryable_error(error: Exception):
+    return is_rate_limit_error(error) or isinstance(
+        error, (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+    )
+
+
+def retry_after_seconds(error: Exception):
+    """Reads a Retry-After header off an OpenAI error, if there is one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGovernor:
+    """
+    Shared limiter for LLM calls: requests-per-minute and tokens-per-minute
+    buckets, a cap on in-flight calls, and jittered exponential backoff on
+    rate-limit and transient errors.
+
+    Like the buckets' locks, the concurrency semaphore is created per event loop,
+    so the module-level llm_governor works in any loop.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        max_concurrency: int = 16,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self._semaphore = PerLoop(lambda: asyncio.Semaphore(self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def backoff(self, attempt: int, error: Exception):
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return random.uniform(delay / 2, delay)
+
+    async def run(self, call, estimated_tokens: int = 1_000):
+        """
+        Runs call() within the rate limits, retrying rate-limit and transient errors.
+
+        Args:
+            call (callable): Returns a new awaitable for each attempt.
+            estimated_tokens (int, optional): Prompt plus completion tokens charged to the TPM bucket.
+
+        Returns:
+            The result of call().
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated_tokens)
+            async with self._semaphore.get():
+                self.in_flight += 1
+                self.calls += 1
+                try:
+                    return await call()
+                except Exception as e:
+                    if is_rate_limit_error(e):
+                        self.rate_limited += 1
+                    if not is_retryable_error(e) or attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    delay = self.backoff(attempt, e)
+                finally:
+                    self.in_flight -= 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+        }
+
+
+llm_governor = LLMGovernor(
+    requests_per_minute=float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500)),
+    tokens_per_minute=float(os.environ.get("LLM_TOKENS_PER_MINUTE", 200_000)),
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", 16)),
+)
@@ -0,0 +1,61 @@
+import os
+import re
+import uuid
+
+from cache_utils import ResultCache, make_backend
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def is_job_id(job_id: str):
+    """True for ids shaped like the ones create hands out (uuid4().hex)."""
+    return isinstance(job_id, str) and JOB_ID_PATTERN.fullmatch(job_id) is not None
+
+
+class SessionStore:
+    """
+    Per-job artifact store (articles, sentiments, summaries, audio) replacing
+    app.state globals. Each fetch creates a job id; later calls read and extend
+    that job's artifacts. With the sqlite or disk backend every uvicorn worker
+    on the host sees the same jobs.
+    """
+
+    def __init__(self, cache: ResultCache):
+        self.cache = cache
+
+    def create(self, **artifacts):
+        job_id = uuid.uuid4().hex
+        self.cache.set(job_id, artifacts)
+        return job_id
+
+    def get(self, job_id: str):
+        """Returns the job's artifacts, or None if the job is unknown, expired or malformed."""
+        if not is_job_id(job_id):
+            return None
+        return self.cache.get(job_id)
+
+    def update(self, job_id: str, **artifacts):
+        """
+        Merges artifacts into a job, creating it if needed. Resets the job's TTL.
+
+        Raises:
+            ValueError: If job_id is not an id create could have issued.
+        """
+        if not is_job_id(job_id):
+            raise ValueError(f"Invalid job id: {job_id!r}")
+        session = self.get(job_id) or {}
+        session.update(artifacts)
+        self.cache.set(job_id, session)
+        return session
+
+
+session_store = SessionStore(
+    ResultCache(
+        make_backend(
+            os.environ.get("SESSION_STORE_BACKEND", "memory"),
+            os.environ.get("SESSION_STORE_DIR", ".cache/sessions"),
+            max_entries=int(os.environ.get("SESSION_STORE_SIZE", 10_000)),
+        ),
+        ttl=float(os.environ.get("SESSION_TTL", 3600)),
+    )
+)
@@ -0,0 +1,115 @@
+import time
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+class NewsSource:
+    """
+    Declares where to search a news site and how to pull articles out of the results page.
+
+    Each rule is a (tag, attrs) pair passed to BeautifulSoup's find/find_all.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url_template: str,
+        item_rule: tuple,
+        title_rule: tuple,
+        summary_rule: tuple,
+        timeout: float = 10.0,
+    ):
+        self.name = name
+        self.url_template = url_template
+        self.item_rule = item_rule
+        self.title_rule = title_rule
+        self.summary_rule = summary_rule
+        self.timeout = timeout
+
+    def search_url(self, query: str):
+        return self.url_template.format(company_name=query)
+
+    def parse(self, page: str, parser: str = None):
+        """
+        Parses article titles and summaries from a search results page.
+
+        Args:
+            page (str): The raw html of the search page.
+            parser (str, optional): BeautifulSoup parser backend. Defaults to lxml when installed.
+
+        Returns:
+            list: A list of dictionaries containing article titles and summaries.
+        """
+        articles_list = []
+        if not page:
+            return articles_list
+        soup = BeautifulSoup(page, parser or HTML_PARSER)
+
+        for article in soup.find_all(*self.item_rule):
+            try:
+                title = article.find(*self.title_rule).text.strip()
+                summary = article.find(*self.summary_rule).text.strip()
+
+                if not title or not summary:
+                    continue
+
+                articles_list.append({"title": title, "summary": summary})
+            except AttributeError as e:
+                print(f"{self.name} Extraction Error: {e}")
+                continue
+        return articles_list
+
+
+def parse_source_page(source: NewsSource, page: str):
+    """
+    Parses a page for a source and times it. Module level so it can run in a process pool.
+
+    Returns:
+        tuple: (articles, parse time in milliseconds)
+    """
+    start = time.perf_counter()
+    articles = source.parse(page)
+    return articles, (time.perf_counter() - start) * 1000
+
+
+SOURCE_REGISTRY = {}
+
+
+def register_source(source: NewsSource):
+    SOURCE_REGISTRY[source.name] = source
+    return source
+
+
+def get_sources(names: list = None):
+    if names is None:
+        return list(SOURCE_REGISTRY.values())
+    return [SOURCE_REGISTRY[name] for name in names]
+
+
+register_source(
+    NewsSource(
+        name="nytimes",
+        url_template="https://www.nytimes.com/search?query={company_name}",
+        item_rule=("li", {"data-testid": "search-bodega-result"}),
+        title_rule=("h4", {}),
+        summary_rule=("p", {"class": "css-e5tzus"}),
+        timeout=10.0,
+    )
+)
+
+register_source(
+    NewsSource(
+        name="bbc",
+        url_template="https://www.bbc.com/search?q={company_name}",
+        item_rule=("div", {"data-testid": "newport-article"}),
+        title_rule=("h2", {"data-testid": "card-headline"}),
+        summary_rule=("div", {"class": "sc-4ea10043-3 kMizuB"}),
+        timeout=8.0,
+    )
+)
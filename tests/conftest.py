@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# Keep the module-level caches and stores of the app out of the working tree
+DATA_DIR = tempfile.mkdtemp(prefix="news-summarizer-tests-")
+os.environ.update(
+    {
+        "LLM_CACHE_DIR": "",
+        "EMBEDDING_CACHE_DIR": "",
+        "RESULT_CACHE_DIR": os.path.join(DATA_DIR, "results"),
+        "AUDIO_CACHE_DIR": os.path.join(DATA_DIR, "audio"),
+        "SESSION_STORE_DIR": os.path.join(DATA_DIR, "sessions"),
+        "HISTORY_INDEX_DIR": os.path.join(DATA_DIR, "history"),
+        "ARTICLE_STORE_PATH": os.path.join(DATA_DIR, "articles.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(DATA_DIR, "jobs.sqlite3"),
+    }
+)
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+
+from ann_index import IVFIndex
+
+
+def random_vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def add_rows(index, start, n):
+    vectors = random_vectors(n, index.dim, seed=start)
+    keys = [f"key {i}" for i in range(start, start + n)]
+    index.add(vectors, [{"text": key} for key in keys], keys=keys)
+    return vectors
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / "history")
+    index = IVFIndex(8, min_train=32)
+    vectors = add_rows(index, 0, 50)
+    index.save(path)
+
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == 50
+    assert loaded.trained
+    assert loaded.keys == index.keys
+    np.testing.assert_array_equal(loaded.assignments, index.assignments)
+    assert loaded.search(vectors[:1], k=1, exact=True)[0][0][2] == {"text": "key 0"}
+
+
+def test_save_appends_only_new_rows(tmp_path):
+    path = str(tmp_path / "history")
+    index = IVFIndex(8, min_train=32, retrain_factor=100)
+    add_rows(index, 0, 40)
+    index.save(path)
+    centroids_mtime = os.stat(path + ".npy").st_mtime_ns
+    with open(path + ".f32", "rb") as f:
+        saved = f.read()
+
+    add_rows(index, 40, 5)
+    index.save(path)
+    with open(path + ".f32", "rb") as f:
+        assert f.read(len(saved)) == saved
+    assert os.path.getsize(path + ".f32") == 45 * 8 * 4
+    # No retrain, so the centroids were not rewritten
+    assert os.stat(path + ".npy").st_mtime_ns == centroids_mtime
+
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == 45
+    np.testing.assert_array_equal(loaded.assignments, index.assignments)
+    # Keys survive the reload, so the same rows are not added twice
+    add_rows(loaded, 40, 5)
+    assert len(loaded) == 45
+
+
+def test_interrupted_save_is_ignored(tmp_path):
+    path = str(tmp_path / "history")
+    index = IVFIndex(8)
+    add_rows(index, 0, 10)
+    index.save(path)
+    # A save that died after appending rows but before replacing path.json
+    with open(path + ".f32", "ab") as f:
+        f.write(b"\0" * 64)
+
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == 10
+    add_rows(loaded, 10, 2)
+    loaded.save(path)
+    assert os.path.getsize(path + ".f32") == 12 * 8 * 4
+    assert len(IVFIndex.load(path)) == 12
+
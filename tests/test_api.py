@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from sessions import session_store
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("job_id", ["../../escape", "A" * 32, "0" * 31, "0" * 32])
+def test_compare_news_rejects_job_ids_it_did_not_issue(client, job_id):
+    body = {"api_key": "test-key", "company_name": "Tesla", "job_id": job_id}
+    for path in ("/compare-news", "/compare-news/stream", "/jobs/compare-news"):
+        response = client.post(path, json=body)
+        assert response.status_code == 404, path
+
+
+def test_compare_news_accepts_issued_job_ids(client, monkeypatch):
+    async def reject_key(api_key):
+        return False
+
+    # Past the job id check, the request fails on the (fake) API key instead
+    monkeypatch.setattr(api, "check_api_key", reject_key)
+    job_id = session_store.create(company_name="Tesla")
+    body = {"api_key": "test-key", "company_name": "Tesla", "job_id": job_id}
+    assert client.post("/compare-news", json=body).status_code == 500
+
+
+def test_job_dedup_is_scoped_to_the_api_key(client, monkeypatch):
+    async def hold(request_info):
+        await asyncio.sleep(60)
+
+    # Keep the jobs active so the second submission has something to match
+    monkeypatch.setattr(api, "validate_compare_request", hold)
+    body = {"api_key": "key-a", "company_name": "Dedup Corp"}
+    first = client.post("/jobs/compare-news", json=body).json()
+    again = client.post("/jobs/compare-news", json=body).json()
+    other_key = client.post("/jobs/compare-news", json={**body, "api_key": "key-b"}).json()
+
+    assert not first["deduplicated"]
+    assert again == {"job_id": first["job_id"], "deduplicated": True}
+    assert not other_key["deduplicated"]
+    assert other_key["job_id"] != first["job_id"]
+    for job_id in (first["job_id"], other_key["job_id"]):
+        assert client.delete(f"/jobs/{job_id}").json()["status"] == "cancelled"
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.texts = []
+
+    async def submit_many(self, texts):
+        import torch
+
+        self.texts += texts
+        return [torch.full((4,), float(len(text))) for text in texts]
+
+
+class FixedSentimentHead(api.EmbeddingSentimentHead):
+    def __init__(self):
+        pass
+
+    def predict_embeddings(self, embeddings):
+        return [{"label": "positive", "score": 0.9} for _ in embeddings]
+
+
+def test_unified_mode_encodes_each_article_once(monkeypatch):
+    async def extract(company_name):
+        return [{"title": f"{company_name} {i}", "summary": f"news {i}"} for i in range(4)]
+
+    encoder = CountingEncoder()
+    monkeypatch.setattr(api, "embedding_batcher", encoder)
+    monkeypatch.setattr(api, "sentiment_analyzer", FixedSentimentHead())
+    monkeypatch.setattr(api, "async_bs4_extractor", extract)
+
+    async def articles_and_embeddings():
+        request_info = api.CompareNewsRequest(api_key="test-key", company_name="Once Corp")
+        news_articles, _, _, known = await api.load_articles(request_info)
+        articles_text = [api.article_text(article) for article in news_articles]
+        return articles_text, await api.encode_articles(articles_text, known)
+
+    # The embedding cache is disabled in the tests, so only the hand-off avoids a second pass
+    articles_text, embeddings = asyncio.run(articles_and_embeddings())
+    assert encoder.texts == articles_text
+    assert embeddings.shape == (4, 4)
+
+
+def test_batch_requests_pass_the_job_id_check(client, monkeypatch):
+    async def reject_key(api_key):
+        return False
+
+    monkeypatch.setattr(api, "check_api_key", reject_key)
+    body = {"api_key": "test-key", "company_names": ["Tesla"]}
+    response = client.post("/compare-news/batch", json=body)
+    assert response.status_code == 500
+    assert "API key" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("company_name", ["", "   "])
+def test_blank_company_names_are_rejected(client, company_name):
+    body = {"api_key": "test-key", "company_name": company_name}
+    for path in ("/compare-news", "/compare-news/stream", "/jobs/compare-news"):
+        response = client.post(path, json=body)
+        assert response.status_code == 400, path
+
+
+def test_batch_llm_semaphore_follows_the_event_loop(monkeypatch):
+    monkeypatch.setattr(api, "max_batch_llm_companies", 1)
+
+    async def contend():
+        async def analyse():
+            async with api.batch_llm_semaphore():
+                await asyncio.sleep(0.01)
+
+        # Two companies for one slot, so the second waits on the semaphore
+        await asyncio.gather(analyse(), analyse())
+        return api.batch_llm_semaphore()
+
+    assert asyncio.run(contend()) is not asyncio.run(contend())
+
+
+def test_lifespan_starts_and_stops_the_app(monkeypatch):
+    calls = []
+
+    class FakeJobQueue:
+        def start(self):
+            calls.append("start_jobs")
+
+        async def stop(self):
+            calls.append("stop_jobs")
+
+    async def close_fetcher():
+        calls.append("close_fetcher")
+
+    class FakeCache:
+        def flush(self):
+            calls.append("flush_embeddings")
+
+    monkeypatch.setattr(api, "model_loading", "startup")
+    monkeypatch.setattr(api, "load_models", lambda: calls.append("load_models"))
+    monkeypatch.setattr(api, "job_queue", FakeJobQueue())
+    monkeypatch.setattr(api.fetcher, "aclose", close_fetcher)
+    monkeypatch.setattr(api.semantic_grouping, "cache", FakeCache())
+
+    async def run():
+        async with api.lifespan(api.app):
+            calls.append("serving")
+
+    asyncio.run(run())
+    # Jobs stop before the fetcher and caches they use are closed
+    assert calls == [
+        "load_models",
+        "start_jobs",
+        "serving",
+        "stop_jobs",
+        "close_fetcher",
+        "flush_embeddings",
+    ]
@@ -0,0 +1,136 @@
+import pytest
+
+from article_store import ArticleStore, renumber_comparison
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(str(tmp_path / "articles.sqlite3"))
+
+
+def article(title, summary):
+    return {"title": title, "summary": summary}
+
+
+LAUNCH = article(
+    "Tesla launches a cheaper Model Y in China",
+    "Tesla on Monday launched a cheaper version of its Model Y in China as competition grows.",
+)
+RECALL = article(
+    "Tesla recalls vehicles over seat belt warning",
+    "Tesla is recalling thousands of vehicles because a seat belt warning may not sound.",
+)
+EARNINGS = article(
+    "Tesla earnings miss as margins shrink",
+    "Tesla reported quarterly earnings below forecasts as price cuts squeezed margins.",
+)
+
+
+def test_ingest_marks_stories_new_only_the_first_time(store):
+    first = store.ingest("Tesla", [LAUNCH, RECALL])
+    assert [entry["new"] for entry in first] == [True, True]
+    assert [entry["title"] for entry in first] == [LAUNCH["title"], RECALL["title"]]
+
+    again = store.ingest(" tesla ", [RECALL, EARNINGS])
+    assert [entry["new"] for entry in again] == [False, True]
+    assert again[0]["fingerprint"] == first[1]["fingerprint"]
+
+
+def test_ingest_drops_exact_and_near_duplicates(store):
+    edited = article(
+        "Tesla launches cheaper Model Y in China",
+        "Tesla on Monday launched a cheaper version of its Model Y in China, as competition grows.",
+    )
+    entries = store.ingest("Tesla", [LAUNCH, LAUNCH, edited, RECALL])
+    assert [entry["title"] for entry in entries] == [LAUNCH["title"], RECALL["title"]]
+
+    # A near duplicate seen in a later run maps onto the stored story
+    (entry,) = store.ingest("Tesla", [edited])
+    assert entry["new"] is False
+    assert entry["title"] == LAUNCH["title"]
+
+
+def test_ingest_records_only_articles_within_the_limit(store):
+    entries = store.ingest("Tesla", [LAUNCH, LAUNCH, RECALL, EARNINGS], limit=2)
+    assert [entry["title"] for entry in entries] == [LAUNCH["title"], RECALL["title"]]
+    # Never returned, so still new on the next run
+    assert store.ingest("Tesla", [EARNINGS])[0]["new"] is True
+
+
+def test_companies_are_stored_separately(store):
+    store.ingest("Tesla", [LAUNCH])
+    assert store.ingest("Rivian", [LAUNCH])[0]["new"] is True
+
+
+def test_set_sentiments_are_returned_by_later_ingests(store):
+    entries = store.ingest("Tesla", [LAUNCH, RECALL])
+    assert all(entry["sentiment"] is None for entry in entries)
+    entries[0].update(sentiment="positive", sentiment_score=0.9)
+    store.set_sentiments("Tesla", entries[:1])
+
+    launch, recall = store.ingest("Tesla", [LAUNCH, RECALL])
+    assert (launch["sentiment"], launch["sentiment_score"]) == ("positive", 0.9)
+    assert recall["sentiment"] is None
+
+
+def test_stored_llm_results_are_renumbered(store):
+    fingerprints = [entry["fingerprint"] for entry in store.ingest("Tesla", [LAUNCH, RECALL])]
+    events = [
+        {"stage": "topic_extraction", "article_id": 1, "result": ["Recalls"]},
+        {
+            "stage": "comparative_analysis",
+            "pair_id": 0,
+            "result": {
+                "comparison of 0, 1": "Article 0 is upbeat, Article 1 is not.",
+                "impact": "Mixed.",
+            },
+        },
+    ]
+    store.store_llm_results("Tesla", "model", fingerprints, [(0, 1, 0.9)], events)
+
+    # The next run puts a new story first
+    shifted = ["fp-new", *fingerprints]
+    known = store.stored_llm_results("Tesla", "model", shifted, [(1, 2, 0.9)])
+    assert known == {
+        ("topic_extraction", 2): ["Recalls"],
+        ("comparative_analysis", 0): {
+            "comparison of 1, 2": "Article 1 is upbeat, Article 2 is not.",
+            "impact": "Mixed.",
+        },
+    }
+    assert store.stored_llm_results("Tesla", "other-model", shifted, [(1, 2, 0.9)]) == {}
+
+
+def stored_comparison(comparison, article_ids=(0, 1), fingerprints=("fp-a", "fp-b")):
+    return {
+        "comparison": comparison,
+        "impact": f"Article {article_ids[0]} lifts the outlook.",
+        "article_ids": list(article_ids),
+        "fingerprints": list(fingerprints),
+    }
+
+
+def test_reused_comparisons_are_renumbered_to_current_ids():
+    fingerprints = ["fp-new", "fp-a", "fp-other", "fp-b"]
+    stored = stored_comparison("Article 0 covers sales, while article #1 covers a probe.")
+    assert renumber_comparison(stored, fingerprints, 1, 3) == {
+        "comparison of 1, 3": "Article 1 covers sales, while article #3 covers a probe.",
+        "impact": "Article 1 lifts the outlook.",
+    }
+
+
+@pytest.mark.parametrize(
+    "stored",
+    [
+        # Stored before the ids were recorded
+        {"comparison": "Article 0 covers sales.", "impact": "Positive."},
+        # "Articles 0 and 1" leaves an id that cannot be remapped safely
+        stored_comparison("Articles 0 and 1 cover sales."),
+        # Mentions an article outside the pair
+        stored_comparison("Article 0 echoes Article 5."),
+        # The pair is in the other order, so "first" and "second" would flip
+        stored_comparison("Article 0 covers sales.", fingerprints=("fp-b", "fp-a")),
+    ],
+)
+def test_comparisons_that_cannot_be_renumbered_are_regenerated(stored):
+    assert renumber_comparison(stored, ["fp-new", "fp-a", "fp-other", "fp-b"], 1, 3) is None
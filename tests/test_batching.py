@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+from batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        if self.fail_on in items:
+            raise ValueError(f"bad item {self.fail_on}")
+        return [item * 10 for item in items]
+
+
+def test_concurrent_submits_run_as_one_batch():
+    process = Recorder()
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert process.batches == [[0, 1, 2, 3, 4]]
+    assert batcher.stats() == {"batches_run": 1, "items_processed": 5, "mean_batch_size": 5.0}
+
+
+def test_batches_are_capped_at_max_batch_size():
+    process = Recorder()
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+
+    results = asyncio.run(batcher.submit_many(list(range(10))))
+
+    assert results == [i * 10 for i in range(10)]
+    assert [len(batch) for batch in process.batches] == [4, 4, 2]
+    assert [item for batch in process.batches for item in batch] == list(range(10))
+
+
+def test_each_caller_gets_its_own_result():
+    batcher = MicroBatcher(Recorder(), max_batch_size=64, max_wait_ms=50)
+
+    async def submit(item, delay):
+        await asyncio.sleep(delay)
+        return item, await batcher.submit(item)
+
+    async def run():
+        return await asyncio.gather(*[submit(i, (7 - i) / 1000) for i in range(8)])
+
+    assert asyncio.run(run()) == [(i, i * 10) for i in range(8)]
+
+
+def test_a_failing_batch_raises_in_every_waiter_and_the_worker_continues():
+    process = Recorder(fail_on=2)
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        failed = await asyncio.gather(
+            *[batcher.submit(i) for i in range(4)], return_exceptions=True
+        )
+        return failed, await batcher.submit(5)
+
+    failed, after = asyncio.run(run())
+
+    assert len(failed) == 4
+    assert all(isinstance(error, ValueError) for error in failed)
+    assert after == 50
+    assert batcher.stats()["batches_run"] == 1
+
+
+def test_batcher_restarts_on_a_new_event_loop():
+    batcher = MicroBatcher(Recorder(), max_wait_ms=1)
+    assert asyncio.run(batcher.submit(1)) == 10
+    assert asyncio.run(batcher.submit(2)) == 20
+
+
+def test_single_item_waits_at_most_max_wait():
+    batcher = MicroBatcher(Recorder(), max_batch_size=64, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.wait_for(batcher.submit(3), timeout=1)
+
+    assert asyncio.run(run()) == 30
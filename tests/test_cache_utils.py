@@ -0,0 +1,281 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from cache_utils import (
+    DiskBackend,
+    EmbeddingCache,
+    MemoryBackend,
+    ResultCache,
+    SQLiteBackend,
+)
+from sessions import SessionStore, is_job_id
+
+
+def vectors(n, dim=4, start=0):
+    return np.arange(start, start + n * dim, dtype=np.float32).reshape(n, dim)
+
+
+def texts(n, start=0):
+    return [f"text {i}" for i in range(start, start + n)]
+
+
+def test_put_and_get_round_trip(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", 4, capacity=8)
+    cache.put_many(texts(3), vectors(3))
+    found, missing = cache.get_many(texts(4))
+    assert missing == [3]
+    np.testing.assert_array_equal(np.stack([found[i] for i in range(3)]), vectors(3))
+
+
+def test_reopened_cache_replays_the_log(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", 4, capacity=8, compact_every=100)
+    cache.put_many(texts(3), vectors(3))
+    assert os.path.getsize(tmp_path / "index.log") > 0
+
+    reopened = EmbeddingCache(str(tmp_path), "model", 4, capacity=8)
+    found, missing = reopened.get_many(texts(3))
+    assert missing == []
+    np.testing.assert_array_equal(found[2], vectors(3)[2])
+
+
+def test_puts_append_instead_of_rewriting_the_index(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", 4, capacity=16, compact_every=4)
+    index_stat = os.stat(tmp_path / "index.json").st_mtime_ns
+    cache.put_many(texts(1), vectors(1))
+    cache.put_many(texts(1, start=1), vectors(1, start=4))
+    assert os.stat(tmp_path / "index.json").st_mtime_ns == index_stat
+    cache.put_many(texts(2, start=2), vectors(2, start=8))
+    # The fourth record triggers a compaction
+    assert os.path.getsize(tmp_path / "index.log") == 0
+    assert len(EmbeddingCache(str(tmp_path), "model", 4, capacity=16).index) == 4
+
+
+def test_hot_hits_refresh_last_use(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", 4, capacity=2)
+    cache.put_many(texts(2), vectors(2))
+    # Served from the hot tier, which must still count as a use for eviction
+    cache.index[cache.key("text 0")]["last_used"] -= 100
+    cache.index[cache.key("text 1")]["last_used"] -= 50
+    cache.get_many(["text 0"])
+    cache.put_many(texts(1, start=2), vectors(1, start=8))
+    assert cache.key("text 0") in cache.index
+    assert cache.key("text 1") not in cache.index
+    assert cache.evictions == 1
+
+
+def test_missing_matrix_resets_the_index(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", 4, capacity=8)
+    cache.put_many(texts(3), vectors(3))
+    cache.flush()
+    del cache
+    os.remove(tmp_path / "embeddings.f32")
+
+    reopened = EmbeddingCache(str(tmp_path), "model", 4, capacity=8)
+    assert reopened.index == {}
+    assert reopened.get_many(texts(3)) == ({}, [0, 1, 2])
+
+
+def test_rows_reused_by_another_instance_are_misses(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "model", 4, capacity=2, hot_size=0)
+    second = EmbeddingCache(str(tmp_path), "model", 4, capacity=2, hot_size=0)
+    first.put_many(["x", "y"], vectors(2))
+    # Full, so "x" (least recently used) is evicted and its row goes to "z"
+    second.put_many(["z"], vectors(1, start=8))
+
+    found, missing = first.get_many(["x", "y", "z"])
+    assert missing == [0]
+    np.testing.assert_array_equal(found[1], vectors(2)[1])
+    np.testing.assert_array_equal(found[2], vectors(1, start=8)[0])
+
+
+def test_row_keys_catch_a_stale_index(tmp_path, monkeypatch):
+    first = EmbeddingCache(str(tmp_path), "model", 4, capacity=2, hot_size=0)
+    second = EmbeddingCache(str(tmp_path), "model", 4, capacity=2, hot_size=0)
+    first.put_many(["x", "y"], vectors(2))
+    second.put_many(["z"], vectors(1, start=8))
+
+    # Without catching up, "x" still points at the row that now holds "z"
+    monkeypatch.setattr(first, "_catch_up", lambda: None)
+    assert first.get_many(["x"]) == ({}, [0])
+
+
+def _fill(cache_dir, start):
+    cache = EmbeddingCache(cache_dir, "model", 4, capacity=64, compact_every=7)
+    for i in range(start, start + 20):
+        cache.put_many([f"text {i}"], vectors(1, start=i * 4))
+
+
+def test_processes_do_not_share_rows(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_fill, args=(str(tmp_path), start)) for start in (0, 20)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    cache = EmbeddingCache(str(tmp_path), "model", 4, capacity=64)
+    found, missing = cache.get_many(texts(40))
+    assert missing == []
+    for i in range(40):
+        np.testing.assert_array_equal(found[i], vectors(1, start=i * 4)[0])
+
+
+def test_disk_backend_keys_stay_inside_the_cache_dir(tmp_path):
+    cache_dir = tmp_path / "cache"
+    backend = DiskBackend(str(cache_dir))
+    backend.set("../../outside", {"value": 1})
+    assert backend.get("../../outside") == {"value": 1}
+    assert [path.parent for path in tmp_path.rglob("*.json")] == [cache_dir]
+
+
+def test_disk_backend_only_lists_the_directory_when_over_the_limit(tmp_path, monkeypatch):
+    backend = DiskBackend(str(tmp_path), max_entries=10, sweep_to=0.5)
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: listings.append(path) or listdir(path))
+
+    for i in range(10):
+        backend.set(f"key {i}", {"value": i})
+    assert listings == []
+    backend.set("key 10", {"value": 10})
+    assert len(listings) == 1
+    assert len(listdir(tmp_path)) == backend.count == 5
+    # Overwriting an existing key does not grow the count
+    backend.set("key 10", {"value": 10})
+    assert backend.count == 5
+    assert backend.get("key 10") == {"value": 10}
+
+
+def test_disk_results_are_read_and_written_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingBackend(DiskBackend):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+        def set(self, key, record):
+            threads.append(threading.current_thread())
+            super().set(key, record)
+
+    cache = ResultCache(RecordingBackend(str(tmp_path)), ttl=60)
+
+    async def compute():
+        return {"answer": 42}
+
+    assert asyncio.run(cache.get_or_compute("key", compute)) == {"answer": 42}
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_disk_backend_treats_a_file_evicted_after_reading_as_a_miss(tmp_path, monkeypatch):
+    backend = DiskBackend(str(tmp_path))
+    backend.set("key", {"value": 1})
+
+    def evicted(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert backend.get("key") is None
+
+
+def slow_compute(calls, value="value", delay=0.05):
+    async def compute():
+        calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+
+    return compute
+
+
+def test_concurrent_callers_share_one_computation():
+    cache = ResultCache(MemoryBackend(), ttl=60)
+    calls = []
+
+    async def run():
+        return await asyncio.gather(
+            *[cache.get_or_compute("key", slow_compute(calls)) for _ in range(3)]
+        )
+
+    assert asyncio.run(run()) == ["value"] * 3
+    assert calls == ["value"]
+    assert (cache.misses, cache.coalesced) == (1, 2)
+    assert cache.get("key") == "value"
+    assert cache.inflight == {}
+
+
+def test_result_is_cached_when_the_first_caller_is_cancelled():
+    cache = ResultCache(MemoryBackend(), ttl=60)
+    calls = []
+
+    async def run():
+        first = asyncio.ensure_future(cache.get_or_compute("key", slow_compute(calls)))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_compute("key", slow_compute(calls)))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await waiter
+
+    assert asyncio.run(run()) == "value"
+    assert calls == ["value"]
+    assert cache.get("key") == "value"
+
+
+def test_should_cache_false_results_are_returned_but_not_stored():
+    cache = ResultCache(MemoryBackend(), ttl=60)
+    calls = []
+
+    async def run():
+        return await cache.get_or_compute(
+            "key", slow_compute(calls, delay=0), should_cache=lambda value: False
+        )
+
+    assert asyncio.run(run()) == "value"
+    assert asyncio.run(run()) == "value"
+    assert len(calls) == 2
+    assert cache.get("key") is None
+
+
+def test_expired_entries_are_misses_and_removed():
+    backend = MemoryBackend()
+    cache = ResultCache(backend, ttl=60)
+    cache.set("fresh", 1)
+    cache.set("stale", 2, ttl=-1)
+    assert cache.get("fresh") == 1
+    assert cache.get("stale") is None
+    assert backend.get("stale") is None
+
+
+def test_sqlite_backend(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    cache = ResultCache(SQLiteBackend(path, max_entries=2), ttl=60)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    # Shared through the file, like another worker process would see it
+    assert ResultCache(SQLiteBackend(path)).get("a") == {"n": 1}
+
+    cache.set("c", {"n": 3})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"n": 3}
+
+    cache.set("old", {"n": 4}, ttl=-1)
+    cache.set("d", {"n": 5})
+    assert cache.backend.get("old") is None
+    cache.backend.delete("d")
+    assert cache.get("d") is None
+
+
+def test_session_store_rejects_malformed_job_ids():
+    store = SessionStore(ResultCache(MemoryBackend()))
+    job_id = store.create(company_name="Tesla")
+    assert is_job_id(job_id)
+    assert store.update(job_id, comparison={})["company_name"] == "Tesla"
+    assert store.get("../" + job_id) is None
+    with pytest.raises(ValueError):
+        store.update("../../outside", comparison={})
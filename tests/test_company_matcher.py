@@ -0,0 +1,59 @@
+from company_matcher import Company, CompanyMatcher, matcher_for
+
+
+def test_matches_names_on_word_boundaries():
+    matcher = CompanyMatcher([Company("Meta", tickers=("META",))])
+    assert matcher.match("Meta shares rise") == {"Meta"}
+    assert matcher.match("The metaverse is quiet") == set()
+
+
+def test_blank_names_match_nothing():
+    matcher = CompanyMatcher([Company("", aliases=(" ",), tickers=("",))])
+    assert matcher.match("Any headline at all") == set()
+    assert matcher_for("   ").match("Any headline at all") == set()
+
+
+def test_matches_aliases_case_insensitively():
+    matcher = CompanyMatcher([Company("Alphabet", aliases=("Google",))])
+    assert matcher.match("GOOGLE unveils a new model") == {"Alphabet"}
+    assert matcher.match("alphabet earnings") == {"Alphabet"}
+
+
+def test_tickers_match_only_as_written():
+    matcher = CompanyMatcher([Company("Microsoft", tickers=("MSFT",))])
+    assert matcher.match("MSFT closes higher") == {"Microsoft"}
+    assert matcher.match("msft closes higher") == set()
+
+
+def test_names_with_punctuation():
+    matcher = CompanyMatcher(
+        [Company("AT&T", tickers=("T",)), Company("C++ Foundation", aliases=("C++",))]
+    )
+    assert matcher.match("AT&T raises prices") == {"AT&T"}
+    assert matcher.match("BAT&TX is unrelated") == set()
+    assert matcher.match("Is C++ still popular?") == {"C++ Foundation"}
+    # Single-letter tickers still respect word boundaries
+    assert matcher.match("T shares slip") == {"AT&T"}
+    assert matcher.match("The Times reports") == set()
+
+
+def test_word_boundaries_can_be_disabled():
+    companies = [Company("Meta")]
+    assert CompanyMatcher(companies).match("The metaverse") == set()
+    assert CompanyMatcher(companies, word_boundary=False).match("The metaverse") == {"Meta"}
+
+
+def test_whitespace_in_names_and_text_is_normalized():
+    matcher = CompanyMatcher([Company("Meta  Platforms")])
+    assert matcher.match("Meta\nPlatforms reports") == {"Meta  Platforms"}
+
+
+def test_matches_every_mentioned_company():
+    matcher = CompanyMatcher([Company("Apple"), Company("Amazon"), Company("Tesla")])
+    assert matcher.match("Apple and Amazon trade places") == {"Apple", "Amazon"}
+
+
+def test_matcher_for_uses_registered_aliases_and_tickers():
+    assert matcher_for("google").match("GOOG climbs") == {"Alphabet"}
+    assert matcher_for("Facebook").match("Meta Platforms earnings") == {"Meta"}
+    assert matcher_for("Some Startup").match("Some Startup raises") == {"Some Startup"}
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetch_utils import AsyncFetcher
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /ok, /flaky (503 twice, then 200), /missing (404) and /slow."""
+
+    hits = {}
+
+    def do_GET(self):
+        StubHandler.hits[self.path] = StubHandler.hits.get(self.path, 0) + 1
+        if self.path == "/ok":
+            self.reply(200, "hello")
+        elif self.path == "/flaky":
+            self.reply(503 if StubHandler.hits[self.path] <= 2 else 200, "recovered")
+        elif self.path == "/slow":
+            time.sleep(0.5)
+            self.reply(200, "late")
+        else:
+            self.reply(404, "not found")
+
+    def reply(self, status, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except BrokenPipeError:
+            # The client gave up on /slow before the reply
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+async def fetch_with(fetcher, *urls):
+    try:
+        return await asyncio.gather(*[fetcher.fetch(url) for url in urls])
+    finally:
+        await fetcher.aclose()
+
+
+def test_fetch_returns_body(stub_server):
+    (page,) = asyncio.run(fetch_with(AsyncFetcher(), f"{stub_server}/ok"))
+    assert page == "hello"
+
+
+def test_fetch_retries_transient_status(stub_server):
+    fetcher = AsyncFetcher(retries=2, backoff=0.01)
+    (page,) = asyncio.run(fetch_with(fetcher, f"{stub_server}/flaky"))
+    assert page == "recovered"
+    assert StubHandler.hits["/flaky"] == 3
+
+
+def test_fetch_does_not_retry_client_errors(stub_server):
+    fetcher = AsyncFetcher(retries=2, backoff=0.01)
+    (page,) = asyncio.run(fetch_with(fetcher, f"{stub_server}/missing"))
+    assert page == ""
+    assert StubHandler.hits["/missing"] == 1
+
+
+def test_fetch_gives_up_after_timeouts(stub_server):
+    fetcher = AsyncFetcher(timeout=0.1, retries=1, backoff=0.01)
+    (page,) = asyncio.run(fetch_with(fetcher, f"{stub_server}/slow"))
+    assert page == ""
+    assert StubHandler.hits["/slow"] == 2
+
+
+def test_fetcher_survives_a_new_event_loop(stub_server):
+    fetcher = AsyncFetcher()
+    assert asyncio.run(fetcher.fetch(f"{stub_server}/ok")) == "hello"
+    # The client is rebuilt for the second loop instead of reusing the closed one
+    assert asyncio.run(fetch_with(fetcher, f"{stub_server}/ok")) == ["hello"]
+
+
+def test_a_new_event_loop_closes_the_previous_client(stub_server):
+    fetcher = AsyncFetcher()
+    assert asyncio.run(fetcher.fetch(f"{stub_server}/ok")) == "hello"
+    (old_client, _) = fetcher._pool._value
+
+    async def fetch_again():
+        page = await fetcher.fetch(f"{stub_server}/ok")
+        # Let the close task scheduled for the old client run
+        await asyncio.sleep(0)
+        await asyncio.gather(*fetcher._pool._closing)
+        return page
+
+    assert asyncio.run(fetch_again()) == "hello"
+    assert old_client.is_closed
+    asyncio.run(fetcher.aclose())
@@ -0,0 +1,87 @@
+import asyncio
+
+from jobs import JobQueue, JobStore
+
+
+def make_queue(store, first_stage, ran):
+    async def second_stage(context):
+        ran.append(context["job_id"])
+        return {"ok": True}
+
+    return JobQueue([("first", first_stage, 1), ("second", second_stage, 1)], store)
+
+
+async def wait_for_status(store, job_id, status):
+    for _ in range(200):
+        if store.get(job_id)["status"] == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}: {store.get(job_id)}")
+
+
+def test_jobs_run_through_every_stage(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    ran = []
+
+    async def first_stage(context):
+        pass
+
+    async def run():
+        queue = make_queue(store, first_stage, ran)
+        queue.start()
+        job_id, created = queue.submit({"company_name": "Tesla"}, "key")
+        await wait_for_status(store, job_id, "done")
+        await queue.stop()
+        return job_id, created
+
+    job_id, created = asyncio.run(run())
+    assert created
+    assert ran == [job_id]
+    assert store.get(job_id)["result"] == {"ok": True}
+
+
+def test_cancel_from_another_process_is_not_overwritten(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    ran = []
+
+    async def run():
+        owner_store = JobStore(path)
+        release = asyncio.Event()
+
+        async def first_stage(context):
+            await release.wait()
+
+        owner = make_queue(owner_store, first_stage, ran)
+        owner.start()
+        job_id, _ = owner.submit({"company_name": "Tesla"}, "key")
+        await wait_for_status(owner_store, job_id, "running")
+
+        # Another worker process shares the table but not the job's context or task
+        other = make_queue(JobStore(path), first_stage, ran)
+        assert other.cancel(job_id)
+        release.set()
+        await asyncio.sleep(0.1)
+        await owner.stop()
+        return owner_store.get(job_id), owner.contexts
+
+    job, contexts = asyncio.run(run())
+    assert job["status"] == "cancelled"
+    assert ran == []
+    assert contexts == {}
+
+
+def test_finished_jobs_cannot_be_cancelled(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def first_stage(context):
+        pass
+
+    async def run():
+        queue = make_queue(store, first_stage, [])
+        queue.start()
+        job_id, _ = queue.submit({}, "key")
+        await wait_for_status(store, job_id, "done")
+        await queue.stop()
+        return queue.cancel(job_id), queue.cancel("missing")
+
+    assert asyncio.run(run()) == (False, False)
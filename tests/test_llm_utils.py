@@ -0,0 +1,199 @@
+import asyncio
+import re
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from cache_utils import MemoryBackend, ResultCache
+from llm_utils import ChatBot, FinalAnalysis, TopicExtraction
+from metrics import collect_timings, llm_tokens
+from offline import FakeChatModel, synthetic_articles
+
+
+def make_chatbot(llm, count=4, **kwargs):
+    articles = [
+        {**article, "sentiment": "neutral"} for article in synthetic_articles(count)
+    ]
+    kwargs.setdefault("cache", None)
+    return ChatBot("test", "fake-model", articles, "Tesla", llm=llm, governor=None, **kwargs)
+
+
+class BrokenChatModel:
+    """Returns a parsing error the way with_structured_output(include_raw=True) does."""
+
+    def with_structured_output(self, schema, include_raw=False):
+        assert include_raw
+
+        async def ainvoke(prompt_value):
+            return {"raw": None, "parsed": None, "parsing_error": ValueError("bad json")}
+
+        return RunnableLambda(lambda prompt_value: None, afunc=ainvoke)
+
+
+def test_structured_invoke_returns_the_schema():
+    chatbot = make_chatbot(FakeChatModel())
+    response = asyncio.run(
+        chatbot.structured_invoke(
+            [("human", "Summarize {text}")], FinalAnalysis, {"text": "the analysis"}
+        )
+    )
+    assert isinstance(response, FinalAnalysis)
+    assert response.english and response.hindi
+
+
+def test_structured_invoke_records_token_usage():
+    before = dict(llm_tokens.values)
+    chatbot = make_chatbot(FakeChatModel())
+    asyncio.run(chatbot.topic_extraction(chatbot.articles[0]))
+    key = (("kind", "input"), ("task", "TopicExtraction"))
+    assert llm_tokens.values[key] > before.get(key, 0)
+
+
+class SlowGovernor:
+    """Holds every call back for a while, like a rate limit would."""
+
+    async def run(self, call, estimated_tokens=1_000):
+        await asyncio.sleep(0.2)
+        return await call()
+
+
+def test_governor_wait_is_not_counted_as_llm_latency():
+    chatbot = make_chatbot(FakeChatModel())
+    chatbot.governor = SlowGovernor()
+
+    async def run():
+        with collect_timings() as timings:
+            await chatbot.topic_extraction(chatbot.articles[0])
+        return {span["stage"]: span["ms"] for span in timings.breakdown()["spans"]}
+
+    spans = asyncio.run(run())
+    assert spans["llm_wait"] >= 200
+    assert spans["llm"] < 100
+
+
+def test_structured_invoke_raises_parsing_errors():
+    chatbot = make_chatbot(BrokenChatModel())
+    with pytest.raises(ValueError, match="bad json"):
+        asyncio.run(
+            chatbot.structured_invoke([("human", "{text}")], TopicExtraction, {"text": "x"})
+        )
+
+
+def test_structured_invoke_serves_repeats_from_the_cache():
+    llm = FakeChatModel()
+    chatbot = make_chatbot(llm, cache=ResultCache(MemoryBackend(), ttl=60))
+
+    async def run():
+        first = await chatbot.topic_extraction(chatbot.articles[0])
+        second = await chatbot.topic_extraction(chatbot.articles[0])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert llm.calls == 1
+
+
+def test_main_fills_every_result():
+    llm = FakeChatModel()
+    chatbot = make_chatbot(llm)
+    results = asyncio.run(chatbot.main([(0, 1, 0.9), (2, 3, 0.8)]))
+    assert results["errors"] == []
+    assert all(results["topic_extraction_results"])
+    assert len(results["topic_overlap_results"]) == 2
+    assert len(results["comparative_analysis_results"]) == 2
+    # One batched topic call plus an overlap and a comparison call per pair
+    assert llm.calls == 5
+
+
+def test_main_reports_failed_tasks():
+    chatbot = make_chatbot(BrokenChatModel(), count=2)
+    results = asyncio.run(chatbot.main([(0, 1, 0.9)], merge_pairs=True))
+    assert results["topic_extraction_results"] == [[], []]
+    assert results["comparative_analysis_results"] == []
+    assert {error["task"] for error in results["errors"]} >= {"pair_analysis 0, 1"}
+
+
+def test_cached_responses_are_scoped_to_the_api_key():
+    llm = FakeChatModel()
+    cache = ResultCache(MemoryBackend(), ttl=60)
+    first = make_chatbot(llm, cache=cache)
+    other_key = ChatBot(
+        "other-key", "fake-model", [], "Tesla", llm=llm, cache=cache, governor=None
+    )
+
+    async def run():
+        await first.topic_extraction(first.articles[0])
+        await first.topic_extraction(first.articles[0])
+        await other_key.topic_extraction(first.articles[0])
+
+    asyncio.run(run())
+    assert llm.calls == 2
+
+
+class LimitedBatchChatModel(FakeChatModel):
+    """Fails batch topic calls with more than max_articles articles."""
+
+    def __init__(self, max_articles):
+        super().__init__()
+        self.max_articles = max_articles
+        self.batch_sizes = []
+
+    def respond(self, schema, prompt):
+        if schema.__name__ == "BatchTopicExtraction":
+            size = len(re.findall(r"Article \d+:", prompt.split("Input Articles:")[-1]))
+            self.batch_sizes.append(size)
+            if size > self.max_articles:
+                self.calls += 1
+                raise ValueError("response too long")
+        return super().respond(schema, prompt)
+
+
+def test_failed_topic_batches_are_split_in_halves():
+    llm = LimitedBatchChatModel(max_articles=4)
+    chatbot = make_chatbot(llm, count=8)
+    topics = asyncio.run(chatbot.batch_topic_extraction(list(range(8))))
+    assert all(topics[i] for i in range(8))
+    assert llm.batch_sizes == [8, 4, 4]
+    assert chatbot.errors == []
+
+
+def test_exhausted_topic_batch_splits_fall_back_to_single_articles():
+    llm = LimitedBatchChatModel(max_articles=0)
+    chatbot = make_chatbot(llm, count=8)
+    topics = asyncio.run(chatbot.batch_topic_extraction(list(range(8))))
+    assert all(topics[i] for i in range(8))
+    # 8 -> 4 + 4 -> 2 + 2 + 2 + 2 batches, then one call per article
+    assert llm.batch_sizes == [8, 4, 4, 2, 2, 2, 2]
+    assert llm.calls == 7 + 8
+    assert chatbot.errors == []
+
+
+class SlowPairModel(FakeChatModel):
+    """Answers topic batches at once and every pair call after a long delay."""
+
+    def with_structured_output(self, schema, include_raw=False):
+        runnable = super().with_structured_output(schema, include_raw)
+        if schema.__name__ == "BatchTopicExtraction":
+            return runnable
+
+        async def slow(prompt_value):
+            await asyncio.sleep(30)
+            return await runnable.ainvoke(prompt_value)
+
+        return RunnableLambda(runnable.invoke, afunc=slow)
+
+
+def test_closing_the_stream_cancels_running_calls():
+    chatbot = make_chatbot(SlowPairModel())
+
+    async def run():
+        stream = chatbot.stream([(0, 1, 0.9), (2, 3, 0.8)])
+        first = await stream.__anext__()
+        await stream.aclose()
+        # Let the cancellations propagate through the nested langchain tasks
+        await asyncio.sleep(0.05)
+        return first, asyncio.all_tasks() - {asyncio.current_task()}
+
+    first, running = asyncio.run(run())
+    assert first["stage"] == "topic_extraction"
+    assert running == set()
@@ -0,0 +1,48 @@
+import asyncio
+
+from loop_utils import PerLoop
+
+
+def test_one_object_per_event_loop():
+    per_loop = PerLoop(asyncio.Lock)
+
+    async def get_twice():
+        first = per_loop.get()
+        assert per_loop.get() is first
+        return first
+
+    assert asyncio.run(get_twice()) is not asyncio.run(get_twice())
+
+
+def test_replaced_objects_are_closed_on_the_new_loop():
+    closed = []
+
+    async def close(value):
+        closed.append((value, asyncio.get_running_loop()))
+
+    per_loop = PerLoop(object, close=close)
+
+    async def first_get():
+        return per_loop.get()
+
+    first = asyncio.run(first_get())
+
+    async def replace():
+        per_loop.get()
+        await asyncio.sleep(0)
+        return asyncio.get_running_loop()
+
+    loop = asyncio.run(replace())
+    assert closed == [(first, loop)]
+
+
+def test_reset_returns_and_forgets_the_object():
+    per_loop = PerLoop(object)
+
+    async def run():
+        value = per_loop.get()
+        assert per_loop.reset() is value
+        assert per_loop.reset() is None
+        return per_loop.get() is not value
+
+    assert asyncio.run(run())
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_utils import ChatBot, TopicExtraction, make_chat_model
+from rate_limit import LLMGovernor, TokenBucket
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Minimal OpenAI-compatible /chat/completions endpoint. The first
+    rate_limited_requests requests get a 429 with a Retry-After header; the rest
+    get a structured answer filled from the requested JSON schema.
+    """
+
+    rate_limited_requests = 0
+    retry_after = "0.2"
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeOpenAIHandler.requests.append(time.monotonic())
+        if len(FakeOpenAIHandler.requests) <= FakeOpenAIHandler.rate_limited_requests:
+            self.reply(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                {"retry-after": FakeOpenAIHandler.retry_after},
+            )
+            return
+
+        if body.get("response_format"):
+            schema = body["response_format"]["json_schema"]["schema"]
+        elif body.get("tools"):
+            schema = body["tools"][0]["function"]["parameters"]
+        else:
+            schema = {"type": "string"}
+        arguments = json.dumps(self.fill(schema))
+        message = {"role": "assistant", "content": arguments}
+        if body.get("tools"):
+            function = {"name": body["tools"][0]["function"]["name"], "arguments": arguments}
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{"id": "call_0", "type": "function", "function": function}],
+            }
+        self.reply(
+            200,
+            {
+                "id": "chatcmpl-0",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            },
+        )
+
+    def fill(self, schema):
+        if schema.get("type") == "object":
+            return {name: self.fill(field) for name, field in schema["properties"].items()}
+        if schema.get("type") == "array":
+            return [self.fill(schema["items"])]
+        if schema.get("type") == "integer":
+            return 0
+        return "Finance"
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai():
+    FakeOpenAIHandler.rate_limited_requests = 0
+    FakeOpenAIHandler.retry_after = "0.2"
+    FakeOpenAIHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def make_chatbot(base_url, governor):
+    articles = [{"title": "Tesla beats estimates", "summary": "Shares rose.", "sentiment": "positive"}]
+    return ChatBot(
+        "test-key", "gpt-4o-mini", articles, "Tesla", cache=None, governor=governor,
+        base_url=base_url,
+    )
+
+
+def test_rate_limited_calls_wait_for_retry_after(fake_openai):
+    FakeOpenAIHandler.rate_limited_requests = 1
+    governor = LLMGovernor(base_delay=30)
+    chatbot = make_chatbot(fake_openai, governor)
+
+    topics = asyncio.run(chatbot.topic_extraction(chatbot.articles[0]))
+
+    assert topics == ["Finance"]
+    first, second = FakeOpenAIHandler.requests
+    # Retry-After (0.2 s, jittered down to no less than half) wins over base_delay
+    assert 0.1 <= second - first < 5
+    assert governor.stats() == {
+        "in_flight": 0, "calls": 2, "retries": 1, "rate_limited": 1, "failures": 0
+    }
+
+
+def test_rate_limit_errors_give_up_after_max_retries(fake_openai):
+    FakeOpenAIHandler.rate_limited_requests = 10
+    FakeOpenAIHandler.retry_after = "0.01"
+    governor = LLMGovernor(max_retries=2)
+    chatbot = make_chatbot(fake_openai, governor)
+
+    with pytest.raises(Exception) as error:
+        asyncio.run(chatbot.topic_extraction(chatbot.articles[0]))
+
+    assert getattr(error.value, "status_code", None) == 429
+    assert len(FakeOpenAIHandler.requests) == 3
+    assert governor.failures == 1
+
+
+def test_token_budget_delays_calls(fake_openai):
+    governor = LLMGovernor(tokens_per_minute=6_000)
+    llm = make_chat_model("test-key", "gpt-4o-mini", base_url=fake_openai)
+
+    async def run():
+        # The first call spends the whole budget; the next 30 tokens refill in 0.3 s
+        await governor.run(lambda: llm.ainvoke("hello"), estimated_tokens=6_000)
+        start = time.monotonic()
+        await governor.run(lambda: llm.ainvoke("hello"), estimated_tokens=30)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.25
+    assert len(FakeOpenAIHandler.requests) == 2
+
+
+def test_governor_works_across_event_loops():
+    governor = LLMGovernor(max_concurrency=1)
+
+    async def call():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        # Contended, so the semaphore and bucket locks are really waited on
+        return await asyncio.gather(*[governor.run(call, 1) for _ in range(3)])
+
+    assert asyncio.run(run()) == ["done"] * 3
+    assert asyncio.run(run()) == ["done"] * 3
+
+
+def test_token_bucket_caps_requests_at_capacity():
+    bucket = TokenBucket(per_minute=60)
+
+    async def run():
+        start = time.monotonic()
+        # More than the capacity still only waits for a full bucket
+        await bucket.acquire(1_000)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.1
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import threading
+import time
+
+from tts_utils import AudioCache, TTSBackend
+
+
+class FakeBackend(TTSBackend):
+    name = "fake"
+
+    def __init__(self, size=10, delay=0.0):
+        self.size = size
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def synthesize(self, text: str, lang: str, voice: str = None):
+        with self.lock:
+            self.calls.append((text, lang, voice))
+        time.sleep(self.delay)
+        return b"x" * self.size
+
+
+def synthesize(cache, text, lang="hi", voice=None):
+    return asyncio.run(cache.get_or_synthesize(text, lang, voice))
+
+
+def test_cached_audio_is_a_hit(tmp_path):
+    backend = FakeBackend()
+    cache = AudioCache(backend, str(tmp_path))
+    key = synthesize(cache, "namaste")
+    assert synthesize(cache, "namaste") == key
+    assert len(backend.calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    with open(cache.path(key), "rb") as f:
+        assert f.read() == b"x" * 10
+
+
+def test_concurrent_requests_share_one_synthesis(tmp_path):
+    backend = FakeBackend(delay=0.05)
+    cache = AudioCache(backend, str(tmp_path))
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_synthesize("namaste") for _ in range(3)])
+
+    assert len(set(asyncio.run(run()))) == 1
+    assert len(backend.calls) == 1
+
+
+def test_keys_differ_by_language_voice_and_backend(tmp_path):
+    cache = AudioCache(FakeBackend(), str(tmp_path))
+    keys = {
+        cache.key("namaste", "hi"),
+        cache.key("namaste", "en"),
+        cache.key("namaste", "hi", voice="co.in"),
+    }
+
+    class OtherBackend(FakeBackend):
+        name = "other"
+
+    keys.add(AudioCache(OtherBackend(), str(tmp_path)).key("namaste", "hi"))
+    assert len(keys) == 4
+
+
+def test_least_recently_used_audio_is_evicted(tmp_path):
+    cache = AudioCache(FakeBackend(size=10), str(tmp_path), max_bytes=25)
+    first = synthesize(cache, "one")
+    second = synthesize(cache, "two")
+    # Make "one" the most recently used before the third file pushes the total over
+    os.utime(cache.path(second), (1, 1))
+    synthesize(cache, "one")
+    third = synthesize(cache, "three")
+    assert cache.path(second) is None
+    assert cache.path(first) is not None
+    assert cache.path(third) is not None
+
+
+def test_audio_evicted_after_the_exists_check_is_synthesized_again(tmp_path, monkeypatch):
+    backend = FakeBackend()
+    cache = AudioCache(backend, str(tmp_path))
+    key = synthesize(cache, "namaste")
+
+    utime = os.utime
+
+    def evicted_once(path, *args, **kwargs):
+        monkeypatch.setattr(os, "utime", utime)
+        os.remove(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted_once)
+    assert synthesize(cache, "namaste") == key
+    assert len(backend.calls) == 2
+    assert cache.path(key) is not None
+    assert (cache.hits, cache.misses) == (0, 2)
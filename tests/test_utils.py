@@ -0,0 +1,51 @@
+import heapq
+import itertools
+
+import pytest
+import torch
+
+from utils import top_k_pairs
+
+
+def reference_top_k_pairs(embeddings, k):
+    """The original selection: every pair through heapq.nlargest."""
+    normalized = torch.nn.functional.normalize(embeddings.double(), p=2, dim=1)
+    cosine_scores = normalized @ normalized.T
+    pairs = itertools.combinations(range(len(embeddings)), 2)
+    scores = [(i, j, cosine_scores[i][j].item()) for i, j in pairs]
+    return heapq.nlargest(k, scores, key=lambda x: x[2])
+
+
+def assert_same_pairs(result, expected):
+    assert [(i, j) for i, j, _ in result] == [(i, j) for i, j, _ in expected]
+    assert [score for _, _, score in result] == pytest.approx(
+        [score for _, _, score in expected], abs=1e-5
+    )
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 3, 7])
+@pytest.mark.parametrize("n, k", [(2, 1), (5, 3), (12, 5), (30, 10), (6, 100)])
+def test_matches_the_reference_selection(n, k, block_size):
+    generator = torch.Generator().manual_seed(n * 1000 + k)
+    for _ in range(5):
+        embeddings = torch.randn(n, 16, generator=generator)
+        assert_same_pairs(
+            top_k_pairs(embeddings, k, block_size), reference_top_k_pairs(embeddings, k)
+        )
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 2, 4])
+@pytest.mark.parametrize("k", [1, 4, 9, 50])
+def test_tied_scores_keep_the_reference_order(k, block_size):
+    # Repeated one-hot rows give exact ties at 1.0 and 0.0
+    basis = torch.eye(3)
+    embeddings = basis[torch.tensor([0, 1, 0, 2, 1, 0, 2, 2])]
+    assert_same_pairs(
+        top_k_pairs(embeddings, k, block_size), reference_top_k_pairs(embeddings, k)
+    )
+
+
+def test_too_few_articles_or_pairs():
+    assert top_k_pairs(torch.randn(1, 4), k=5) == []
+    assert top_k_pairs(torch.randn(4, 4), k=0) == []
+    assert len(top_k_pairs(torch.randn(4, 4), k=100)) == 6
@@ -0,0 +1,134 @@
+"""
+Trains the linear sentiment head used by ANALYSIS_MODE=unified.
+
+The head is a softmax regression over the MiniLM sentence embeddings. Training
+data is a local .jsonl or .csv file with a "text" column (or "title" and
+"summary") and an optional "label" column (positive / negative / neutral).
+Rows without a label are labelled by the DeBERTa sentiment model with
+--teacher, so the head can be distilled from any collection of past articles.
+
+Usage:
+    python train_sentiment_head.py --data articles.jsonl --teacher
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+
+import numpy as np
+
+from utils import (
+    SENTIMENT_LABELS,
+    SemanticGrouping,
+    SentimentAnalyzer,
+    article_text,
+    save_sentiment_head,
+)
+
+
+def read_dataset(path):
+    """
+    Reads training rows.
+
+    Returns:
+        list of tuples: (text, label) pairs; label is None when the row has none.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    dataset = []
+    for row in rows:
+        text = row.get("text") or article_text(row)
+        label = (row.get("label") or "").strip().lower() or None
+        dataset.append((text, label))
+    return dataset
+
+
+def train_head(embeddings, targets, num_labels, epochs, lr, weight_decay):
+    """
+    Fits softmax regression with full-batch Adam.
+
+    Returns:
+        tuple of np.ndarray: The (dim, num_labels) weight and (num_labels,) bias.
+    """
+    import torch
+
+    features = torch.as_tensor(embeddings, dtype=torch.float32)
+    targets = torch.as_tensor(targets)
+    head = torch.nn.Linear(features.shape[1], num_labels)
+    optimizer = torch.optim.Adam(head.parameters(), lr=lr, weight_decay=weight_decay)
+    for _ in range(epochs):
+        optimizer.zero_grad()
+        loss = torch.nn.functional.cross_entropy(head(features), targets)
+        loss.backward()
+        optimizer.step()
+    return head.weight.detach().numpy().T, head.bias.detach().numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", required=True)
+    parser.add_argument(
+        "--out", default=os.environ.get("SENTIMENT_HEAD_PATH", ".cache/sentiment_head.npz")
+    )
+    parser.add_argument("--embedding-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--teacher", action="store_true", help="label unlabelled rows with DeBERTa")
+    parser.add_argument(
+        "--teacher-model", default="mrm8488/deberta-v3-ft-financial-news-sentiment-analysis"
+    )
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--lr", type=float, default=0.05)
+    parser.add_argument("--weight-decay", type=float, default=1e-4)
+    parser.add_argument("--val-split", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = read_dataset(args.data)
+    unlabelled = [i for i, (_, label) in enumerate(dataset) if label is None]
+    if unlabelled and args.teacher:
+        teacher = SentimentAnalyzer(args.teacher_model)
+        predictions = teacher.predict([dataset[i][0] for i in unlabelled])
+        for i, prediction in zip(unlabelled, predictions):
+            dataset[i] = (dataset[i][0], prediction["label"].lower())
+    dataset = [(text, label) for text, label in dataset if label is not None]
+
+    unknown = {label for _, label in dataset} - set(SENTIMENT_LABELS)
+    if unknown:
+        raise ValueError(f"Labels must be one of {SENTIMENT_LABELS}, got {sorted(unknown)}")
+    if not dataset:
+        raise ValueError("No labelled rows; pass --teacher to label them with DeBERTa.")
+
+    random.Random(args.seed).shuffle(dataset)
+    grouping = SemanticGrouping(args.embedding_model)
+    embeddings = grouping.encode([text for text, _ in dataset]).cpu().numpy()
+    targets = np.array([SENTIMENT_LABELS.index(label) for _, label in dataset])
+
+    split = int(len(dataset) * (1 - args.val_split))
+    weight, bias = train_head(
+        embeddings[:split],
+        targets[:split],
+        len(SENTIMENT_LABELS),
+        args.epochs,
+        args.lr,
+        args.weight_decay,
+    )
+    if split < len(dataset):
+        predicted = (embeddings[split:] @ weight + bias).argmax(axis=1)
+        accuracy = float(np.mean(predicted == targets[split:]))
+        print(f"Validation accuracy: {accuracy:.3f} on {len(dataset) - split} rows")
+
+    # The saved head is refit on all rows
+    weight, bias = train_head(
+        embeddings, targets, len(SENTIMENT_LABELS), args.epochs, args.lr, args.weight_decay
+    )
+    save_sentiment_head(args.out, weight, bias, SENTIMENT_LABELS, args.embedding_model)
+    print(f"Saved sentiment head trained on {len(dataset)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import abc
+import asyncio
+import io
+import os
+import tempfile
+import threading
+
+from cache_utils import text_hash
+from metrics import span
+
+
+class TTSBackend(abc.ABC):
+    """Interface for speech synthesis engines used by AudioCache."""
+
+    name = "base"
+    extension = "mp3"
+    media_type = "audio/mpeg"
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, lang: str, voice: str = None):
+        """
+        Synthesizes speech.
+
+        Returns:
+            bytes: The encoded audio.
+        """
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS. Needs network access."""
+
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str, voice: str = None):
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        # gTTS picks accents through the translate host tld, e.g. "co.in"
+        gTTS(text=text, lang=lang, tld=voice or "com", slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class Pyttsx3Backend(TTSBackend):
+    """Offline synthesis through pyttsx3 (eSpeak on Linux). Optional dependency."""
+
+    name = "pyttsx3"
+    extension = "wav"
+    media_type = "audio/wav"
+
+    def __init__(self):
+        import pyttsx3  # noqa: F401
+
+        # pyttsx3 engines are not thread-safe
+        self.lock = threading.Lock()
+
+    def synthesize(self, text: str, lang: str, voice: str = None):
+        import pyttsx3
+
+        with self.lock, tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "speech.wav")
+            engine = pyttsx3.init()
+            engine.setProperty("voice", voice or lang)
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+
+
+TTS_BACKENDS = {"gtts": GTTSBackend, "pyttsx3": Pyttsx3Backend}
+
+
+class AudioCache:
+    """
+    Content-addressed store of synthesized speech, keyed by text, language, voice
+    and backend. Files are evicted least recently used first once the directory
+    exceeds max_bytes. Synthesis runs in a worker thread, and concurrent requests
+    for the same audio share one synthesis.
+    """
+
+    def __init__(self, backend: TTSBackend, cache_dir: str, max_bytes: int = 200_000_000):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, text: str, lang: str, voice: str = None):
+        return text_hash(self.backend.name, lang, voice or "", text)
+
+    def path(self, key: str):
+        """Returns the file for a cached key, or None if it is not cached."""
+        path = os.path.join(self.cache_dir, f"{key}.{self.backend.extension}")
+        if os.path.exists(path):
+            return path
+        return None
+
+    def _store(self, key: str, audio: bytes):
+        path = os.path.join(self.cache_dir, f"{key}.{self.backend.extension}")
+        with open(path + ".tmp", "wb") as f:
+            f.write(audio)
+        os.replace(path + ".tmp", path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                # Evicted by a concurrent synthesis
+                continue
+            files.append((stat.st_mtime, stat.st_size, os.path.join(self.cache_dir, name)))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def get_or_synthesize(self, text: str, lang: str = "hi", voice: str = None):
+        """
+        Returns the cache key of the audio for text, synthesizing it off the event loop if needed.
+        """
+        key = self.key(text, lang, voice)
+        path = self.path(key)
+        if path is not None:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted since the exists check, so synthesize it again
+                path = None
+            else:
+                self.hits += 1
+                return key
+
+        if key not in self.inflight:
+            self.misses += 1
+
+            def synthesize():
+                with span("tts", backend=self.backend.name):
+                    audio = self.backend.synthesize(text, lang, voice)
+                return self._store(key, audio)
+
+            self.inflight[key] = asyncio.ensure_future(asyncio.to_thread(synthesize))
+            self.inflight[key].add_done_callback(lambda _: self.inflight.pop(key, None))
+        await asyncio.shield(self.inflight[key])
+        return key
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "backend": self.backend.name,
+        }
+
+
+audio_cache = AudioCache(
+    TTS_BACKENDS[os.environ.get("TTS_BACKEND", "gtts")](),
+    os.environ.get("AUDIO_CACHE_DIR", ".cache/audio"),
+    max_bytes=int(os.environ.get("AUDIO_CACHE_BYTES", 200_000_000)),
+)
@@ -1,146 +1,626 @@
-import requests
-from bs4 import BeautifulSoup
-from transformers import pipeline
-import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+# torch, transformers and sentence_transformers are imported where they are
+# used so importing this module (and api.py) stays fast
+import numpy as np
+from fetch_utils import AsyncFetcher
+from cache_utils import EmbeddingCache, text_hash
+from ann_index import IVFIndex
+from company_matcher import matcher_for
+from metrics import observe, span
+from sources import NewsSource, get_sources, parse_source_page
+from inference import (
+    BACKEND_TAGS,
+    check_backend,
+    load_sentence_transformer,
+    load_sequence_classifier,
+)
+
+
+def article_text(article):
+    """Builds the 'title. summary' text used for sentiment and similarity."""
+    return f"{article['title']}. {article['summary']}"
+
+
+def label_articles(articles_list, predictions):
+    """
+    Writes sentiment predictions onto articles.
 
-# from transformers import AutoModelForSequenceClassification, AutoTokenizer
-import itertools
-import re
-import heapq
-import torch
-from gtts import gTTS
+    Args:
+        articles_list (list of dict): Articles in the same order as predictions.
+        predictions (list of dict): {'label', 'score'} dicts from SentimentAnalyzer.predict.
+
+    Returns:
+        list of dict: The articles with 'sentiment' and 'sentiment_score' keys.
+    """
+    for article, prediction in zip(articles_list, predictions):
+        article["sentiment"] = prediction["label"]
+        article["sentiment_score"] = prediction["score"]
+    return articles_list
 
 
 def filter_articles(articles_list, company_name):
     """
-    Filters articles that only contain the company name.
+    Filters articles that mention the company by name, registered alias or ticker.
 
     Args:
         articles_list (list): List of dictionaries with 'title' and 'summary'.
         company_name (str): The company name to filter articles by.
 
     Returns:
-        list: A filtered list of articles that contain the company name.
+        list: A filtered list of articles that mention the company.
     """
-    articles_list_filtered = []
+    matcher = matcher_for(company_name)
+    return [
+        article
+        for article in articles_list
+        if matcher.match(f"{article['title']} {article['summary']}")
+    ]
 
-    for article in articles_list:
-        full_text = (article["title"] + " " + article["summary"]).lower()
 
-        if re.search(company_name.lower(), full_text):
-            articles_list_filtered.append(article)
+fetcher = AsyncFetcher()
 
-    return articles_list_filtered
+parse_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="news-parse")
 
 
-def bs4_extractor(company_name: str):
+async def extract_from_source(
+    source: NewsSource, query: str, news_fetcher: AsyncFetcher, executor=None
+):
     """
-    Extracts news articles from The New York Times and BBC for a given company.
+    Fetches one source and parses it off the event loop.
+
+    Returns:
+        tuple: (articles, stats) where stats holds fetch/parse times in ms and the article yield.
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    with span("fetch", source=source.name):
+        page = await news_fetcher.fetch(source.search_url(query), source.timeout)
+    fetch_ms = (time.perf_counter() - start) * 1000
+
+    articles, parse_ms = await loop.run_in_executor(
+        executor or parse_executor, parse_source_page, source, page
+    )
+    # Parsing may run in a process pool, so it is timed there and recorded here
+    observe("parse", parse_ms / 1000, source=source.name)
+    stats = {"fetch_ms": fetch_ms, "parse_ms": parse_ms, "articles": len(articles)}
+    return articles, stats
+
+
+async def extract_from_sources(
+    company_name: str,
+    sources: list = None,
+    news_fetcher: AsyncFetcher = None,
+    executor=None,
+):
+    """
+    Fetches and parses every registered source concurrently.
 
     Args:
         company_name (str): The name of the company to search for.
+        sources (list of NewsSource, optional): Sources to query. Defaults to the whole registry.
+        news_fetcher (AsyncFetcher, optional): The fetcher to use. Defaults to the shared module fetcher.
+        executor (Executor, optional): Thread or process pool used for parsing.
 
     Returns:
-        list: A list of dictionaries containing article titles and summaries.
+        tuple: (articles, source_stats) with articles in source order and stats keyed by source name.
     """
-    articles_list = []
-
-    # Fetch and parse NYTimes articles
-    nytimes_url = f"https://www.nytimes.com/search?query={company_name}"
-    nytimes_page = requests.get(nytimes_url).text
-    nytimes_soup = BeautifulSoup(nytimes_page, "html.parser")
+    sources = sources if sources is not None else get_sources()
+    news_fetcher = news_fetcher or fetcher
+    query = quote_plus(company_name)
+
+    results = await asyncio.gather(
+        *[
+            extract_from_source(source, query, news_fetcher, executor)
+            for source in sources
+        ]
+    )
+
+    articles_list, source_stats = [], {}
+    for source, (articles, stats) in zip(sources, results):
+        articles_list.extend(articles)
+        source_stats[source.name] = stats
+    return articles_list, source_stats
+
+
+# Articles returned per company
+MAX_ARTICLES = 10
+
+
+async def async_bs4_extractor(
+    company_name: str,
+    sources: list = None,
+    news_fetcher: AsyncFetcher = None,
+    deduplicate=None,
+):
+    """
+    Extracts news articles from the registered sources (The New York Times and BBC
+    by default) for a given company, fetching and parsing all sources concurrently.
 
-    for article in nytimes_soup.find_all("li", {"data-testid": "search-bodega-result"}):
-        try:
-            title = article.find("h4").text.strip()
-            summary = article.find("p", {"class": "css-e5tzus"}).text.strip()
+    Args:
+        company_name (str): The name of the company to search for.
+        sources (list of NewsSource, optional): Sources to query. Override to point at a stub server.
+        news_fetcher (AsyncFetcher, optional): The fetcher to use. Defaults to the shared module fetcher.
+        deduplicate (callable, optional): Blocking function deduplicate(articles, limit)
+            returning at most limit of the scraped articles, without duplicates. Runs in
+            a worker thread after filtering, so duplicates do not take up the limit.
 
-            if not title or not summary:
-                continue
+    Returns:
+        list: A list of dictionaries containing article titles and summaries.
+    """
+    # Per-source fetch and parse times are recorded as spans
+    with span("extract"):
+        articles_list, _ = await extract_from_sources(company_name, sources, news_fetcher)
 
-            articles_list.append({"title": title, "summary": summary})
-        except AttributeError as e:
-            print(f"NYTimes Extraction Error: {e}")
-            continue
+    # Filter before truncating so off-topic results do not crowd out relevant ones
+    articles_list = filter_articles(articles_list, company_name)
+    if deduplicate is not None:
+        articles_list = await asyncio.to_thread(deduplicate, articles_list, MAX_ARTICLES)
+    return articles_list[:MAX_ARTICLES]
 
-    # Fetch and parse BBC articles
-    bbc_url = f"https://www.bbc.com/search?q={company_name}"
-    bbc_page = requests.get(bbc_url).text
-    bbc_soup = BeautifulSoup(bbc_page, "html.parser")
 
-    for article in bbc_soup.find_all("div", {"data-testid": "newport-article"}):
-        try:
-            title = article.find("h2", {"data-testid": "card-headline"}).text.strip()
-            summary = article.find(
-                "div", {"class": "sc-4ea10043-3 kMizuB"}
-            ).text.strip()
+def bs4_extractor(company_name: str):
+    """
+    Extracts news articles from The New York Times and BBC for a given company.
+    Synchronous wrapper around async_bs4_extractor for use outside an event loop.
 
-            if not title or not summary:
-                continue
+    Args:
+        company_name (str): The name of the company to search for.
 
-            articles_list.append({"title": title, "summary": summary})
-        except AttributeError as e:
-            print(f"BBC Extraction Error: {e}")
-            continue
-    articles_list = articles_list[:10]
-    articles_filtered = filter_articles(articles_list, company_name)
-    return articles_filtered
+    Returns:
+        list: A list of dictionaries containing article titles and summaries.
+    """
 
+    async def _extract():
+        news_fetcher = AsyncFetcher()
+        try:
+            return await async_bs4_extractor(company_name, news_fetcher=news_fetcher)
+        finally:
+            await news_fetcher.aclose()
 
-def save_audio(hindi_text):
-    tts = gTTS(text=hindi_text, lang="hi", slow=False)
-    tts.save("output.mp3")
+    return asyncio.run(_extract())
 
 
 class SentimentAnalyzer:
 
     def __init__(
-        self, model_id="mrm8488/deberta-v3-ft-financial-news-sentiment-analysis"
+        self,
+        model_id="mrm8488/deberta-v3-ft-financial-news-sentiment-analysis",
+        batch_size=32,
+        max_length=512,
+        backend=os.environ.get("INFERENCE_BACKEND", "torch"),
+        num_threads=int(os.environ.get("INFERENCE_THREADS", 0)) or None,
+        onnx_cache_dir=os.environ.get("ONNX_CACHE_DIR", ".cache/onnx"),
     ):
-        device = "cuda:0" if torch.cuda.is_available() else "cpu"
-        self.pipe = pipeline(task="text-classification", model=model_id, device=device)
+        check_backend(backend)
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.backend = backend
+        self.num_threads = num_threads
+        self.onnx_cache_dir = onnx_cache_dir
+        self.model = None
+        self.load_lock = threading.Lock()
+
+    def load(self):
+        """
+        Loads the model for self.backend on first call. Safe to call from several
+        threads at once.
+        """
+        if self.model is None:
+            with self.load_lock:
+                if self.model is None:
+                    import torch
+
+                    model, self.tokenizer = load_sequence_classifier(
+                        self.model_id, self.backend, self.num_threads, self.onnx_cache_dir
+                    )
+                    if self.backend == "torch" and torch.cuda.is_available():
+                        model = model.to("cuda:0")
+                    self.device = model.device
+                    self.model = model
+        return self
+
+    def predict(self, texts, batch_size=None):
+        """
+        Runs batched sentiment inference over raw texts.
+
+        Texts are sorted by length so each batch is padded only to its own longest
+        member, then restored to input order.
+
+        Args:
+            texts (list of str): Texts to classify.
+            batch_size (int, optional): Texts per forward pass. Defaults to self.batch_size.
 
-    def classify_sentiments(self, articles_list):
+        Returns:
+            list of dict: One {'label', 'score'} dict per text, in input order.
+        """
+        import torch
+
+        self.load()
+        batch_size = batch_size or self.batch_size
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        id2label = self.model.config.id2label
+        predictions = [None] * len(texts)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                batch_ids = order[start : start + batch_size]
+                inputs = self.tokenizer(
+                    [texts[i] for i in batch_ids],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                ).to(self.device)
+                probs = self.model(**inputs).logits.softmax(dim=-1)
+                scores, labels = probs.max(dim=-1)
+                for i, label, score in zip(batch_ids, labels.tolist(), scores.tolist()):
+                    predictions[i] = {"label": id2label[label], "score": score}
+
+        return predictions
+
+    def classify_sentiments(self, articles_list, batch_size=None):
         """
         Classifies the sentiment of each article based on its title and summary.
 
         Args:
             articles_list (list of dict): A list of articles with 'title' and 'summary' keys.
+            batch_size (int, optional): Articles per forward pass. Defaults to self.batch_size.
 
         Returns:
-            list of dict: A new list with added 'sentiment' keys.
+            list of dict: A new list with added 'sentiment' and 'sentiment_score' keys.
         """
-        for article in articles_list:
-            sentiment = self.pipe(f"{article['title']}. {article['summary']}")
-            article["sentiment"] = sentiment[0]["label"]
+        texts = [article_text(article) for article in articles_list]
+        return label_articles(articles_list, self.predict(texts, batch_size))
+
+
+def _select_top_k(scores, rows, cols, k):
+    """
+    Picks the k largest scores, breaking ties by (row, col) order like
+    heapq.nlargest over itertools.combinations does.
+
+    Args:
+        scores, rows, cols (torch.Tensor): 1-d candidate tensors sorted by (row, col).
+        k (int): Number of pairs to keep.
+
+    Returns:
+        tuple of torch.Tensor: The selected (scores, rows, cols), best first.
+    """
+    import torch
+
+    k = min(k, scores.numel())
+    if k == 0:
+        return scores[:0], rows[:0], cols[:0]
+
+    kth_score = torch.topk(scores, k).values[-1]
+    candidates = torch.nonzero(scores >= kth_score).flatten()
+    order = torch.sort(-scores[candidates], stable=True).indices[:k]
+    selected = candidates[order]
+    return scores[selected], rows[selected], cols[selected]
+
 
-        return articles_list
+def top_k_pairs(embeddings, k=5, block_size=None):
+    """
+    Finds the k most similar (i, j) pairs with i < j without a Python loop over pairs.
+
+    Args:
+        embeddings (torch.Tensor): A (n, dim) embedding tensor.
+        k (int, optional): The number of top similar pairs to return. Defaults to 5.
+        block_size (int, optional): Rows scored at a time. When set, the full n x n
+            matrix is never materialized and only k candidates are kept between blocks.
+            Scores then match the full path up to float rounding.
+
+    Returns:
+        list of tuples: A list of (index1, index2, similarity_score) tuples.
+    """
+    import torch
+
+    n = embeddings.shape[0]
+    if n < 2 or k <= 0:
+        return []
+
+    normalized = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+    if block_size is None or block_size >= n:
+        cosine_scores = normalized @ normalized.T
+        rows, cols = torch.triu_indices(n, n, offset=1, device=cosine_scores.device)
+        scores, rows, cols = _select_top_k(cosine_scores[rows, cols], rows, cols, k)
+    else:
+        best = None
+        for start in range(0, n - 1, block_size):
+            block = normalized[start : start + block_size] @ normalized.T
+            block_rows, block_cols = torch.triu_indices(
+                block.shape[0], n, offset=start + 1, device=block.device
+            )
+            candidates = _select_top_k(
+                block[block_rows, block_cols], block_rows + start, block_cols, k
+            )
+            if best is not None:
+                # Earlier blocks hold earlier rows, so concatenation keeps (row, col) order
+                candidates = [torch.cat(pair) for pair in zip(best, candidates)]
+                order = torch.argsort(candidates[1] * n + candidates[2])
+                candidates = [tensor[order] for tensor in candidates]
+                candidates = _select_top_k(*candidates, k)
+            best = candidates
+        scores, rows, cols = best
+
+    return list(zip(rows.tolist(), cols.tolist(), scores.tolist()))
 
 
 class SemanticGrouping:
 
-    def __init__(self, model_id="sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_id="sentence-transformers/all-MiniLM-L6-v2",
+        cache_dir=os.environ.get("EMBEDDING_CACHE_DIR", ".cache/embeddings"),
+        cache_size=50_000,
+        block_size=1024,
+        block_threshold=4096,
+        history_dir=os.environ.get("HISTORY_INDEX_DIR", ".cache/history"),
+        backend=os.environ.get("INFERENCE_BACKEND", "torch"),
+        num_threads=int(os.environ.get("INFERENCE_THREADS", 0)) or None,
+        onnx_cache_dir=os.environ.get("ONNX_CACHE_DIR", ".cache/onnx"),
+    ):
+        check_backend(backend)
+        self.backend = backend
+        self.num_threads = num_threads
+        self.onnx_cache_dir = onnx_cache_dir
+        self.block_size = block_size
+        self.block_threshold = block_threshold
+        self.model_id = model_id
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.history_dir = history_dir
+        self.history = {}
+        self.history_lock = threading.Lock()
+        self._model = None
+        self.cache = None
+        self.load_lock = threading.Lock()
+
+    def load(self):
+        """
+        Loads the model and opens the embedding cache on first call. Safe to call
+        from several threads at once.
+        """
+        if self._model is None:
+            with self.load_lock:
+                if self._model is None:
+                    model = load_sentence_transformer(
+                        self.model_id, self.backend, self.num_threads, self.onnx_cache_dir
+                    )
+                    if self.cache_dir:
+                        # Each backend's embeddings differ slightly, so each gets its own cache
+                        self.cache = EmbeddingCache(
+                            os.path.join(self.cache_dir, BACKEND_TAGS[self.backend]),
+                            self.model_id,
+                            model.get_sentence_embedding_dimension(),
+                            capacity=self.cache_size,
+                        )
+                    self._model = model
+        return self
+
+    @property
+    def model(self):
+        return self.load()._model
+
+    def encode(self, articles):
+        """
+        Encodes article texts into sentence embeddings.
+
+        Args:
+            articles (list of str): A list of article texts.
+
+        Returns:
+            torch.Tensor: A (len(articles), dim) embedding tensor.
+        """
+        import torch
+
+        self.load()
+        if self.cache is None:
+            return self.model.encode(articles, convert_to_tensor=True)
+
+        found, missing = self.cache.get_many(articles)
+        if missing:
+            new_embeddings = self.model.encode(
+                [articles[i] for i in missing], convert_to_numpy=True
+            )
+            self.cache.put_many([articles[i] for i in missing], new_embeddings)
+            found.update(zip(missing, new_embeddings))
 
-        self.model = SentenceTransformer(model_id)
+        embeddings = np.stack([found[i] for i in range(len(articles))])
+        return torch.from_numpy(embeddings).to(self.model.device)
 
-    def find_top_k_similar_articles(self, articles, k=5):
+    def find_top_k_similar_articles(
+        self, articles, k=5, embeddings=None, block_size=None
+    ):
         """
         Finds the top-k most similar pairs of articles using cosine similarity.
 
         Args:
             articles (list of str): A list of article texts to compare.
             k (int, optional): The number of top similar pairs to return. Defaults to 5.
+            embeddings (torch.Tensor, optional): Precomputed embeddings of articles, skips encoding.
+            block_size (int, optional): Score this many rows at a time instead of the full matrix.
+                Defaults to self.block_size once there are more than self.block_threshold articles.
 
         Returns:
             list of tuples: A list of (index1, index2, similarity_score) tuples.
         """
-        embeddings = self.model.encode(articles, convert_to_tensor=True)
-        cosine_scores = util.pytorch_cos_sim(embeddings, embeddings)
+        if embeddings is None:
+            embeddings = self.encode(articles)
+
+        if block_size is None and len(articles) > self.block_threshold:
+            block_size = self.block_size
+        return top_k_pairs(embeddings, k, block_size)
+
+    def get_history(self, company_name):
+        """
+        Returns the persistent ANN index of past coverage for a company, loading it on first use.
+        """
+        key = company_name.strip().lower()
+        with self.history_lock:
+            if key not in self.history:
+                path = self._history_path(key)
+                if path and os.path.exists(path + ".json"):
+                    self.history[key] = IVFIndex.load(path)
+                else:
+                    self.history[key] = IVFIndex(
+                        self.model.get_sentence_embedding_dimension()
+                    )
+            return self.history[key]
+
+    def _history_path(self, key):
+        if not self.history_dir:
+            return None
+        return os.path.join(self.history_dir, text_hash(self.model_id, key)[:16])
+
+    def add_to_history(self, company_name, articles, embeddings=None):
+        """
+        Adds articles to a company's history index and saves it.
+
+        Args:
+            company_name (str): The company the articles cover.
+            articles (list of str): Article texts.
+            embeddings (torch.Tensor, optional): Precomputed embeddings of articles.
+
+        Returns:
+            int: The number of articles not already in the history.
+        """
+        if embeddings is None:
+            embeddings = self.encode(articles)
+        index = self.get_history(company_name)
+        added = index.add(
+            embeddings.cpu().numpy(),
+            [{"text": text} for text in articles],
+            keys=[text_hash(text) for text in articles],
+        )
+        path = self._history_path(company_name.strip().lower())
+        if added and path:
+            index.save(path)
+        return added
+
+    def find_similar_in_history(self, company_name, articles, k=5, embeddings=None):
+        """
+        Finds the most similar past articles for each given article.
+
+        Args:
+            company_name (str): The company whose history to search.
+            articles (list of str): Article texts to look up.
+            k (int, optional): Neighbours per article. Defaults to 5.
+            embeddings (torch.Tensor, optional): Precomputed embeddings of articles.
+
+        Returns:
+            list of list of tuples: Per article, (text, similarity_score) tuples, best first.
+        """
+        if embeddings is None:
+            embeddings = self.encode(articles)
+        index = self.get_history(company_name)
+        results = index.search(embeddings.cpu().numpy(), k)
+        return [
+            [(payload["text"], score) for _, score, payload in neighbours]
+            for neighbours in results
+        ]
 
-        pairs = itertools.combinations(range(len(articles)), 2)
-        similarity_scores = [(i, j, cosine_scores[i][j].item()) for i, j in pairs]
 
-        top_k_pairs = heapq.nlargest(k, similarity_scores, key=lambda x: x[2])
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+
+
+def save_sentiment_head(path, weight, bias, labels, model_id):
+    """
+    Saves a linear sentiment head trained on sentence embeddings.
+
+    Args:
+        path (str): Destination .npz file.
+        weight (np.ndarray): A (dim, num_labels) weight matrix.
+        bias (np.ndarray): A (num_labels,) bias vector.
+        labels (list of str): Label of each output column.
+        model_id (str): The embedding model the head was trained on.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(
+        path,
+        weight=np.asarray(weight, dtype=np.float32),
+        bias=np.asarray(bias, dtype=np.float32),
+        labels=np.array(labels),
+        model_id=np.array(model_id),
+    )
+
+
+class EmbeddingSentimentHead:
+    """
+    Sentiment from the sentence embeddings SemanticGrouping already computes: a
+    linear head (see train_sentiment_head.py) over the MiniLM embedding, so one
+    encoder pass serves both sentiment and similarity and the DeBERTa model is
+    never loaded. Drop-in for SentimentAnalyzer.
+    """
+
+    def __init__(
+        self,
+        grouping: SemanticGrouping,
+        head_path=os.environ.get("SENTIMENT_HEAD_PATH", ".cache/sentiment_head.npz"),
+    ):
+        self.grouping = grouping
+        self.head_path = head_path
+        self.weight = None
+        self.load_lock = threading.Lock()
+
+    def load(self):
+        """
+        Loads the head and the embedding model on first call. Safe to call from
+        several threads at once.
+        """
+        if self.weight is None:
+            with self.load_lock:
+                if self.weight is None:
+                    with np.load(self.head_path) as head:
+                        if str(head["model_id"]) != self.grouping.model_id:
+                            raise ValueError(
+                                f"Sentiment head {self.head_path} was trained on "
+                                f"{head['model_id']}, not {self.grouping.model_id}"
+                            )
+                        self.bias = head["bias"]
+                        self.labels = [str(label) for label in head["labels"]]
+                        self.weight = head["weight"]
+        self.grouping.load()
+        return self
+
+    def predict_embeddings(self, embeddings):
+        """
+        Classifies precomputed sentence embeddings.
+
+        Args:
+            embeddings (torch.Tensor): A (n, dim) embedding tensor.
+
+        Returns:
+            list of dict: One {'label', 'score'} dict per row.
+        """
+        self.load()
+        logits = embeddings.cpu().numpy() @ self.weight + self.bias
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        return [
+            {"label": self.labels[label], "score": float(row[label])}
+            for row, label in zip(probs, probs.argmax(axis=1))
+        ]
+
+    def predict(self, texts, batch_size=None):
+        """
+        Runs sentiment inference over raw texts through the embedding model.
+
+        Args:
+            texts (list of str): Texts to classify.
+            batch_size (int, optional): Unused, kept for SentimentAnalyzer compatibility.
+
+        Returns:
+            list of dict: One {'label', 'score'} dict per text, in input order.
+        """
+        return self.predict_embeddings(self.grouping.encode(texts))
 
-        return top_k_pairs
+    def classify_sentiments(self, articles_list, batch_size=None):
+        texts = [article_text(article) for article in articles_list]
+        return label_articles(articles_list, self.predict(texts))